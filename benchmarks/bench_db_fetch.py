@@ -0,0 +1,106 @@
+"""
+Benchmark de las vías de lectura de DBManager.
+
+Crea una base de datos temporal con N proyectos y mide el coste por fila de:
+  - legacy: row_factory = sqlite3.Row en la conexión + dict(row) + tuple(dict.values())
+            (lo que hacía get_all_projects antes)
+  - fetch_query: diccionarios construidos desde las tuplas
+  - fetch_rows: tuplas sin conversión
+  - fetch_rows(named=True): namedtuples
+  - fetch_columns: resultado por columnas
+
+Uso:
+    python benchmarks/bench_db_fetch.py [--rows 50000] [--repeat 5]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+
+QUERY = """
+    SELECT id, name, description, status, weight_grams, print_time_hours,
+           total_cost, filament_cost, energy_cost, created_at, completed_at, user_id
+    FROM projects WHERE user_id = ? ORDER BY id DESC
+"""
+
+
+def populate(db, rows):
+    db.execute_query("""
+        CREATE TABLE projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, description TEXT, status TEXT,
+            weight_grams REAL, print_time_hours REAL, total_cost REAL, filament_cost REAL,
+            energy_cost REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, completed_at TIMESTAMP,
+            user_id INTEGER
+        )
+    """)
+    db.execute_many(
+        "INSERT INTO projects (name, description, status, weight_grams, print_time_hours, "
+        "total_cost, filament_cost, energy_cost, user_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)",
+        [(f"Proyecto {i}", "Pieza de prueba", "Pendiente", 12.5 + i % 100, 1.5, 3.2, 2.1, 1.1)
+         for i in range(rows)]
+    )
+
+
+def legacy_fetch(db):
+    """Implementación anterior: Row en la conexión, dict por fila y vuelta a tupla."""
+    connection = db.connection
+    connection.row_factory = sqlite3.Row
+    cursor = connection.cursor()
+    try:
+        cursor.execute(QUERY, (1,))
+        results = [dict(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        connection.row_factory = None
+    return [tuple(r.values()) for r in results]
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = DBManager(path)
+        populate(db, args.rows)
+
+        cases = {
+            'legacy (Row+dict+tuple)': lambda: legacy_fetch(db),
+            'fetch_query (dict)': lambda: db.fetch_query(QUERY, (1,)),
+            'fetch_rows (tupla)': lambda: db.fetch_rows(QUERY, (1,)),
+            'fetch_rows (namedtuple)': lambda: db.fetch_rows(QUERY, (1,), named=True),
+            'fetch_columns': lambda: db.fetch_columns(QUERY, (1,)),
+        }
+        baseline = None
+        for name, func in cases.items():
+            elapsed = best_time(func, args.repeat)
+            per_row_us = elapsed / args.rows * 1e6
+            baseline = baseline or per_row_us
+            print(f"{name:26} {elapsed * 1000:8.1f} ms  {per_row_us:6.3f} µs/fila  x{baseline / per_row_us:4.1f}")
+    finally:
+        ConnectionPool.for_file(path).close_all()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
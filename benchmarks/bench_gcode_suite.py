@@ -0,0 +1,345 @@
+"""
+Suite de benchmarks de SlicerParser sobre G-code sintético realista.
+
+Genera archivos de Cura, PrusaSlicer, OrcaSlicer y BambuStudio (cabeceras, capas con
+;TYPE:, cambios de herramienta del AMS y pies con la configuración) del tamaño pedido,
+y mide tiempo, pico de memoria (RSS) y rendimiento de cada modo de lectura:
+cabecera+pie, full_scan, mmap, layer_stats, análisis de movimientos, .gcode.gz y .3mf.
+
+Cada medición se hace en un proceso nuevo para que el pico de RSS sea el del modo medido.
+Los resultados se guardan en JSON; con --baseline se comparan con una ejecución anterior
+y el programa termina con código 1 si algún caso pierde más de --tolerance de rendimiento.
+
+Uso:
+    python benchmarks/bench_gcode_suite.py [--sizes 1,16,128] [--flavors cura,prusa,orca,bambu]
+                                           [--paths head_tail,full_scan,...] [--output resultados.json]
+                                           [--baseline anterior.json] [--tolerance 0.2]
+
+Para el caso grande: --sizes 1,64,512,2048 (requiere ~2 GB libres por archivo en --workdir).
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sin medición de RSS
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from src.logic.slicer_parser import SlicerParser
+from src.logic.gcode_analyzer import GcodeAnalyzer
+
+MB = 1024 * 1024
+
+# Valores que deben salir del análisis de cada slicer
+EXPECTED_TIME = {'cura': 6666, 'prusa': 6666, 'orca': 6666, 'bambu': 6666}
+# Error admitido en el filamento que calcula el análisis de movimientos frente al generado
+# (la retracción final de Cura, p. ej., no se cuenta al generar)
+MOTION_TOLERANCE = 0.01
+
+ALL_FLAVORS = ('cura', 'prusa', 'orca', 'bambu')
+ALL_PATHS = ('head_tail', 'full_scan', 'mmap', 'layer_stats', 'motion', 'gzip', '3mf')
+# Rutas que leen un contenedor generado aparte (se limitan con --max-container-mb)
+CONTAINER_PATHS = ('gzip', '3mf')
+
+FEATURES = {
+    'cura': ('WALL-OUTER', 'WALL-INNER', 'FILL', 'SUPPORT'),
+    'prusa': ('External perimeter', 'Perimeter', 'Internal infill', 'Support material'),
+    'orca': ('Outer wall', 'Inner wall', 'Sparse infill', 'Support'),
+    'bambu': ('Outer wall', 'Inner wall', 'Sparse infill', 'Support'),
+}
+
+
+def config_block(prefix, lines=120):
+    """Bloque de configuración que los slicers escriben como comentarios."""
+    return "".join(f"; {prefix}_setting_{i} = {i * 0.05:.2f}\n" for i in range(lines))
+
+
+def header(flavor):
+    if flavor == 'cura':
+        return (
+            ";FLAVOR:Marlin\n;TIME:6666\n;Filament used: 12.3456m\n;Layer height: 0.2\n"
+            ";MINX:10\n;MINY:10\n;MINZ:0.2\n;MAXX:200\n;MAXY:200\n;MAXZ:50\n"
+            ";Generated with Cura_SteamEngine 5.6.0\nM140 S60\nM105\nM190 S60\nM104 S200\n"
+            "M109 S200\nM82 ;absolute extrusion mode\nG28\nG92 E0\n"
+        )
+    if flavor == 'prusa':
+        return "; generated by PrusaSlicer 2.7.1\n\n; external perimeters extrusion width = 0.45mm\nG28\nG90\nM83\n"
+    if flavor == 'orca':
+        return (
+            "; HEADER_BLOCK_START\n; generated by OrcaSlicer 2.0.0\n; total layer number: 250\n"
+            "; HEADER_BLOCK_END\n\n; CONFIG_BLOCK_START\n" + config_block('orca', 40) +
+            "; CONFIG_BLOCK_END\n\nG28\nG90\nM83\n"
+        )
+    return (
+        "; HEADER_BLOCK_START\n; BambuStudio 01.08.04.51\n"
+        "; model printing time: 1h 45m 2s; total estimated time: 1h 51m 6s\n"
+        "; total layer number: 250\n; total filament length [mm] : 9000.00,3345.60\n"
+        "; total filament weight [g] : 26.85,9.98\n; filament_density: 1.24,1.24\n"
+        "; HEADER_BLOCK_END\n\nG28\nG90\nM83\n"
+    )
+
+
+def footer(flavor):
+    if flavor == 'cura':
+        return "M140 S0\nM107\nG91\nG1 E-2 F2700\nG90\nM84\nM82 ;absolute extrusion mode\nM104 S0\n;End of Gcode\n"
+    if flavor == 'bambu':
+        usage = (
+            "; filament used [mm] = 9000.00, 3345.60\n; filament used [cm3] = 21.65, 8.05\n"
+            "; filament used [g] = 26.85, 9.98\n; filament cost = 0.67, 0.25\n"
+        )
+    else:
+        usage = (
+            "; filament used [mm] = 12345.60\n; filament used [cm3] = 29.70\n"
+            "; filament used [g] = 36.83\n; filament cost = 0.92\n"
+        )
+    return (
+        "M104 S0\nM140 S0\nM107\nM84\n\n" + usage +
+        "; total filament used [g] = 36.83\n; estimated printing time (normal mode) = 1h 51m 6s\n\n"
+        f"; {flavor}_config = begin\n" + config_block(flavor) + f"; {flavor}_config = end\n"
+    )
+
+
+def layer_template(flavor):
+    """
+    Una capa tipo: perímetros, relleno y soporte con los comentarios de cada slicer.
+    {z} y {layer} se sustituyen en cada capa; el resto se reutiliza para generar rápido.
+
+    Returns:
+        tuple: (plantilla, mm de filamento extruidos en la capa)
+    """
+    features = FEATURES[flavor]
+    relative_e = flavor != 'cura'
+    lines = []
+    if flavor == 'cura':
+        lines.append(";LAYER:{layer}\nG92 E0\nG0 F6000 X20 Y20 Z{z}\n")
+    else:
+        lines.append(";LAYER_CHANGE\n;Z:{z}\n;HEIGHT:0.2\nG1 Z{z} F720\n")
+    if flavor == 'bambu':
+        lines.append("M620 S1A\nT1\nM621 S1A\n")
+    e = 0.0
+    for index, feature in enumerate(features):
+        lines.append(f";TYPE:{feature}\n;WIDTH:0.45\n")
+        for i in range(60):
+            x = 20 + (i * 7.31 + index * 13.7) % 160
+            y = 20 + (i * 3.17 + index * 29.3) % 160
+            step = 0.03412 + (i % 5) * 0.0011
+            e += step
+            lines.append(f"G1 X{x:.3f} Y{y:.3f} E{step if relative_e else e:.5f}\n")
+        lines.append(f"G0 F9000 X{20 + index * 9.5:.3f} Y{180 - index * 7.25:.3f}\n")
+    # Lo que suman los valores E tal como se escriben (5 decimales)
+    extruded = float(f"{e:.5f}") if not relative_e else sum(
+        float(f"{0.03412 + (i % 5) * 0.0011:.5f}") for i in range(60)) * len(features)
+    return "".join(lines), extruded
+
+
+def generate_file(path, flavor, size_mb):
+    """
+    Escribe un G-code de aproximadamente size_mb MB con el formato del slicer indicado.
+
+    Returns:
+        tuple: (tamaño en bytes, metros de filamento extruidos en las capas)
+    """
+    target = int(size_mb * MB)
+    template, layer_extrusion = layer_template(flavor)
+    tail = footer(flavor).encode()
+    with open(path, 'wb') as f:
+        written = f.write(header(flavor).encode())
+        layer = 0
+        buffer = []
+        buffered = 0
+        while written + buffered + len(tail) < target:
+            chunk = template.format(z=f"{0.2 + layer * 0.2:.2f}", layer=layer).encode()
+            buffer.append(chunk)
+            buffered += len(chunk)
+            layer += 1
+            if buffered >= 4 * MB:
+                written += f.write(b"".join(buffer))
+                buffer, buffered = [], 0
+        written += f.write(b"".join(buffer))
+        f.write(tail)
+    return os.path.getsize(path), layer * layer_extrusion / 1000.0
+
+
+def make_containers(path, flavor):
+    """Genera las versiones .gcode.gz y .3mf del archivo (el 3MF con el G-code como placa 1)."""
+    gz_path = path + '.gz'
+    with open(path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 4 * MB)
+    threemf_path = os.path.splitext(path)[0] + '.3mf'
+    with zipfile.ZipFile(threemf_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("3D/3dmodel.model", "<model unit=\"millimeter\"/>")
+        archive.writestr("Metadata/slice_info.config", f"<config><plate><metadata key=\"index\" value=\"1\"/></plate></config>")
+        archive.write(path, "Metadata/plate_1.gcode")
+    return {'gzip': gz_path, '3mf': threemf_path}
+
+
+def peak_rss_mb():
+    """Pico de RSS del proceso actual en MB (ru_maxrss va en KB en Linux y en bytes en macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+
+def run_path(path_name, file_path):
+    """Ejecuta un modo de lectura (en el proceso hijo) y devuelve (segundos, resultado, RSS base, RSS pico)."""
+    parser = SlicerParser()
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if path_name == 'motion':
+        data = GcodeAnalyzer().analyze_file(file_path)
+    elif path_name == 'layer_stats':
+        data = parser.parse_file(file_path, layer_stats=True)
+        if data:
+            data['layers'] = len(data.pop('layer_stats')['layers'])
+    elif path_name == 'full_scan':
+        data = parser.parse_file(file_path, full_scan=True)
+    elif path_name == 'mmap':
+        data = parser.parse_file(file_path, use_mmap=True)
+    else:
+        data = parser.parse_file(file_path)
+    elapsed = time.perf_counter() - start
+    return elapsed, data, baseline, peak_rss_mb()
+
+
+def measure(path_name, file_path, size_bytes, flavor, filament_m):
+    """
+    Mide un caso en un proceso nuevo (spawn) para aislar el pico de memoria. Los metadatos se
+    dan por buenos si coinciden con los generados: el tiempo de la cabecera o, en el análisis
+    de movimientos, el filamento extruido (filament_m) con un error de MOTION_TOLERANCE.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        elapsed, data, baseline, peak = pool.apply(run_path, (path_name, file_path))
+
+    if path_name == 'motion':
+        metadata_ok = bool(
+            data and data['print_time_seconds'] > 0
+            and abs(data['filament_length_m'] - filament_m) <= filament_m * MOTION_TOLERANCE
+        )
+    else:
+        metadata_ok = bool(data and data.get('print_time_seconds') == EXPECTED_TIME[flavor])
+    return {
+        'flavor': flavor,
+        'path': path_name,
+        'size_mb': round(size_bytes / MB, 2),
+        'seconds': round(elapsed, 4),
+        'mb_per_s': round(size_bytes / MB / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        'rss_delta_mb': round(peak - baseline, 1) if peak is not None else None,
+        'metadata_ok': metadata_ok,
+        'result': data,
+    }
+
+
+def compare(results, baseline_file, tolerance):
+    """Compara el rendimiento con una ejecución anterior; devuelve la lista de regresiones."""
+    with open(baseline_file, encoding='utf-8') as f:
+        previous = {
+            (r['flavor'], r['path'], r['size_mb']): r for r in json.load(f)['results']
+        }
+    regressions = []
+    for result in results:
+        old = previous.get((result['flavor'], result['path'], result['size_mb']))
+        if not old or not old.get('mb_per_s') or not result.get('mb_per_s'):
+            continue
+        if result['mb_per_s'] < old['mb_per_s'] * (1 - tolerance):
+            regressions.append((result, old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,16,128', help="Tamaños en MB separados por comas")
+    parser.add_argument('--flavors', default=','.join(ALL_FLAVORS))
+    parser.add_argument('--paths', default=','.join(ALL_PATHS))
+    parser.add_argument('--max-container-mb', type=float, default=256,
+                        help="Tamaño máximo para generar y medir .gcode.gz y .3mf")
+    parser.add_argument('--workdir', default=None, help="Directorio para los archivos generados")
+    parser.add_argument('--output', default=None,
+                        help="Archivo JSON de resultados (por defecto, en el directorio temporal del sistema)")
+    parser.add_argument('--baseline', default=None, help="JSON de una ejecución anterior con la que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Pérdida de rendimiento admitida (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sizes = [float(s) for s in args.sizes.split(',') if s]
+    flavors = [f for f in args.flavors.split(',') if f]
+    paths = [p for p in args.paths.split(',') if p]
+    unknown = set(flavors) - set(ALL_FLAVORS) | set(paths) - set(ALL_PATHS)
+    if unknown:
+        parser.error(f"Valores desconocidos: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix='gcode_bench_', dir=args.workdir)
+    results = []
+    try:
+        for size_mb in sizes:
+            for flavor in flavors:
+                file_path = os.path.join(workdir, f"{flavor}_{size_mb:g}mb.gcode")
+                size, filament_m = generate_file(file_path, flavor, size_mb)
+                containers = {}
+                if size_mb <= args.max_container_mb and set(paths) & set(CONTAINER_PATHS):
+                    containers = make_containers(file_path, flavor)
+
+                for path_name in paths:
+                    if path_name in CONTAINER_PATHS:
+                        if path_name not in containers:
+                            continue
+                        target = containers[path_name]
+                    else:
+                        target = file_path
+                    # El rendimiento se expresa siempre sobre el tamaño del G-code descomprimido
+                    result = measure(path_name, target, size, flavor, filament_m)
+                    results.append(result)
+                    rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "n/d"
+                    flag = "" if result['metadata_ok'] else "  [metadatos NO encontrados]"
+                    print(f"{flavor:6} {size / MB:8.1f} MB {path_name:12} {result['seconds']:9.3f} s "
+                          f"{result['mb_per_s'] or 0:9.1f} MB/s  RSS {rss}{flag}")
+
+                for generated in [file_path, *containers.values()]:
+                    os.remove(generated)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    # Por defecto fuera del repositorio: los resultados dependen de la máquina
+    output = args.output or os.path.join(
+        tempfile.gettempdir(), f"gcode_suite_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {output}")
+
+    status = 0
+    if any(not r['metadata_ok'] for r in results):
+        print("AVISO: algún modo no encontró los metadatos esperados")
+        status = 1
+    if args.baseline:
+        for result, old in compare(results, args.baseline, args.tolerance):
+            print(f"REGRESIÓN {result['flavor']} {result['size_mb']} MB {result['path']}: "
+                  f"{old['mb_per_s']} -> {result['mb_per_s']} MB/s")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
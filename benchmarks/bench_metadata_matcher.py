@@ -0,0 +1,98 @@
+"""
+Micro-benchmark del extractor de metadatos de SlicerParser.
+
+Compara el coste por archivo de la implementación anterior (varios re.search
+independientes por campo, y una segunda pasada de Prusa cuando Cura falla)
+con el patrón combinado actual (_parse_metadata), sobre muestras del tamaño
+que produce la lectura de cabecera + pie.
+
+Uso:
+    python benchmarks/bench_metadata_matcher.py [--iterations 2000]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.slicer_parser import SlicerParser
+
+FILLER = "G1 X100.123 Y100.456 E0.03412\n;WIDTH:0.45\n" * 700
+
+SAMPLES = {
+    'cura': ";FLAVOR:Marlin\n;TIME:3665\n;Filament used: 1.23m\n;Layer height: 0.2\n" + FILLER,
+    'prusa': FILLER + (
+        "; estimated printing time = 1h 23m 45s\n"
+        "; filament used [mm] = 1234.56\n"
+        "; filament used [cm3] = 1.23\n"
+        "; filament used [g] = 12.34\n"
+    ),
+}
+
+
+def legacy_parse(content):
+    """Implementación anterior: un re.search por campo y por formato."""
+    def parse_time_str(time_str):
+        total = 0
+        for pattern, factor in ((r'(\d+)d', 86400), (r'(\d+)h', 3600), (r'(\d+)m', 60), (r'(\d+)s', 1)):
+            match = re.search(pattern, time_str)
+            if match:
+                total += int(match.group(1)) * factor
+        return total
+
+    data = {}
+    time_match = re.search(r';TIME:(\d+)', content)
+    if time_match:
+        data['print_time_seconds'] = int(time_match.group(1))
+        data['slicer_name'] = 'Cura'
+    len_match = re.search(r';Filament used: ([\d.]+)m', content)
+    if len_match:
+        data['filament_length_m'] = float(len_match.group(1))
+    weight_match = re.search(r';Filament weight: ([\d.]+)g', content)
+    if weight_match:
+        data['filament_weight_g'] = float(weight_match.group(1))
+    if 'print_time_seconds' in data:
+        return data
+
+    data = {}
+    time_match = re.search(r'; estimated printing time = (.*)', content)
+    if time_match:
+        data['print_time_seconds'] = parse_time_str(time_match.group(1).strip())
+        data['slicer_name'] = 'PrusaSlicer/Derivados'
+    weight_match = re.search(r'; filament used \[g\] = ([\d.]+)', content)
+    if weight_match:
+        data['filament_weight_g'] = float(weight_match.group(1))
+    len_match = re.search(r'; filament used \[mm\] = ([\d.]+)', content)
+    if len_match:
+        data['filament_length_m'] = float(len_match.group(1)) / 1000.0
+    if 'print_time_seconds' in data:
+        return data
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    slicer_parser = SlicerParser()
+    for name, sample in SAMPLES.items():
+        # La implementación anterior no conoce los campos añadidos después (tool_*, coste):
+        # se comparan solo los que tiene
+        legacy = legacy_parse(sample)
+        current = slicer_parser._parse_metadata(sample)
+        assert legacy == {key: current.get(key) for key in legacy}, name
+
+        before = timeit.timeit(lambda: legacy_parse(sample), number=args.iterations)
+        after = timeit.timeit(lambda: slicer_parser._parse_metadata(sample), number=args.iterations)
+
+        before_us = before / args.iterations * 1e6
+        after_us = after / args.iterations * 1e6
+        print(f"[{name}] antes: {before_us:.1f} µs/archivo | después: {after_us:.1f} µs/archivo "
+              f"| x{before_us / after_us:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark de los modos de lectura completa de SlicerParser.
+
+Genera un G-code sintético con los metadatos a mitad de archivo y mide el
+rendimiento de parse_file(full_scan=True) y parse_file(use_mmap=True).
+Termina con código 1 si algún modo no alcanza el rendimiento mínimo.
+
+Uso:
+    python benchmarks/bench_slicer_parser.py [--size-mb 256] [--min-mbps 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.slicer_parser import SlicerParser
+
+MOVES_BLOCK = (
+    ";TYPE:WALL-OUTER\n"
+    "G1 X100.123 Y100.456 E0.03412\n"
+    "G1 X101.789 Y100.456 E0.05233\n"
+    ";WIDTH:0.45\n"
+    "G1 X101.789 Y102.112 E0.05233\n"
+    "G0 F9000 X120.5 Y80.25\n"
+) * 1000
+
+METADATA = (
+    "; estimated printing time = 1h 23m 45s\n"
+    "; filament used [mm] = 1234.56\n"
+    "; filament used [g] = 12.34\n"
+)
+
+
+def generate_file(path, size_mb):
+    """Escribe un G-code de size_mb MB con los metadatos en la mitad."""
+    target = size_mb * 1024 * 1024
+    written = 0
+    block = MOVES_BLOCK.encode()
+    with open(path, 'wb') as f:
+        while written < target // 2:
+            f.write(block)
+            written += len(block)
+        f.write(METADATA.encode())
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--min-mbps', type=float, default=500.0)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.gcode')
+    os.close(fd)
+    try:
+        size = generate_file(path, args.size_mb)
+        slicer_parser = SlicerParser()
+        status = 0
+
+        for mode in ('full_scan', 'use_mmap'):
+            start = time.perf_counter()
+            data = slicer_parser.parse_file(path, **{mode: True})
+            elapsed = time.perf_counter() - start
+
+            mbps = size / (1024 * 1024) / elapsed
+            print(f"[{mode}] Archivo: {size / (1024 * 1024):.0f} MB | Tiempo: {elapsed:.3f} s | {mbps:.0f} MB/s")
+
+            if not data or data.get('print_time_seconds') != 5025:
+                print(f"ERROR [{mode}]: no se encontraron los metadatos")
+                status = 1
+            elif mbps < args.min_mbps:
+                print(f"ERROR [{mode}]: rendimiento por debajo de {args.min_mbps:.0f} MB/s")
+                status = 1
+        return status
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
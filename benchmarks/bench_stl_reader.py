@@ -0,0 +1,102 @@
+"""
+Benchmark del lector de STL nativo (src/logic/stl_reader.py) frente a trimesh.load.
+
+Genera un STL binario y uno ASCII sintéticos (triángulos aleatorios) y mide:
+  - read_stl: abrir el archivo (binario: solo mapearlo)
+  - read_stl + caja envolvente: recorrer todos los vértices
+  - mesh_metadata: volumen, área, caja envolvente y cierre de la malla
+  - trimesh.load (si trimesh está instalado)
+
+Uso:
+    python benchmarks/bench_stl_reader.py [--triangles 2000000] [--ascii-triangles 200000] [--repeat 3]
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.stl_reader import read_stl, mesh_metadata, TRIANGLE_DTYPE
+
+
+def random_triangles(count):
+    rng = np.random.default_rng(0)
+    return (rng.random((count, 3, 3)) * 200).astype(np.float32)
+
+
+def write_binary(path, triangles):
+    records = np.zeros(len(triangles), dtype=TRIANGLE_DTYPE)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(b'benchmark'.ljust(80, b' '))
+        f.write(struct.pack('<I', len(triangles)))
+        records.tofile(f)
+
+
+def write_ascii(path, triangles):
+    with open(path, 'w') as f:
+        f.write("solid benchmark\n")
+        for triangle in triangles:
+            f.write("facet normal 0 0 0\nouter loop\n")
+            f.write("".join(f"vertex {x:.6e} {y:.6e} {z:.6e}\n" for x, y, z in triangle))
+            f.write("endloop\nendfacet\n")
+        f.write("endsolid benchmark\n")
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_cases(label, path, count, repeat):
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"\n{label}: {count} triángulos, {size_mb:.1f} MB")
+    cases = {
+        'read_stl': lambda: read_stl(path),
+        'read_stl + caja envolvente': lambda: read_stl(path).reshape(-1, 3).min(axis=0),
+        'mesh_metadata': lambda: mesh_metadata(read_stl(path)),
+    }
+    try:
+        import trimesh
+        cases['trimesh.load'] = lambda: trimesh.load(path, force='mesh')
+    except ImportError:
+        print("  (trimesh no está instalado: se omite la comparación)")
+
+    for name, func in cases.items():
+        elapsed = best_time(func, repeat)
+        print(f"  {name:28} {elapsed * 1000:9.1f} ms  {size_mb / elapsed:8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--triangles', type=int, default=2000000)
+    parser.add_argument('--ascii-triangles', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    binary_path = os.path.join(tmp_dir, 'bench_binary.stl')
+    ascii_path = os.path.join(tmp_dir, 'bench_ascii.stl')
+    try:
+        write_binary(binary_path, random_triangles(args.triangles))
+        run_cases("STL binario", binary_path, args.triangles, args.repeat)
+        write_ascii(ascii_path, random_triangles(args.ascii_triangles))
+        run_cases("STL ASCII", ascii_path, args.ascii_triangles, args.repeat)
+    finally:
+        for path in (binary_path, ascii_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
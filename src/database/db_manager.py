@@ -1,6 +1,158 @@
 import sqlite3
 import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import lru_cache
 from sqlite3 import Error
+from src.database import migrations
+from src.database.query_stats import profiler
+from src.database.table_cache import TableCache
+
+
+class ConnectionPool:
+    """
+    Conexiones SQLite compartidas para un archivo de base de datos: una por hilo.
+    Todos los DBManager del mismo archivo usan el mismo pool, de modo que los gestores
+    y widgets de un hilo comparten conexión y cada hilo en segundo plano tiene la suya.
+    Con WAL los lectores no esperan al escritor (ni al revés).
+    """
+    
+    _pools = {}
+    _pools_lock = threading.Lock()
+    
+    # Ajustes aplicados a cada conexión nueva
+    CACHE_SIZE_KB = 16 * 1024        # Caché de páginas por conexión
+    MMAP_SIZE = 256 * 1024 * 1024    # Lectura mapeada en memoria
+    BUSY_TIMEOUT_MS = 5000           # Espera si otro proceso tiene el bloqueo de escritura
+    # Sentencias preparadas que guarda cada conexión; cubre de sobra todas las consultas
+    # distintas de la aplicación (gestores, caché de G-code, migraciones)
+    STATEMENT_CACHE_SIZE = 256
+    
+    @classmethod
+    def for_file(cls, db_file):
+        """Devuelve el pool del archivo, creándolo la primera vez."""
+        key = os.path.abspath(db_file)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None or pool.pid != os.getpid():
+                # Tras un fork las conexiones heredadas no se pueden usar
+                pool = cls._pools[key] = cls(db_file)
+            return pool
+    
+    @classmethod
+    def close_all_pools(cls):
+        """Cierra todas las conexiones de todos los pools (al salir de la aplicación)."""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.close_all()
+    
+    @classmethod
+    def release_thread(cls):
+        """Cierra las conexiones que el hilo actual tiene abiertas en cualquier pool."""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            pool.release()
+    
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # Caché de consultas del archivo (ver DBManager.fetch_cached)
+        self.cache = TableCache()
+    
+    @property
+    def transaction_depth(self):
+        """Transacciones anidadas abiertas en el hilo actual (ver DBManager.transaction)."""
+        return getattr(self._local, 'transaction_depth', 0)
+    
+    @transaction_depth.setter
+    def transaction_depth(self, value):
+        self._local.transaction_depth = value
+    
+    @property
+    def pending_invalidations(self):
+        """Tablas modificadas en la transacción abierta del hilo actual."""
+        pending = getattr(self._local, 'pending_invalidations', None)
+        if pending is None:
+            pending = self._local.pending_invalidations = set()
+        return pending
+    
+    @property
+    def pending_callbacks(self):
+        """Funciones a ejecutar cuando se confirme la transacción abierta del hilo actual."""
+        pending = getattr(self._local, 'pending_callbacks', None)
+        if pending is None:
+            pending = self._local.pending_callbacks = []
+        return pending
+    
+    def get(self):
+        """Conexión del hilo actual, o None si aún no se ha abierto."""
+        return getattr(self._local, 'connection', None)
+    
+    def acquire(self):
+        """Devuelve la conexión del hilo actual, abriéndola y configurándola si hace falta."""
+        connection = self.get()
+        if connection is None:
+            # check_same_thread=False solo para poder cerrarlas todas desde close_all;
+            # cada conexión se usa únicamente desde el hilo que la abrió
+            connection = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT_MS / 1000,
+                                         check_same_thread=False,
+                                         cached_statements=self.STATEMENT_CACHE_SIZE)
+            self._configure(connection)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+    
+    def release(self):
+        """Cierra la conexión del hilo actual."""
+        connection = self.get()
+        if connection is not None:
+            self._local.connection = None
+            self._local.transaction_depth = 0
+            self._local.pending_invalidations = None
+            self._local.pending_callbacks = None
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            connection.close()
+    
+    def close_all(self):
+        """Cierra las conexiones de todos los hilos."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Error:
+                pass
+        self._local = threading.local()
+    
+    def _configure(self, connection):
+        """Aplica los PRAGMA de rendimiento y las claves foráneas."""
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        connection.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        connection.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        # Habilitar claves foráneas
+        connection.execute("PRAGMA foreign_keys = 1")
+
+
+@lru_cache(maxsize=256)
+def _row_class(columns):
+    """Clase namedtuple para un conjunto de columnas (se crea una vez por consulta distinta)."""
+    return namedtuple('Fila', columns, rename=True)
+
 
 class DBManager:
     def __init__(self, db_file='gestor3d.db'):
@@ -11,25 +163,95 @@ class DBManager:
             self.db_file = os.path.join(base_dir, db_file)
         else:
             self.db_file = db_file
-            
-        self.connection = None
+        
+        # Pool compartido con el resto de DBManager del mismo archivo (una conexión por hilo)
+        self.pool = ConnectionPool.for_file(self.db_file)
+
+    @property
+    def cache(self):
+        """Caché de consultas compartida por los DBManager del mismo archivo."""
+        return self.pool.cache
+
+    @property
+    def connection(self):
+        """Conexión del hilo actual (None si todavía no se ha conectado)."""
+        return self.pool.get()
 
     def connect(self):
         """Establece la conexión con la base de datos SQLite."""
         try:
-            self.connection = sqlite3.connect(self.db_file)
-            # Habilitar claves foráneas
-            self.connection.execute("PRAGMA foreign_keys = 1")
+            self.pool.acquire()
             return True
         except Error as e:
             print(f"Error al conectar a SQLite: {e}")
             return False
 
     def disconnect(self):
-        """Cierra la conexión."""
-        if self.connection:
-            self.connection.close()
-            # print("Conexión cerrada")
+        """Cierra la conexión del hilo actual (se reabre sola en la siguiente consulta)."""
+        self.pool.release()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias escrituras en una sola transacción (un único commit al salir).
+        Si se produce una excepción se deshace todo y se propaga. Dentro del bloque,
+        execute_query y execute_many no hacen commit. Se puede anidar: los niveles
+        interiores usan SAVEPOINT y solo deshacen su parte.
+        
+            with db.transaction():
+                db.execute_query(...)
+                db.execute_many(...)
+        """
+        if not self.connection:
+            if not self.connect():
+                raise Exception("No se pudo conectar a la base de datos")
+        
+        connection = self.connection
+        depth = self.pool.transaction_depth
+        savepoint = f"nivel_{depth}"
+        # after_commit registrados en este nivel: se descartan si se deshace
+        callbacks_mark = len(self.pool.pending_callbacks)
+        committed = False
+        # IMMEDIATE: toma el bloqueo de escritura al empezar para no fallar a mitad
+        connection.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        self.pool.transaction_depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if depth == 0:
+                connection.rollback()
+            else:
+                connection.execute(f"ROLLBACK TO {savepoint}")
+                connection.execute(f"RELEASE {savepoint}")
+            del self.pool.pending_callbacks[callbacks_mark:]
+            raise
+        else:
+            if depth == 0:
+                start = time.perf_counter() if profiler.enabled else None
+                try:
+                    connection.commit()
+                    committed = True
+                    if start is not None:
+                        profiler.record("COMMIT", time.perf_counter() - start)
+                except Error:
+                    connection.rollback()
+                    raise
+            else:
+                connection.execute(f"RELEASE {savepoint}")
+        finally:
+            self.pool.transaction_depth = depth
+            if depth == 0:
+                # Las tablas modificadas se invalidan al terminar (confirmada o no) para que
+                # otro hilo no guarde en caché datos anteriores al commit
+                pending = self.pool.pending_invalidations
+                if pending:
+                    self.cache.invalidate(*pending)
+                    pending.clear()
+                callbacks = self.pool.pending_callbacks[:]
+                self.pool.pending_callbacks.clear()
+                if committed:
+                    for callback in callbacks:
+                        callback()
 
     def execute_query(self, query, params=()):
         """Ejecuta una consulta (INSERT, UPDATE, DELETE)."""
@@ -37,27 +259,59 @@ class DBManager:
             if not self.connect():
                 raise Exception("No se pudo conectar a la base de datos")
         
+        start = time.perf_counter() if profiler.enabled else None
         cursor = self.connection.cursor()
         try:
             cursor.execute(query, params)
-            self.connection.commit()
+            # Dentro de transaction() el commit se hace al cerrar el bloque
+            if not self.pool.transaction_depth:
+                self.connection.commit()
+            if start is not None:
+                profiler.record(query, time.perf_counter() - start, cursor.rowcount)
             return cursor
         except Error as e:
+            # sqlite3 abre una transacción implícita antes de la escritura: si falla fuera de
+            # transaction() hay que deshacerla, o la conexión del hilo (compartida por todos
+            # los gestores) se queda con el bloqueo de escritura
+            if not self.pool.transaction_depth and self.connection.in_transaction:
+                self.connection.rollback()
             # Propagar la excepción para que el caller la maneje (ej: IntegrityError)
             raise e
 
+    def execute_many(self, query, params_seq):
+        """
+        Ejecuta la misma consulta para cada juego de parámetros (inserciones/actualizaciones
+        masivas) con un único commit. Si alguna falla no se aplica ninguna.
+        
+        Returns:
+            int: Número de filas afectadas.
+        """
+        with self.transaction():
+            start = time.perf_counter() if profiler.enabled else None
+            cursor = self.connection.cursor()
+            try:
+                cursor.executemany(query, params_seq)
+                if start is not None:
+                    profiler.record(query, time.perf_counter() - start, cursor.rowcount)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
     def fetch_query(self, query, params=()):
         """Ejecuta una consulta de selección (SELECT)."""
         if not self.connection:
             if not self.connect():
                 return None
 
-        # Configurar row_factory para obtener diccionarios
-        self.connection.row_factory = sqlite3.Row
+        start = time.perf_counter() if profiler.enabled else None
         cursor = self.connection.cursor()
         try:
             cursor.execute(query, params)
-            result = [dict(row) for row in cursor.fetchall()]
+            # Diccionarios directamente desde las tuplas, sin pasar por sqlite3.Row
+            columns = [description[0] for description in cursor.description]
+            result = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if start is not None:
+                profiler.record(query, time.perf_counter() - start, len(result))
             return result
         except Error as e:
             print(f"Error al obtener datos: {e}")
@@ -65,16 +319,153 @@ class DBManager:
         finally:
             cursor.close()
     
+    def fetch_rows(self, query, params=(), named=False):
+        """
+        Ejecuta una consulta de selección y devuelve las filas tal cual las entrega sqlite3
+        (tuplas), sin conversión. Es la vía rápida para listados grandes.
+        
+        Args:
+            named (bool): Devolver namedtuples (acceso por fila.columna o por índice).
+        """
+        if not self.connection:
+            if not self.connect():
+                return None
+
+        start = time.perf_counter() if profiler.enabled else None
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            if named:
+                row_class = _row_class(tuple(description[0] for description in cursor.description))
+                rows = list(map(row_class._make, rows))
+            if start is not None:
+                profiler.record(query, time.perf_counter() - start, len(rows))
+            return rows
+        except Error as e:
+            print(f"Error al obtener datos: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    def iter_query(self, query, params=(), batch_size=500, named=False):
+        """
+        Generador que ejecuta una consulta de selección y devuelve las filas por lotes
+        (listas de como mucho batch_size tuplas), sin cargar el resultado completo en memoria.
+        El cursor se cierra al agotar el generador o al cerrarlo (close() o recolección).
+        
+        Args:
+            batch_size (int): Filas por lote (fetchmany).
+            named (bool): Devolver namedtuples en lugar de tuplas.
+        """
+        if not self.connection:
+            if not self.connect():
+                return
+
+        # Con el registro activo solo cuenta el tiempo dentro del generador, no el del
+        # código que consume los lotes
+        profiling = profiler.enabled
+        elapsed, total_rows = 0.0, 0
+        start = time.perf_counter() if profiling else None
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            row_class = None
+            if named:
+                row_class = _row_class(tuple(description[0] for description in cursor.description))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                batch = list(map(row_class._make, rows)) if row_class else rows
+                if profiling:
+                    total_rows += len(rows)
+                    elapsed += time.perf_counter() - start
+                    start = None
+                yield batch
+                if profiling:
+                    start = time.perf_counter()
+        except Error as e:
+            print(f"Error al obtener datos: {e}")
+            profiling = False
+        finally:
+            cursor.close()
+            if profiling:
+                if start is not None:
+                    elapsed += time.perf_counter() - start
+                profiler.record(query, elapsed, total_rows)
+
+    def fetch_columns(self, query, params=()):
+        """
+        Ejecuta una consulta de selección y devuelve el resultado por columnas:
+        {nombre_columna: tupla de valores}. Útil para gráficas y agregados.
+        """
+        if not self.connection:
+            if not self.connect():
+                return None
+
+        start = time.perf_counter() if profiler.enabled else None
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+            values = list(zip(*rows)) if rows else [()] * len(columns)
+            if start is not None:
+                profiler.record(query, time.perf_counter() - start, len(rows))
+            return dict(zip(columns, values))
+        except Error as e:
+            print(f"Error al obtener datos: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    def fetch_cached(self, query, params=(), tables=()):
+        """
+        Como fetch_query, pero sirviendo el resultado desde la caché en memoria mientras
+        no cambie ninguna de las tablas indicadas. Quien escriba en esas tablas debe
+        llamar a invalidate(). El resultado es compartido: no hay que modificarlo.
+        """
+        if self.pool.transaction_depth and self.pool.pending_invalidations.intersection(tables):
+            # Escrituras propias aún sin confirmar: la caché no las refleja
+            return self.fetch_query(query, params)
+        return self.cache.get_or_load((query, tuple(params)), tuple(tables),
+                                      lambda: self.fetch_query(query, params))
+
+    def invalidate(self, *tables):
+        """
+        Indica que se ha escrito en las tablas, para que fetch_cached vuelva a leerlas.
+        Dentro de transaction() se aplica al terminar la transacción.
+        """
+        if self.pool.transaction_depth:
+            self.pool.pending_invalidations.update(tables)
+        else:
+            self.cache.invalidate(*tables)
+
+    def after_commit(self, callback):
+        """
+        Ejecuta callback() cuando se confirme la transacción abierta en este hilo (al momento
+        si no hay ninguna). Si la transacción se deshace, no se ejecuta. Para efectos fuera de
+        la base de datos, como borrar archivos, que no se pueden deshacer.
+        """
+        if self.pool.transaction_depth:
+            self.pool.pending_callbacks.append(callback)
+        else:
+            callback()
+
     def fetch_one(self, query, params=()):
         """Ejecuta una consulta de selección y retorna solo una fila."""
         if not self.connection:
             if not self.connect():
                 return None
 
+        start = time.perf_counter() if profiler.enabled else None
         cursor = self.connection.cursor()
         try:
             cursor.execute(query, params)
             result = cursor.fetchone()
+            if start is not None:
+                profiler.record(query, time.perf_counter() - start, 0 if result is None else 1)
             return result
         except Error as e:
             print(f"Error al obtener datos: {e}")
@@ -82,25 +473,90 @@ class DBManager:
         finally:
             cursor.close()
 
-    def init_db(self, schema_file):
-        """Inicializa la base de datos ejecutando un script SQL."""
+    def init_db(self):
+        """Crea o actualiza el esquema de la base de datos aplicando las migraciones pendientes."""
         try:
-            if not self.connect():
-                return False
-                
-            with open(schema_file, 'r') as f:
-                sql_script = f.read()
-            
-            cursor = self.connection.cursor()
-            cursor.executescript(sql_script)
-            self.connection.commit()
-            cursor.close()
-            print("Base de datos SQLite inicializada correctamente.")
+            version = migrations.migrate(self)
+            print(f"Base de datos SQLite inicializada correctamente (esquema v{version}).")
             return True
         except Error as e:
             print(f"Error al inicializar la base de datos: {e}")
             return False
-        except FileNotFoundError:
-            print(f"Archivo no encontrado: {schema_file}")
-            return False
 
+    # Páginas copiadas por paso de backup(): entre pasos se libera el bloqueo de lectura,
+    # así que la aplicación puede seguir escribiendo mientras se hace la copia
+    BACKUP_PAGES_PER_STEP = 1024
+
+    def backup(self, dest_path, pages=None, progress=None, cancel_event=None):
+        """
+        Copia de seguridad en caliente con la API de backup de SQLite, por lotes de páginas.
+        Se puede llamar desde cualquier hilo (usa una conexión propia) mientras la aplicación
+        sigue trabajando. Si otra conexión escribe durante la copia, SQLite la reinicia desde
+        el principio para que el resultado sea siempre coherente. La copia se escribe en un
+        archivo temporal y solo sustituye a dest_path cuando está completa.
+        
+        Args:
+            dest_path (str): Archivo de destino.
+            pages (int): Páginas por paso (por defecto BACKUP_PAGES_PER_STEP).
+            progress (callable): progress(copiadas, total) tras cada paso.
+            cancel_event (threading.Event): Si se activa, la copia se abandona.
+        
+        Returns:
+            tuple: (bool, str) Éxito y mensaje.
+        """
+        tmp_path = dest_path + '.tmp'
+        
+        def on_step(status, remaining, total):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError()
+            if progress is not None:
+                progress(total - remaining, total)
+        
+        source = target = None
+        try:
+            dest_dir = os.path.dirname(os.path.abspath(dest_path))
+            os.makedirs(dest_dir, exist_ok=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            source = sqlite3.connect(self.db_file, timeout=ConnectionPool.BUSY_TIMEOUT_MS / 1000)
+            target = sqlite3.connect(tmp_path)
+            source.backup(target, pages=pages or self.BACKUP_PAGES_PER_STEP, progress=on_step)
+            # La copia queda como un único archivo, sin -wal
+            target.execute("PRAGMA journal_mode = DELETE")
+            target.close()
+            target = None
+            os.replace(tmp_path, dest_path)
+            return True, f"Copia de seguridad guardada en {dest_path}"
+        except InterruptedError:
+            return False, "Copia de seguridad cancelada."
+        except (Error, OSError) as e:
+            return False, f"Error al hacer la copia de seguridad: {e}"
+        finally:
+            if target is not None:
+                target.close()
+            if source is not None:
+                source.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def backup_async(self, dest_path, pages=None, progress=None, cancel_event=None):
+        """
+        Lanza backup() en un hilo propio (no en DBWorker, para no retrasar las consultas de
+        la interfaz durante una copia larga).
+        
+        Returns:
+            Future: Con el (bool, str) de backup(). progress se llama desde ese hilo.
+        """
+        future = Future()
+        
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.backup(dest_path, pages, progress, cancel_event))
+            except BaseException as e:
+                # Error en el callback de progreso
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name="db-backup", daemon=True).start()
+        return future
@@ -0,0 +1,100 @@
+"""
+Hilo dedicado a la base de datos.
+
+La interfaz no debe ejecutar consultas en el hilo principal: si la base de datos está
+ocupada (un import grande, otro proceso escribiendo) la ventana se congela. DBWorker
+recibe las tareas en una cola y las ejecuta en orden en un único hilo, que tiene su propia
+conexión del pool (ver ConnectionPool). Cada tarea devuelve un concurrent.futures.Future;
+para recibir el resultado en el hilo de Qt se usa src/ui/async_db.py.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from src.database.db_manager import ConnectionPool
+
+
+class DBWorker:
+    """Cola de tareas de base de datos atendida por un hilo propio."""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """Hilo compartido por toda la aplicación, creado la primera vez que se pide."""
+        with cls._default_lock:
+            if cls._default is None or not cls._default.is_alive():
+                cls._default = cls()
+            return cls._default
+
+    @classmethod
+    def shutdown_default(cls, wait=True):
+        """Detiene el hilo compartido (al salir de la aplicación)."""
+        with cls._default_lock:
+            worker, cls._default = cls._default, None
+        if worker is not None:
+            worker.shutdown(wait=wait, cancel_pending=True)
+
+    def __init__(self, name="db-worker"):
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive() and not self._closed
+
+    def in_worker_thread(self):
+        """True si se llama desde el propio hilo de base de datos."""
+        return threading.current_thread() is self._thread
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Encola func(*args, **kwargs) para ejecutarla en el hilo de base de datos.
+
+        Returns:
+            Future: Resultado de la llamada, o la excepción que haya lanzado.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El hilo de base de datos está detenido")
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """
+        Detiene el hilo cuando termine las tareas encoladas (o cancelándolas, si
+        cancel_pending es True). Las conexiones del hilo se cierran al salir.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                if cancel_pending:
+                    while True:
+                        try:
+                            job = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        job[0].cancel()
+                self._queue.put(None)
+        if wait and not self.in_worker_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            future, func, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        ConnectionPool.release_thread()
@@ -0,0 +1,186 @@
+"""
+Migraciones del esquema de la base de datos.
+
+La versión aplicada se guarda en PRAGMA user_version. Al arrancar, migrate() aplica en orden
+las migraciones con versión mayor, todas dentro de una única transacción: si alguna falla no
+queda ninguna a medias. Las migraciones modifican el esquema en el sitio (ALTER TABLE, índices,
+retoques de sqlite_master), sin copiar tablas, para que actualizar una base de datos grande
+sea inmediato.
+
+Para añadir una migración se agrega al final de MIGRATIONS con la siguiente versión; nunca se
+modifican ni reordenan las ya publicadas.
+"""
+import os
+import sqlite3
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+
+def _schema_statements():
+    """Sentencias de schema.sql (todas CREATE ... IF NOT EXISTS)."""
+    with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+        script = f.read()
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def _create_base_schema(db):
+    """Tablas de schema.sql. En bases de datos existentes no cambia nada."""
+    for statement in _schema_statements():
+        db.execute_query(statement)
+
+
+def _repair_users_old_references(db):
+    """
+    Corrige los restos de una antigua migración que renombró users a users_old: claves foráneas
+    de otras tablas que apuntan a users_old y triggers que la usan (antes fix_filaments.py,
+    deep_clean.py y clean_triggers.py, que copiaban las tablas enteras).
+    Las claves foráneas se corrigen reescribiendo la definición en sqlite_master, que no afecta
+    a los datos guardados, así que no hace falta recrear ni copiar la tabla.
+    """
+    if db.fetch_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_old'"):
+        # La tabla antigua sigue existiendo: las referencias son válidas
+        return
+
+    triggers = db.fetch_rows(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%users_old%'"
+    )
+    for (name,) in triggers:
+        db.execute_query(f'DROP TRIGGER IF EXISTS "{name}"')
+
+    broken = db.fetch_one(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND sql LIKE '%users_old%'"
+    )[0]
+    if broken:
+        schema_version = db.fetch_one("PRAGMA schema_version")[0]
+        db.execute_query("PRAGMA writable_schema = ON")
+        try:
+            db.execute_query("""
+                UPDATE sqlite_master
+                SET sql = replace(replace(sql, '"users_old"', '"users"'), 'users_old', 'users')
+                WHERE type = 'table' AND sql LIKE '%users_old%'
+            """)
+            # Obliga a SQLite a releer el esquema modificado
+            db.execute_query(f"PRAGMA schema_version = {schema_version + 1}")
+        finally:
+            db.execute_query("PRAGMA writable_schema = OFF")
+
+        result = db.fetch_one("PRAGMA integrity_check")[0]
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f"Comprobación de integridad fallida: {result}")
+
+
+def _create_gcode_cache(db):
+    """
+    Tabla gcode_cache (resultados de SlicerParser). Las cachés creadas antes del desglose por
+    capas ya existen sin la columna layer_data: se añade en el sitio.
+    """
+    db.execute_query("""
+        CREATE TABLE IF NOT EXISTS gcode_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT NOT NULL,
+            parse_mode TEXT NOT NULL, -- head_tail, full_scan, mmap, layers (+motion)
+            file_size INTEGER NOT NULL, -- bytes
+            file_mtime INTEGER NOT NULL, -- ns
+            content_hash TEXT, -- SHA-256 opcional del contenido
+            result TEXT NOT NULL, -- JSON con los metadatos
+            layer_data BLOB, -- desglose por capas y tipos (.npz), solo en modo layers
+            last_access REAL NOT NULL, -- para el desalojo LRU
+            UNIQUE (file_path, parse_mode)
+        )
+    """)
+    columns = [row[1] for row in db.fetch_rows("PRAGMA table_info(gcode_cache)")]
+    if 'layer_data' not in columns:
+        db.execute_query("ALTER TABLE gcode_cache ADD COLUMN layer_data BLOB")
+
+
+# Migraciones en orden: (versión, descripción, sentencias SQL o función que recibe el DBManager)
+MIGRATIONS = [
+    (1, "Esquema base", _create_base_schema),
+    (2, "Índices para las consultas frecuentes", [
+        # get_all_projects / iter_projects: WHERE user_id = ? ORDER BY created_at DESC.
+        # Solo cubre el filtro y el orden, no es un índice de cobertura: PROJECTS_QUERY lee 11
+        # columnas de projects y une models y filaments, y copiarlas en el índice duplicaría
+        # la tabla. Las filas se leen por rowid, una búsqueda por proyecto listado
+        "CREATE INDEX IF NOT EXISTS idx_projects_user_created ON projects (user_id, created_at)",
+        # get_all_models / iter_models: ORDER BY added_date DESC (tampoco de cobertura: se
+        # leen todas las columnas de models)
+        "CREATE INDEX IF NOT EXISTS idx_models_added_date ON models (added_date)",
+        # El login (WHERE username = ? ...) ya va por el índice UNIQUE de username
+    ]),
+    (3, "Referencias a la tabla users_old", _repair_users_old_references),
+    (4, "Caché de G-code con desglose por capas", _create_gcode_cache),
+    (5, "Índices de la caché de G-code", [
+        # Búsqueda por contenido (use_hash) y desalojo LRU
+        "CREATE INDEX IF NOT EXISTS idx_gcode_cache_hash ON gcode_cache (content_hash, parse_mode)",
+        "CREATE INDEX IF NOT EXISTS idx_gcode_cache_last_access ON gcode_cache (last_access)",
+    ]),
+    (6, "Metadatos geométricos de los modelos", [
+        """
+        CREATE TABLE IF NOT EXISTS model_metadata (
+            model_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            triangle_count INTEGER NOT NULL,
+            volume_mm3 REAL,
+            surface_area_mm2 REAL,
+            min_x REAL, min_y REAL, min_z REAL,
+            max_x REAL, max_y REAL, max_z REAL,
+            is_watertight INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE CASCADE
+        )
+        """,
+        # Búsqueda de modelos por contenido (archivos repetidos)
+        "CREATE INDEX IF NOT EXISTS idx_model_metadata_hash ON model_metadata (content_hash)",
+    ]),
+    (7, "Índice de rutas de los modelos", [
+        # Almacén por contenido: recuento de referencias de cada archivo (delete_model)
+        # y modelos ya importados (add_model)
+        "CREATE INDEX IF NOT EXISTS idx_models_file_path ON models (file_path)",
+    ]),
+    (8, "Gramos por herramienta de los proyectos multimaterial", [
+        # Lista JSON con los gramos de cada herramienta (MMU/AMS); NULL con un solo material
+        "ALTER TABLE projects ADD COLUMN tool_weights TEXT",
+    ]),
+]
+
+
+def schema_version(db):
+    """Versión del esquema de la base de datos (0 si nunca se ha migrado)."""
+    return db.fetch_one("PRAGMA user_version")[0]
+
+
+def migrate(db):
+    """
+    Aplica las migraciones pendientes sobre la base de datos del DBManager indicado,
+    en una sola transacción.
+
+    Returns:
+        int: Versión del esquema tras migrar.
+    """
+    version = schema_version(db)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        return version
+
+    try:
+        with db.transaction():
+            for target, description, steps in pending:
+                if callable(steps):
+                    steps(db)
+                else:
+                    for statement in steps:
+                        db.execute_query(statement)
+                db.execute_query(f"PRAGMA user_version = {target}")
+    except Exception as e:
+        print(f"Error al migrar la base de datos (versión {version}): {e}")
+        raise
+
+    print(f"Base de datos migrada de la versión {version} a la {pending[-1][0]}")
+    return pending[-1][0]
@@ -0,0 +1,167 @@
+"""
+Instrumentación de las consultas de DBManager.
+
+Desactivada por defecto (el coste es una comprobación de un booleano por consulta). Al
+activarla, cada sentencia ejecutada por DBManager registra su duración, las filas leídas o
+afectadas y el punto del código que la lanzó:
+  - en un búfer circular en memoria con las últimas consultas (recent),
+  - acumulada por sentencia, para el informe de las que más tiempo suman (summary),
+  - en un archivo de consultas lentas si supera el umbral (slow_ms).
+
+Se activa desde Configuración o con la variable de entorno GESTOR3D_QUERY_STATS=1 (ver main.py).
+"""
+import csv
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_LOG_FILE = os.path.join(BASE_DIR, 'slow_queries.log')
+
+QueryRecord = namedtuple('QueryRecord', 'timestamp sql duration_ms rows caller thread')
+
+# Marcos de pila que no cuentan como origen de la consulta
+_INTERNAL_FILES = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_manager.py'),
+    os.path.abspath(__file__),
+}
+
+
+def _caller():
+    """Primer marco de la pila fuera de DBManager y contextlib: 'ruta.py:línea (función)'."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in _INTERNAL_FILES and not filename.endswith('contextlib.py'):
+            path = os.path.relpath(filename, BASE_DIR) if filename.startswith(BASE_DIR) else filename
+            return f"{path}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryProfiler:
+    """Registro de tiempos de las consultas, compartido por todos los DBManager y todos los hilos."""
+
+    DEFAULT_CAPACITY = 1000   # Consultas que guarda el búfer circular
+    DEFAULT_SLOW_MS = 100     # Umbral del registro de consultas lentas
+    MAX_CALLERS = 5           # Orígenes distintos que se guardan por sentencia
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = self.DEFAULT_SLOW_MS
+        self.log_file = DEFAULT_LOG_FILE
+        self._records = deque(maxlen=self.DEFAULT_CAPACITY)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def enable(self, slow_ms=None, log_file=None, capacity=None):
+        """
+        Activa el registro.
+
+        Args:
+            slow_ms (float): Umbral en milisegundos del registro de consultas lentas.
+            log_file (str): Archivo del registro de consultas lentas (None: sin archivo).
+            capacity (int): Tamaño del búfer de últimas consultas.
+        """
+        with self._lock:
+            if slow_ms is not None:
+                self.slow_ms = slow_ms
+            if log_file is not None:
+                self.log_file = log_file or None
+            if capacity is not None and capacity != self._records.maxlen:
+                self._records = deque(self._records, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        """Desactiva el registro (conserva lo acumulado hasta reset)."""
+        self.enabled = False
+
+    def reset(self):
+        """Vacía el búfer y los acumulados."""
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+    def record(self, sql, seconds, rows=None):
+        """Registra una consulta ejecutada (lo llama DBManager)."""
+        sql = ' '.join(sql.split())
+        duration_ms = seconds * 1000
+        if rows is not None and rows < 0:
+            # rowcount de sentencias que no afectan filas
+            rows = None
+        record = QueryRecord(time.time(), sql, duration_ms, rows, _caller(),
+                             threading.current_thread().name)
+
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.get(sql)
+            if totals is None:
+                totals = self._totals[sql] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                              'rows': 0, 'callers': []}
+            totals['calls'] += 1
+            totals['total_ms'] += duration_ms
+            totals['max_ms'] = max(totals['max_ms'], duration_ms)
+            totals['rows'] += rows or 0
+            if record.caller not in totals['callers'] and len(totals['callers']) < self.MAX_CALLERS:
+                totals['callers'].append(record.caller)
+
+            if self.log_file and duration_ms >= self.slow_ms:
+                self._write_slow(record)
+
+    def _write_slow(self, record):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp))
+        rows = '-' if record.rows is None else record.rows
+        line = (f"{timestamp} | {record.duration_ms:.1f} ms | {rows} filas | "
+                f"{record.caller} | {record.thread} | {record.sql}\n")
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Error al escribir el registro de consultas lentas: {e}")
+
+    def recent(self):
+        """Últimas consultas registradas (QueryRecord), de la más antigua a la más reciente."""
+        with self._lock:
+            return list(self._records)
+
+    def summary(self, top=20):
+        """
+        Sentencias que más tiempo suman.
+
+        Returns:
+            list: Diccionarios con sql, calls, total_ms, avg_ms, max_ms, rows y callers,
+            ordenados por total_ms descendente.
+        """
+        with self._lock:
+            items = [dict(totals, sql=sql, callers=list(totals['callers']))
+                     for sql, totals in self._totals.items()]
+        items.sort(key=lambda item: item['total_ms'], reverse=True)
+        for item in items:
+            item['avg_ms'] = item['total_ms'] / item['calls']
+        return items[:top]
+
+    def export_report(self, file_path, top=20):
+        """
+        Guarda el informe de summary() en un CSV.
+
+        Returns:
+            tuple: (bool, str) Éxito y mensaje.
+        """
+        rows = self.summary(top)
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['sql', 'llamadas', 'total_ms', 'media_ms', 'max_ms', 'filas', 'origen'])
+                for item in rows:
+                    writer.writerow([item['sql'], item['calls'], f"{item['total_ms']:.3f}",
+                                     f"{item['avg_ms']:.3f}", f"{item['max_ms']:.3f}",
+                                     item['rows'], '; '.join(item['callers'])])
+            return True, f"Informe exportado con {len(rows)} consultas"
+        except OSError as e:
+            return False, f"Error al exportar el informe: {e}"
+
+
+# Instancia única usada por DBManager
+profiler = QueryProfiler()
@@ -0,0 +1,67 @@
+"""
+Caché en memoria de consultas sobre tablas que cambian poco (filamentos, modelos).
+
+Cada tabla tiene un número de versión que los gestores incrementan al escribir en ella
+(DBManager.invalidate). Una entrada guarda el resultado junto con las versiones de sus
+tablas al leerlo y solo se sirve si siguen siendo las mismas, así que una escritura deja
+obsoletas exactamente las consultas de las tablas que toca, sin plazos de caducidad.
+
+Solo ve las escrituras hechas con los gestores de este proceso; otro programa que modifique
+la base de datos a la vez no invalida la caché.
+"""
+import threading
+
+
+class TableCache:
+    """Resultados de consultas versionados por tabla, compartidos por todos los hilos."""
+
+    def __init__(self):
+        self._versions = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, table):
+        """Versión actual de una tabla (0 si nunca se ha modificado)."""
+        return self._versions.get(table, 0)
+
+    def get_or_load(self, key, tables, loader):
+        """
+        Devuelve el resultado guardado para key si ninguna de sus tablas ha cambiado desde
+        que se leyó; si no, llama a loader() y lo guarda (salvo que devuelva None, que es
+        el valor de error de DBManager).
+        """
+        with self._lock:
+            versions = tuple(self._versions.get(table, 0) for table in tables)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # La consulta se hace fuera del bloqueo. Se guarda con las versiones de antes de
+        # leer: si otra escritura llega mientras tanto, la siguiente lectura ya no coincide
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (versions, value)
+        return value
+
+    def invalidate(self, *tables):
+        """Marca las tablas como modificadas."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self):
+        """Descarta todas las entradas y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Contadores de la caché: aciertos, fallos y entradas guardadas."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
@@ -0,0 +1,414 @@
+import re
+import numpy as np
+
+class GcodeAnalyzer:
+    """
+    Intérprete vectorizado de G-code para estimar tiempo de impresión y filamento
+    cuando el archivo no trae metadatos del slicer.
+
+    Procesa el archivo por bloques de líneas completas (feed). Cada bloque se tokeniza con una
+    única expresión regular y los movimientos se resuelven con NumPy: posiciones absolutas/relativas
+    (G90/G91, M82/M83), reseteos (G92, G28), arcos (G2/G3 con I/J), velocidad (F) y aceleración (M204).
+    El tiempo se estima con un perfil trapezoidal por movimiento, con velocidades de unión
+    entre movimientos proporcionales al coseno del ángulo que forman.
+
+    Con track_layers=True además acumula tiempo y extrusión por capa (Z de los movimientos que
+    extruyen) y por tipo de elemento (comentarios ;TYPE: de los slicers), ver layer_stats.
+    """
+
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    # Comandos y parámetros de interés: cada token es una letra seguida de un número, o un salto de línea
+    _TOKEN_RE = re.compile(rb'\n|[GMXYZEFIJSPT][-+]?(?:\d+\.?\d*|\.\d+)')
+    _COMMENT_RE = re.compile(rb';[^\n]*')
+    _TYPE_RE = re.compile(rb';TYPE:([^\r\n]*)')
+
+    # Arrays estructurados de layer_stats
+    LAYER_DTYPE = np.dtype([('z', 'f4'), ('extrusion_mm', 'f4'), ('time_s', 'f4')])
+    FEATURE_DTYPE = np.dtype([('layer', 'u4'), ('feature', 'u1'), ('extrusion_mm', 'f4'), ('time_s', 'f4')])
+
+    # Códigos de comando (las M se desplazan 1000 para distinguirlas de las G)
+    _G0, _G1, _G2, _G3 = 0, 1, 2, 3
+    _G28, _G90, _G91, _G92 = 28, 90, 91, 92
+    _M82, _M83, _M204 = 1082, 1083, 1204
+    _COMMANDS = (0, 1, 2, 3, 28, 90, 91, 92, 1082, 1083, 1204)
+
+    # Columnas de la matriz de parámetros
+    _PARAMS = b'XYZEFIJSPT'
+    _X, _Y, _Z, _E, _F, _I, _J, _S, _P, _T = range(10)
+
+    def __init__(self, acceleration=1000.0, default_feedrate=1500.0, track_layers=False):
+        """
+        Args:
+            acceleration (float): Aceleración en mm/s² hasta que el archivo indique otra con M204.
+            default_feedrate (float): Velocidad inicial en mm/min hasta el primer F.
+            track_layers (bool): Acumular estadísticas por capa y por tipo de elemento.
+        """
+        # Estado de la máquina que se arrastra entre bloques
+        self.position = np.zeros(4)  # X, Y, Z, E
+        self.absolute_xyz = True
+        self.absolute_e = True
+        self.feedrate = default_feedrate
+        self.acceleration = acceleration
+        self._last_direction = np.zeros(3)
+        self._last_speed = 0.0
+
+        # Acumulados
+        self.total_time = 0.0
+        self.total_extrusion = 0.0
+        self.move_count = 0
+
+        # Estadísticas por capa y por tipo de elemento
+        self.track_layers = track_layers
+        self.feature_names = ['Sin tipo']
+        self._feature_ids = {}
+        self._current_feature = 0
+        self._current_z = np.nan
+        self._layer_z = []
+        self._layer_extrusion = []
+        self._layer_time = []
+        self._feature_totals = {}  # (capa, tipo) -> [extrusión, tiempo]
+        self._before_first_layer = [0.0, 0.0]
+
+    def analyze_file(self, file_path):
+        """Analiza el archivo completo y devuelve el diccionario de resultados (ver result)."""
+        with open(file_path, 'rb') as f:
+            return self.analyze_stream(f)
+
+    def analyze_stream(self, stream):
+        """Como analyze_file pero sobre un flujo binario ya abierto (p.ej. un .gcode.gz)."""
+        carry = b''
+        while True:
+            chunk = stream.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            block = carry + chunk
+            cut = block.rfind(b'\n') + 1
+            if cut:
+                self.feed(block[:cut])
+            carry = block[cut:]
+        if carry:
+            self.feed(carry + b'\n')
+        return self.result()
+
+    def result(self):
+        """
+        Returns:
+            dict: 'print_time_seconds', 'filament_length_m', 'move_count' y 'slicer_name', o None
+                  si el archivo no contiene movimientos.
+        """
+        if self.move_count == 0:
+            return None
+        return {
+            'print_time_seconds': int(round(float(self.total_time))),
+            'filament_length_m': max(float(self.total_extrusion), 0.0) / 1000.0,
+            'move_count': self.move_count,
+            'slicer_name': 'Análisis de movimientos'
+        }
+
+    def feed(self, chunk):
+        """Procesa un bloque de líneas completas (bytes terminados en salto de línea)."""
+        codes, params, command_line = self._tokenize(chunk)
+        if self.track_layers:
+            features = self._row_features(chunk, command_line if codes is not None else np.empty(0, int))
+        if codes is None:
+            return
+
+        is_move = codes <= self._G3
+        is_arc = (codes == self._G2) | (codes == self._G3)
+        is_g92 = codes == self._G92
+        is_g28 = codes == self._G28
+
+        # Modos absoluto/relativo: G90/G91 afectan a todos los ejes, M82/M83 solo al extrusor
+        xyz_mode = np.full(len(codes), np.nan)
+        xyz_mode[codes == self._G90] = 1.0
+        xyz_mode[codes == self._G91] = 0.0
+        e_mode = xyz_mode.copy()
+        e_mode[codes == self._M82] = 1.0
+        e_mode[codes == self._M83] = 0.0
+        abs_xyz = self._ffill(xyz_mode, float(self.absolute_xyz)) == 1.0
+        abs_e = self._ffill(e_mode, float(self.absolute_e)) == 1.0
+
+        # Posiciones y desplazamientos por eje
+        no_axes = np.isnan(params[:, :4]).all(axis=1)
+        deltas = np.empty((len(codes), 4))
+        z_position = None
+        for axis in range(4):
+            absolute = abs_e if axis == self._E else abs_xyz
+            deltas[:, axis], position = self._axis_deltas(
+                axis, params[:, axis], absolute, is_move, is_g92, is_g28, no_axes
+            )
+            if axis == self._Z:
+                z_position = position
+
+        # Velocidad (F modal, mm/min -> mm/s) y aceleración (M204 S o P)
+        feed = self._ffill(params[:, self._F], self.feedrate)
+        accel_set = np.where(codes == self._M204,
+                             np.where(np.isnan(params[:, self._S]), params[:, self._P], params[:, self._S]),
+                             np.nan)
+        accel = self._ffill(accel_set, self.acceleration)
+        self.feedrate = feed[-1]
+        self.acceleration = accel[-1]
+
+        # Solo interesan a partir de aquí los movimientos
+        moves = np.flatnonzero(is_move)
+        if len(moves) == 0:
+            return
+        d = deltas[moves]
+        speed = np.maximum(feed[moves] / 60.0, 0.1)
+        accel = np.maximum(accel[moves], 1.0)
+
+        distance = np.sqrt((d[:, :3] ** 2).sum(axis=1))
+        arcs = is_arc[moves]
+        if arcs.any():
+            distance[arcs] = self._arc_lengths(
+                d[arcs], params[moves][arcs], codes[moves][arcs] == self._G2
+            )
+        # Movimientos solo de extrusor (retracciones)
+        extrude_only = distance == 0
+        distance[extrude_only] = np.abs(d[extrude_only, 3])
+
+        times = self._move_times(d, distance, speed, accel)
+
+        self.total_time += times.sum()
+        self.total_extrusion += d[:, 3].sum()
+        self.move_count += int(np.count_nonzero(distance))
+
+        if self.track_layers:
+            self._accumulate_layers(z_position[moves], d, times, features[moves])
+
+    def layer_stats(self):
+        """
+        Devuelve el desglose por capa y por tipo de elemento (requiere track_layers=True).
+        
+        Returns:
+            dict: 'layers' (array LAYER_DTYPE, una fila por capa), 'features' (array FEATURE_DTYPE,
+                  una fila por capa y tipo) y 'feature_names' (nombre de cada código de tipo).
+        """
+        layers = np.zeros(len(self._layer_z), dtype=self.LAYER_DTYPE)
+        layers['z'] = self._layer_z
+        layers['extrusion_mm'] = self._layer_extrusion
+        layers['time_s'] = self._layer_time
+        # Lo anterior a la primera capa (arranque, purga) se suma a la primera
+        if len(layers):
+            layers['extrusion_mm'][0] += self._before_first_layer[0]
+            layers['time_s'][0] += self._before_first_layer[1]
+
+        features = np.zeros(len(self._feature_totals), dtype=self.FEATURE_DTYPE)
+        for i, ((layer, feature), (extrusion, time_s)) in enumerate(sorted(self._feature_totals.items())):
+            features[i] = (layer, feature, extrusion, time_s)
+
+        return {'layers': layers, 'features': features, 'feature_names': list(self.feature_names)}
+
+    @staticmethod
+    def feature_time_share(layer_stats):
+        """Fracción del tiempo de impresión de cada tipo de elemento, p.ej. {'FILL': 0.42, ...}."""
+        features = layer_stats['features']
+        totals = np.bincount(features['feature'], weights=features['time_s'],
+                             minlength=len(layer_stats['feature_names']))
+        total = totals.sum()
+        if total <= 0:
+            return {}
+        return {name: float(t / total) for name, t in zip(layer_stats['feature_names'], totals) if t > 0}
+
+    def _row_features(self, chunk, command_line):
+        """Tipo de elemento (;TYPE:) vigente en cada fila de comando del bloque."""
+        types = [(m.start(), self._feature_id(m.group(1).strip())) for m in self._TYPE_RE.finditer(chunk)]
+        if not types:
+            return np.full(len(command_line), self._current_feature)
+        
+        newlines = np.flatnonzero(np.frombuffer(chunk, np.uint8) == ord('\n'))
+        type_lines = np.searchsorted(newlines, [pos for pos, _ in types])
+        type_ids = np.array([feature for _, feature in types])
+        idx = np.searchsorted(type_lines, command_line, side='right') - 1
+        features = np.where(idx >= 0, type_ids[np.maximum(idx, 0)], self._current_feature)
+        self._current_feature = int(type_ids[-1])
+        return features
+
+    def _feature_id(self, name):
+        """Código numérico de un tipo de elemento (se asignan por orden de aparición)."""
+        name = name.decode('utf-8', errors='ignore')
+        if name not in self._feature_ids:
+            if len(self.feature_names) >= 255:
+                return 0
+            self._feature_ids[name] = len(self.feature_names)
+            self.feature_names.append(name)
+        return self._feature_ids[name]
+
+    def _accumulate_layers(self, z, d, times, features):
+        """
+        Reparte tiempo y extrusión de los movimientos entre capas y tipos.
+        La capa la marca la Z de los movimientos que extruyen; los demás (desplazamientos,
+        saltos en Z) se asignan a la última capa con extrusión.
+        """
+        extrusion = d[:, 3]
+        extruding = (extrusion > 0) & (d[:, :2] != 0).any(axis=1)
+        layer_z = self._ffill(np.where(extruding, np.round(z, 3), np.nan), self._current_z)
+        started = ~np.isnan(layer_z)
+        previous = np.concatenate(([self._current_z], layer_z[:-1]))
+        new_layer = started & (layer_z != previous)
+
+        # Movimientos anteriores a la primera capa
+        self._before_first_layer[0] += extrusion[~started].sum()
+        self._before_first_layer[1] += times[~started].sum()
+        if not started.any():
+            return
+
+        first_id = len(self._layer_z) - 1
+        self._layer_z.extend(layer_z[new_layer].tolist())
+        new_count = len(self._layer_z) - len(self._layer_time)
+        self._layer_extrusion.extend([0.0] * new_count)
+        self._layer_time.extend([0.0] * new_count)
+        self._current_z = layer_z[-1]
+
+        layer_id = (first_id + np.cumsum(new_layer))[started]
+        extrusion = extrusion[started]
+        times = times[started]
+        features = features[started]
+
+        base = max(first_id, 0)
+        offset = layer_id - base
+        for i, (ext, time_s) in enumerate(zip(np.bincount(offset, weights=extrusion),
+                                             np.bincount(offset, weights=times))):
+            self._layer_extrusion[base + i] += ext
+            self._layer_time[base + i] += time_s
+
+        keys, inverse = np.unique(layer_id * 256 + features, return_inverse=True)
+        key_extrusion = np.bincount(inverse, weights=extrusion)
+        key_times = np.bincount(inverse, weights=times)
+        for key, ext, time_s in zip(keys.tolist(), key_extrusion, key_times):
+            totals = self._feature_totals.setdefault((key // 256, key % 256), [0.0, 0.0])
+            totals[0] += ext
+            totals[1] += time_s
+
+    def _tokenize(self, chunk):
+        """
+        Convierte un bloque de G-code en un array de códigos de comando (uno por línea relevante)
+        y una matriz de parámetros (NaN si no aparece).
+        """
+        tokens = self._TOKEN_RE.findall(self._COMMENT_RE.sub(b'', chunk))
+        if not tokens:
+            return None, None, None
+
+        tokens = np.array(tokens)
+        width = tokens.dtype.itemsize
+        letters = tokens.view(np.uint8).reshape(-1, width)[:, 0]
+        is_newline = letters == ord('\n')
+        line = np.cumsum(is_newline)
+
+        # Valores numéricos: se sustituye la letra por un espacio y se convierte en bloque
+        values_src = tokens[~is_newline].copy()
+        values_src.view(np.uint8).reshape(-1, width)[:, 0] = ord(' ')
+        values = values_src.astype(np.float64)
+        letters = letters[~is_newline]
+        line = line[~is_newline]
+
+        # Un comando por línea: el primer G/M de cada línea
+        is_g = letters == ord('G')
+        is_m = letters == ord('M')
+        command_idx = np.flatnonzero(is_g | is_m)
+        if len(command_idx) == 0:
+            return None, None, None
+        command_line = line[command_idx]
+        first = np.concatenate(([True], command_line[1:] != command_line[:-1]))
+        command_idx = command_idx[first]
+        command_line = command_line[first]
+        codes = values[command_idx].astype(np.int64) + np.where(is_m[command_idx], 1000, 0)
+
+        relevant = np.isin(codes, self._COMMANDS)
+        codes = codes[relevant]
+        command_line = command_line[relevant]
+        if len(codes) == 0:
+            return None, None, None
+
+        # Parámetros: se asignan a la fila del comando de su misma línea
+        params = np.full((len(codes), len(self._PARAMS)), np.nan)
+        param_idx = np.flatnonzero(~(is_g | is_m))
+        row = np.searchsorted(command_line, line[param_idx])
+        row = np.minimum(row, len(codes) - 1)
+        valid = command_line[row] == line[param_idx]
+        column_of = np.full(256, -1)
+        column_of[np.frombuffer(self._PARAMS, np.uint8)] = np.arange(len(self._PARAMS))
+        column = column_of[letters[param_idx]]
+        valid &= column >= 0
+        params[row[valid], column[valid]] = values[param_idx[valid]]
+        return codes, params, command_line
+
+    def _axis_deltas(self, axis, values, absolute, is_move, is_g92, is_g28, no_axes):
+        """
+        Resuelve la posición de un eje fila a fila y devuelve el desplazamiento de cada movimiento.
+        La posición sigue la recurrencia p[i] = p[i-1] + b[i] salvo en las filas que la fijan
+        (movimiento absoluto, G92, G28), que se resuelve con una suma acumulada por segmentos.
+        """
+        given = ~np.isnan(values)
+        if axis == self._E:
+            homes = np.zeros(len(values), dtype=bool)
+        else:
+            homes = is_g28 & (given | no_axes)
+        resets = (is_move & given & absolute) | (is_g92 & (given | no_axes)) | homes
+
+        step = np.where(is_move & given & ~absolute, values, 0.0)
+        step = np.where(resets, np.where(given, values, 0.0), step)
+
+        cumulative = np.cumsum(step)
+        # Desplazamiento de cada segmento: lo acumulado justo antes de su fila de reseteo
+        segment = np.cumsum(resets)
+        reset_rows = np.flatnonzero(resets)
+        offsets = np.concatenate(([-self.position[axis]], cumulative[reset_rows] - step[reset_rows]))
+        position = cumulative - offsets[segment]
+
+        previous = np.concatenate(([self.position[axis]], position[:-1]))
+        self.position[axis] = position[-1]
+        return np.where(is_move, position - previous, 0.0), position
+
+    def _arc_lengths(self, deltas, params, clockwise):
+        """Longitud de los arcos G2/G3 definidos por el centro relativo I/J."""
+        i = np.nan_to_num(params[:, self._I])
+        j = np.nan_to_num(params[:, self._J])
+        radius = np.hypot(i, j)
+        start_angle = np.arctan2(-j, -i)
+        end_angle = np.arctan2(deltas[:, 1] - j, deltas[:, 0] - i)
+        sweep = np.where(clockwise, start_angle - end_angle, end_angle - start_angle) % (2 * np.pi)
+        # Mismo punto de inicio y fin: círculo completo
+        sweep = np.where(sweep == 0, 2 * np.pi, sweep)
+        planar = radius * sweep
+        # Sin I/J (formato R no soportado) se usa la cuerda
+        chord = np.sqrt((deltas[:, :3] ** 2).sum(axis=1))
+        return np.where(radius > 0, np.hypot(planar, deltas[:, 2]), chord)
+
+    def _move_times(self, deltas, distance, speed, accel):
+        """Tiempo de cada movimiento con perfil trapezoidal (aceleración, crucero, frenado)."""
+        moving = distance > 0
+        direction = np.zeros((len(distance), 3))
+        direction[moving] = deltas[moving, :3] / distance[moving, None]
+
+        # Velocidad de unión con el movimiento anterior: proporcional al coseno del ángulo
+        prev_direction = np.vstack((self._last_direction, direction[:-1]))
+        prev_speed = np.concatenate(([self._last_speed], speed[:-1]))
+        cosine = np.clip((direction * prev_direction).sum(axis=1), 0.0, 1.0)
+        entry = np.minimum(speed, prev_speed) * cosine
+        exit_ = np.concatenate((entry[1:], [0.0]))
+        exit_ = np.minimum(exit_, speed)
+        self._last_direction = direction[-1]
+        self._last_speed = speed[-1]
+
+        accel_dist = (speed ** 2 - entry ** 2) / (2 * accel)
+        decel_dist = (speed ** 2 - exit_ ** 2) / (2 * accel)
+        cruise = accel_dist + decel_dist <= distance
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_cruise = ((speed - entry) + (speed - exit_)) / accel + (distance - accel_dist - decel_dist) / speed
+            peak = np.sqrt(accel * distance + (entry ** 2 + exit_ ** 2) / 2)
+            t_peak = ((peak - entry) + (peak - exit_)) / accel
+            # Si no da tiempo a pasar de la velocidad de entrada a la de salida, aceleración constante
+            feasible = peak >= np.maximum(entry, exit_)
+            t_linear = 2 * distance / np.maximum(entry + exit_, 1e-9)
+            times = np.where(cruise, t_cruise, np.where(feasible, t_peak, t_linear))
+        return np.where(moving, times, 0.0)
+
+    def _ffill(self, values, initial):
+        """Propaga hacia delante el último valor no NaN, empezando por initial."""
+        values = np.concatenate(([initial], values))
+        idx = np.where(np.isnan(values), 0, np.arange(len(values)))
+        np.maximum.accumulate(idx, out=idx)
+        return values[idx][1:]
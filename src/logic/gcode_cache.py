@@ -0,0 +1,134 @@
+import hashlib
+import io
+import json
+import os
+import time
+import numpy as np
+from src.database.db_manager import DBManager
+from src.database.migrations import migrate
+
+class GcodeCache:
+    """
+    Caché persistente en SQLite de los resultados de SlicerParser.
+    Cada entrada se identifica por (ruta, modo de análisis) y se valida con el tamaño y la fecha
+    de modificación del archivo; si cambian, la entrada se descarta. Opcionalmente guarda un hash
+    del contenido para reutilizar resultados de archivos idénticos movidos o copiados.
+    Cuando se supera max_entries se eliminan las entradas usadas hace más tiempo (LRU).
+    El desglose por capas ('layer_stats', arrays NumPy) se guarda aparte como BLOB en formato .npz.
+    """
+    
+    def __init__(self, db_manager=None, max_entries=2000, use_hash=False):
+        self.db = db_manager or DBManager()
+        self.max_entries = max_entries
+        self.use_hash = use_hash
+        # La tabla gcode_cache la crean las migraciones (también en bases de datos auxiliares).
+        # Se comprueba al primer uso y no aquí: la interfaz crea la caché en el hilo principal
+        # y la consulta desde el de base de datos
+        self._migrated = False
+
+    def _ensure_table(self):
+        if not self._migrated:
+            migrate(self.db)
+            self._migrated = True
+
+    def get(self, file_path, parse_mode):
+        """Devuelve el resultado guardado para el archivo o None si no hay uno válido."""
+        self._ensure_table()
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        
+        row = self.db.fetch_one(
+            "SELECT id, file_size, file_mtime, result, layer_data FROM gcode_cache WHERE file_path = ? AND parse_mode = ?",
+            (file_path, parse_mode)
+        )
+        if row:
+            if row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+                self.db.execute_query("UPDATE gcode_cache SET last_access = ? WHERE id = ?", (time.time(), row[0]))
+                return self._load(row[3], row[4])
+            # El archivo ha cambiado: la entrada ya no sirve
+            self.db.execute_query("DELETE FROM gcode_cache WHERE id = ?", (row[0],))
+        
+        if self.use_hash:
+            content_hash = self._hash_file(file_path)
+            row = self.db.fetch_one(
+                "SELECT result, layer_data FROM gcode_cache WHERE content_hash = ? AND parse_mode = ? LIMIT 1",
+                (content_hash, parse_mode)
+            )
+            if row:
+                data = self._load(row[0], row[1])
+                self.put(file_path, parse_mode, data, content_hash)
+                return data
+        return None
+
+    def put(self, file_path, parse_mode, data, content_hash=None):
+        """
+        Guarda el resultado de analizar el archivo y aplica el límite de entradas.
+        content_hash: hash del archivo si ya se ha calculado (para no leerlo otra vez).
+        """
+        self._ensure_table()
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        if self.use_hash and content_hash is None:
+            content_hash = self._hash_file(file_path)
+        
+        data = dict(data)
+        layer_data = self._dump_layers(data.pop('layer_stats')) if 'layer_stats' in data else None
+        self.db.execute_query(
+            """
+            INSERT OR REPLACE INTO gcode_cache
+                (file_path, parse_mode, file_size, file_mtime, content_hash, result, layer_data, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (file_path, parse_mode, stat.st_size, stat.st_mtime_ns, content_hash, json.dumps(data),
+             layer_data, time.time())
+        )
+        self._evict()
+
+    def clear(self):
+        """Vacía la caché."""
+        self._ensure_table()
+        self.db.execute_query("DELETE FROM gcode_cache")
+
+    def _evict(self):
+        """Elimina las entradas menos usadas recientemente si se supera max_entries."""
+        count = self.db.fetch_one("SELECT COUNT(*) FROM gcode_cache")[0]
+        if count > self.max_entries:
+            self.db.execute_query(
+                """
+                DELETE FROM gcode_cache WHERE id IN (
+                    SELECT id FROM gcode_cache ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,)
+            )
+
+    def _load(self, result, layer_data):
+        """Reconstruye el diccionario guardado, con el desglose por capas si lo hay."""
+        data = json.loads(result)
+        if layer_data is not None:
+            with np.load(io.BytesIO(layer_data)) as arrays:
+                data['layer_stats'] = {
+                    'layers': arrays['layers'],
+                    'features': arrays['features'],
+                    'feature_names': arrays['feature_names'].tolist()
+                }
+        return data
+
+    def _dump_layers(self, layer_stats):
+        """Serializa el desglose por capas en un .npz comprimido."""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            layers=layer_stats['layers'],
+            features=layer_stats['features'],
+            feature_names=np.array(layer_stats['feature_names'], dtype=str)
+        )
+        return buffer.getvalue()
+
+    def _hash_file(self, file_path, block_size=1024 * 1024):
+        """Calcula el SHA-256 del contenido del archivo."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
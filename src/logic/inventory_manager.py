@@ -14,19 +14,48 @@ class InventoryManager:
         params = (brand, material_type, color, weight_initial, weight_initial, price, diameter, density)
         
         if self.db.execute_query(query, params):
+            self.db.invalidate('filaments')
             return True, "Filamento añadido correctamente."
         else:
             return False, "Error al añadir filamento."
 
+    def add_filaments(self, filaments):
+        """
+        Añade varios rollos de una vez (importaciones) con una sola transacción.
+        
+        Args:
+            filaments (list): Diccionarios con 'brand', 'material_type', 'color', 'weight_initial',
+                              'price' y opcionalmente 'diameter' y 'density'.
+        """
+        query = """
+            INSERT INTO filaments (brand, material_type, color, weight_initial, weight_current, price, diameter, density)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        try:
+            rows = [
+                (f['brand'], f['material_type'], f['color'], f['weight_initial'], f['weight_initial'],
+                 f['price'], f.get('diameter', 1.75), f.get('density', 1.24))
+                for f in filaments
+            ]
+            count = self.db.execute_many(query, rows)
+            self.db.invalidate('filaments')
+            return True, f"{count} filamentos añadidos correctamente."
+        except Exception as e:
+            return False, f"Error al añadir filamentos: {e}"
+
     def get_all_filaments(self):
-        """Obtiene todos los filamentos."""
+        """
+        Obtiene todos los filamentos. Se sirve desde la caché de DBManager hasta que algún
+        método de escritura de este gestor modifique la tabla (no modificar el resultado).
+        """
         query = "SELECT * FROM filaments ORDER BY id DESC"
-        return self.db.fetch_query(query)
+        return self.db.fetch_cached(query, tables=('filaments',))
 
     def update_filament_weight(self, filament_id, new_weight):
         """Actualiza el peso restante de un filamento."""
         query = "UPDATE filaments SET weight_current = ? WHERE id = ?"
         if self.db.execute_query(query, (new_weight, filament_id)):
+            self.db.invalidate('filaments')
             return True
         return False
 
@@ -34,6 +63,7 @@ class InventoryManager:
         """Elimina un filamento."""
         query = "DELETE FROM filaments WHERE id = ?"
         if self.db.execute_query(query, (filament_id,)):
+            self.db.invalidate('filaments')
             return True
         return False
     
@@ -1,67 +1,613 @@
 import os
 import shutil
-import trimesh
-from src.database.db_manager import DBManager
+import tempfile
+import threading
+import zipfile
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import (Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait,
+                                FIRST_COMPLETED)
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic import stl_reader
+from src.logic.model_store import ModelStore, file_hash
+from src.logic.thumbnail_renderer import render_thumbnail
+from src.logic.stl_reader import load_triangles
+
+
+def compute_mesh_metadata(file_path, content_hash=None):
+    """
+    Datos geométricos de una malla: triángulos, volumen, área, caja envolvente, si es
+    cerrada y hash del archivo. Las unidades son las del archivo (mm en los STL habituales).
+    """
+    metadata = stl_reader.mesh_metadata(load_triangles(file_path))
+    metadata['content_hash'] = content_hash or file_hash(file_path)
+    metadata['file_size'] = os.path.getsize(file_path)
+    return metadata
+
 
 class LibraryManager:
-    def __init__(self, db_manager=None):
+    # Hilo que calcula los metadatos de las mallas importadas, compartido por todos los
+    # gestores: la importación vuelve en cuanto el archivo está copiado y registrado
+    _metadata_executor = None
+    _executor_lock = threading.Lock()
+    # Procesos que renderizan las miniaturas y calculan los metadatos de las importaciones
+    # masivas (trabajo de CPU, fuera del GIL de la interfaz)
+    _process_pool = None
+    PROCESS_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+    # Hilos que copian y calculan el hash en las importaciones masivas (E/S; hashlib y zlib
+    # sueltan el GIL)
+    IMPORT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+    # Trabajos encolados a la vez como máximo en las tareas de mantenimiento: con miles de
+    # modelos pendientes no se crea un Future por modelo de golpe
+    BACKFILL_BATCH = 64
+    # Se activa en shutdown_workers: las tareas de mantenimiento dejan de encolar trabajo
+    _stop_event = threading.Event()
+    # Archivos que se importan al recorrer una carpeta o un .zip
+    MODEL_EXTENSIONS = ('.stl', '.obj', '.3mf', '.ply')
+
+    METADATA_COLUMNS = ('content_hash', 'file_size', 'triangle_count', 'volume_mm3',
+                        'surface_area_mm2', 'min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z',
+                        'is_watertight')
+
+    @classmethod
+    def _executor(cls):
+        with cls._executor_lock:
+            if cls._metadata_executor is None:
+                cls._metadata_executor = ThreadPoolExecutor(max_workers=1,
+                                                            thread_name_prefix='model-metadata')
+            return cls._metadata_executor
+
+    @classmethod
+    def _processes(cls):
+        with cls._executor_lock:
+            if cls._process_pool is None:
+                # spawn: los procesos no heredan los hilos ni las conexiones de la aplicación
+                cls._process_pool = ProcessPoolExecutor(
+                    max_workers=cls.PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return cls._process_pool
+
+    @classmethod
+    def shutdown_workers(cls, wait=False):
+        """Detiene el cálculo de metadatos y miniaturas en segundo plano (al salir de la aplicación)."""
+        cls._stop_event.set()
+        with cls._executor_lock:
+            executor, cls._metadata_executor = cls._metadata_executor, None
+            pool, cls._process_pool = cls._process_pool, None
+        for worker in (pool, executor):
+            if worker is not None:
+                worker.shutdown(wait=wait, cancel_futures=True)
+
+    def __init__(self, db_manager=None, assets_path=None):
         self.db = db_manager or DBManager()
-        self.library_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets', 'models')
+        assets_path = assets_path or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets')
+        self.library_path = os.path.join(assets_path, 'models')
+        self.thumbnails_path = os.path.join(assets_path, 'thumbnails')
+        # Archivos de los modelos, uno por contenido (ver model_store)
+        self.store = ModelStore(self.library_path)
         
         if not os.path.exists(self.library_path):
             os.makedirs(self.library_path)
 
     def add_model(self, file_path, name, description=""):
-        """Importa un archivo STL a la biblioteca y lo registra en la BD."""
+        """
+        Importa un archivo a la biblioteca y lo registra en la BD. El archivo se guarda en el
+        almacén por contenido: volver a importarlo con el mismo nombre no hace nada, y con otro
+        nombre crea un modelo que comparte el archivo, los metadatos y la miniatura.
+        """
         if not os.path.exists(file_path):
             return False, "El archivo no existe."
 
-        filename = os.path.basename(file_path)
-        dest_path = os.path.join(self.library_path, filename)
-        
-        # Copiar archivo a la carpeta de la biblioteca
+        # Copiar archivo al almacén de la biblioteca (nada si el contenido ya está)
         try:
-            shutil.copy2(file_path, dest_path)
+            content_hash, dest_path, created = self.store.put(file_path)
         except Exception as e:
             return False, f"Error al copiar archivo: {e}"
 
-        # Generar miniatura (Placeholder por ahora)
-        thumbnail_path = "" 
-        
-        # Guardar en BD
-        query = """
+        try:
+            with self.db.transaction():
+                if self.db.fetch_one("SELECT 1 FROM models WHERE file_path = ? AND name = ?",
+                                     (dest_path, name)):
+                    return True, "El modelo ya está en la biblioteca."
+                if not os.path.exists(dest_path):
+                    # Un delete_model simultáneo lo ha borrado al quedarse sin referencias
+                    self.store.put(file_path, content_hash)
+                model_id, has_metadata = self._insert_model(name, description, dest_path)
+                self.db.invalidate('models')
+        except Exception as e:
+            print(f"Error al guardar el modelo: {e}")
+            if created:
+                self._release_file(dest_path)
+            return False, "Error al guardar en base de datos."
+
+        if not has_metadata:
+            # Volumen, caja envolvente, etc. se calculan en segundo plano
+            self.schedule_metadata(model_id, dest_path)
+        return True, "Modelo añadido correctamente."
+
+    def add_model_async(self, file_path, name, description=""):
+        """
+        Lanza add_model() en un hilo propio: el hash y la copia al almacén de un modelo grande
+        tardan, y en DBWorker retrasarían las consultas de la interfaz.
+
+        Returns:
+            Future: Con el (bool, str) de add_model().
+        """
+        return self._in_thread("library-add", self.add_model, file_path, name, description)
+
+    def _insert_model(self, name, description, file_path):
+        """
+        Inserta el modelo (dentro de una transacción). Si otro modelo ya usa el mismo archivo se
+        copian sus metadatos y su miniatura en lugar de volver a calcularlos.
+
+        Returns:
+            tuple: (id del modelo, True si ya tiene metadatos)
+        """
+        cursor = self.db.execute_query("""
             INSERT INTO models (name, description, file_path, thumbnail_path)
-            VALUES (?, ?, ?, ?)
+            VALUES (?, ?, ?, COALESCE((SELECT thumbnail_path FROM models
+                                       WHERE file_path = ? AND thumbnail_path != '' LIMIT 1), ''))
+        """, (name, description, file_path, file_path))
+        model_id = cursor.lastrowid
+        columns = ', '.join(self.METADATA_COLUMNS)
+        copied = self.db.execute_query(f"""
+            INSERT INTO model_metadata (model_id, {columns})
+            SELECT ?, {columns} FROM model_metadata
+            WHERE model_id = (SELECT md.model_id FROM model_metadata md
+                              JOIN models m ON m.id = md.model_id
+                              WHERE m.file_path = ? AND m.id != ? LIMIT 1)
+        """, (model_id, file_path, model_id)).rowcount
+        return model_id, copied > 0
+
+    def import_models(self, source, progress=None, cancel_event=None):
         """
-        params = (name, description, dest_path, thumbnail_path)
-        
-        if self.db.execute_query(query, params):
-            return True, "Modelo añadido correctamente."
-        else:
-            return False, "Error al guardar en base de datos."
+        Importa todos los modelos de una carpeta (con sus subcarpetas) o de un archivo .zip.
+        Los archivos se copian al almacén y se les calcula el hash en paralelo (hilos), los
+        metadatos de los contenidos nuevos en el pool de procesos, y todas las filas se
+        insertan en una sola transacción. Como en add_model, un archivo ya importado con el
+        mismo nombre se omite y uno repetido con otro nombre comparte archivo y metadatos.
+        Las miniaturas se encolan al terminar.
+
+        Args:
+            source (str): Carpeta o archivo .zip.
+            progress (callable): progress(procesados, total) tras cada archivo.
+            cancel_event (threading.Event): Si se activa, la importación se abandona sin
+                insertar nada.
+
+        Returns:
+            tuple: (bool, str) Éxito y mensaje.
+        """
+        extract_dir = None
+        archives = []
+        try:
+            if os.path.isdir(source):
+                items = [(os.path.join(root, filename), filename)
+                         for root, _, filenames in os.walk(source)
+                         for filename in sorted(filenames)
+                         if filename.lower().endswith(self.MODEL_EXTENSIONS)]
+            elif zipfile.is_zipfile(source):
+                with zipfile.ZipFile(source) as archive:
+                    items = [(info, os.path.basename(info.filename))
+                             for info in archive.infolist()
+                             if not info.is_dir() and info.filename.lower().endswith(self.MODEL_EXTENSIONS)]
+                # En la carpeta de la biblioteca: los extraídos se enlazan en el almacén sin copiarlos
+                extract_dir = tempfile.mkdtemp(prefix='.import_', dir=self.library_path)
+            else:
+                return False, "Selecciona una carpeta o un archivo .zip."
+            if not items:
+                return False, "No se han encontrado modelos (STL, OBJ, 3MF, PLY)."
+
+            local = threading.local()
+
+            def stage(index, item):
+                path, name = item
+                if extract_dir is not None:
+                    # Cada hilo con su propio ZipFile; nombre numerado para no usar rutas del zip
+                    if not hasattr(local, 'archive'):
+                        local.archive = zipfile.ZipFile(source)
+                        archives.append(local.archive)
+                    extracted = os.path.join(extract_dir, f"{index}{os.path.splitext(path.filename)[1]}")
+                    with local.archive.open(path) as src, open(extracted, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                    path = extracted
+                return (path, name) + self.store.put(path, link=extract_dir is not None)
+
+            return self._import_items(items, stage, progress, cancel_event)
+        except InterruptedError:
+            return False, "Importación cancelada."
+        except (OSError, zipfile.BadZipFile) as e:
+            return False, f"Error al importar: {e}"
+        finally:
+            for archive in archives:
+                archive.close()
+            if extract_dir is not None:
+                shutil.rmtree(extract_dir, ignore_errors=True)
+
+    def _import_items(self, items, stage, progress, cancel_event):
+        """Etapas de import_models: copia en paralelo, metadatos y una transacción."""
+        total = len(items)
+        done = errors = imported = skipped = 0
+        stored = []                     # (origen, nombre, hash, ruta en el almacén)
+        created = []                    # Archivos nuevos en el almacén (se quitan si se cancela)
+        metadata = {}                   # ruta en el almacén -> metadatos calculados (None si falla)
+        waiting = defaultdict(int)      # ruta en el almacén -> archivos pendientes de sus metadatos
+        metadata_futures = {}
+
+        def check_cancel(io_pool=None, futures=()):
+            if cancel_event is None or not cancel_event.is_set():
+                return
+            for future in metadata_futures:
+                future.cancel()
+            if io_pool is not None:
+                io_pool.shutdown(wait=True, cancel_futures=True)
+                # Archivos ya guardados por las tareas que no se han llegado a recoger
+                for future in futures:
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        if future.result()[4]:
+                            created.append(future.result()[3])
+            raise InterruptedError()
+
+        def report():
+            if progress is not None:
+                progress(done, total)
+
+        try:
+            io_pool = ThreadPoolExecutor(max_workers=self.IMPORT_WORKERS, thread_name_prefix='model-import')
+            with io_pool:
+                futures = [io_pool.submit(stage, index, item) for index, item in enumerate(items)]
+                for future in as_completed(futures):
+                    check_cancel(io_pool, futures)
+                    try:
+                        path, name, content_hash, dest_path, is_new = future.result()
+                    except (OSError, zipfile.BadZipFile) as e:
+                        print(f"Error al importar un modelo: {e}")
+                        errors += 1
+                        done += 1
+                        report()
+                        continue
+                    if is_new:
+                        created.append(dest_path)
+                    stored.append((path, name, content_hash, dest_path))
+                    # Metadatos una vez por contenido, y solo si no los tiene ya otro modelo
+                    if dest_path in waiting:
+                        waiting[dest_path] += 1
+                    elif dest_path not in metadata and (is_new or not self._has_metadata(dest_path)):
+                        metadata_futures[self._processes().submit(
+                            compute_mesh_metadata, dest_path, content_hash)] = dest_path
+                        waiting[dest_path] = 1
+                    else:
+                        metadata.setdefault(dest_path, None)  # Se copian del otro modelo
+                        done += 1
+                        report()
+
+            for future in as_completed(metadata_futures):
+                check_cancel()
+                dest_path = metadata_futures[future]
+                try:
+                    metadata[dest_path] = future.result()
+                except Exception as e:
+                    print(f"Error al calcular los metadatos de {dest_path}: {e}")
+                    metadata[dest_path] = None
+                done += waiting.pop(dest_path)
+                report()
+
+            columns = ', '.join(self.METADATA_COLUMNS)
+            placeholders = ', '.join('?' * len(self.METADATA_COLUMNS))
+            with self.db.transaction():
+                existing = set(self.db.fetch_rows("SELECT file_path, name FROM models") or [])
+                for path, name, content_hash, dest_path in stored:
+                    if (dest_path, name) in existing:
+                        skipped += 1
+                        continue
+                    existing.add((dest_path, name))
+                    if not os.path.exists(dest_path):
+                        # Un delete_model simultáneo lo ha borrado al quedarse sin referencias
+                        self.store.put(path, content_hash)
+                    model_id, has_metadata = self._insert_model(name, "", dest_path)
+                    if not has_metadata and metadata.get(dest_path):
+                        self.db.execute_query(
+                            f"INSERT INTO model_metadata (model_id, {columns}) VALUES (?, {placeholders})",
+                            (model_id, *(metadata[dest_path][c] for c in self.METADATA_COLUMNS))
+                        )
+                    imported += 1
+                self.db.invalidate('models')
+        finally:
+            # Archivos nuevos que no han llegado a usarse (cancelación, error, o todos sus
+            # nombres ya estaban en la biblioteca)
+            for dest_path in created:
+                self._release_file(dest_path)
+
+        # Las miniaturas, por lotes en otro hilo: la importación termina sin esperarlas
+        self._in_thread("library-thumbnails", self.backfill_thumbnails)
+        msg = f"{imported} modelos importados"
+        if skipped:
+            msg += f", {skipped} ya estaban en la biblioteca"
+        if errors:
+            msg += f", {errors} no se pudieron leer"
+        return True, msg + "."
+
+    def import_models_async(self, source, progress=None, cancel_event=None):
+        """
+        Lanza import_models() en un hilo propio (no en DBWorker, para no retrasar las consultas
+        de la interfaz durante una importación larga).
+
+        Returns:
+            Future: Con el (bool, str) de import_models(). progress se llama desde ese hilo.
+        """
+        return self._in_thread("library-import", self.import_models, source, progress, cancel_event)
+
+    def start_background_tasks(self):
+        """
+        Lanza en un hilo propio el mantenimiento de la biblioteca al arrancar: paso de los
+        archivos antiguos al almacén y metadatos y miniaturas de los modelos que no los tienen.
+        No va en DBWorker: duraría tanto como la biblioteca es grande y retrasaría todas las
+        consultas de la interfaz.
+
+        Returns:
+            Future: Con (archivos migrados, metadatos calculados, miniaturas encoladas).
+        """
+        LibraryManager._stop_event.clear()
+        return self._in_thread("library-maintenance", self._maintenance, self._stop_event)
+
+    def _maintenance(self, stop_event):
+        # Primero las rutas definitivas de los archivos, luego los metadatos (las miniaturas
+        # necesitan su content_hash)
+        migrated = self.migrate_legacy_files(stop_event)
+        metadata = self.backfill_metadata(stop_event)
+        return migrated, metadata, self.backfill_thumbnails(stop_event)
+
+    @staticmethod
+    def _in_thread(name, func, *args):
+        """Ejecuta func en un hilo nuevo y devuelve un Future con su resultado."""
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                # La conexión de este hilo no se vuelve a usar
+                ConnectionPool.release_thread()
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+        return future
+
+    def _run_bounded(self, submit, items, stop_event=None):
+        """
+        Llama a submit(*item) para cada elemento con, como mucho, BACKFILL_BATCH Futures
+        pendientes, y espera a que terminen todos.
+
+        Returns:
+            int: Trabajos encolados.
+        """
+        pending = set()
+        count = 0
+        for item in items:
+            if len(pending) >= self.BACKFILL_BATCH:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if stop_event is not None and stop_event.is_set():
+                break
+            pending.add(submit(*item))
+            count += 1
+        wait(pending)
+        return count
+
+    def _has_metadata(self, file_path):
+        """True si algún modelo con ese archivo ya tiene metadatos."""
+        return bool(self.db.fetch_one("""
+            SELECT 1 FROM model_metadata md JOIN models m ON m.id = md.model_id
+            WHERE m.file_path = ? LIMIT 1
+        """, (file_path,)))
 
     def get_all_models(self):
-        """Obtiene todos los modelos de la BD."""
+        """
+        Obtiene todos los modelos de la BD. Se sirve desde la caché de DBManager hasta que
+        add_model o delete_model modifiquen la tabla (no modificar el resultado).
+        """
         query = "SELECT * FROM models ORDER BY added_date DESC"
-        return self.db.fetch_query(query)
+        return self.db.fetch_cached(query, tables=('models',))
 
-    def delete_model(self, model_id):
-        """Elimina un modelo de la BD y del sistema de archivos."""
-        # Primero obtener la ruta
-        query_get = "SELECT file_path FROM models WHERE id = ?"
-        result = self.db.fetch_query(query_get, (model_id,))
-        
+    def iter_models(self, search="", batch_size=500):
+        """
+        Generador de lotes de modelos (namedtuples con id, name, file_path y thumbnail_path), del más reciente
+        al más antiguo, filtrados por nombre. Para listados grandes sin cargar toda la tabla.
+        """
+        query = """
+            SELECT id, name, file_path, thumbnail_path FROM models
+            WHERE name LIKE ? ESCAPE '\\'
+            ORDER BY added_date DESC
+        """
+        pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return self.db.iter_query(query, (f"%{pattern}%",), batch_size, named=True)
+
+    def schedule_metadata(self, model_id, file_path, thumbnail=True):
+        """
+        Encola el cálculo y guardado de los metadatos de un modelo en el hilo de metadatos.
+
+        Returns:
+            Future: Con el diccionario de metadatos (o la excepción si la malla no se pudo leer).
+        """
+        return self._executor().submit(self.compute_and_store_metadata, model_id, file_path, thumbnail)
+
+    def compute_and_store_metadata(self, model_id, file_path, thumbnail=True):
+        """
+        Calcula los metadatos de la malla y los guarda en model_metadata. Con thumbnail, encola
+        después su miniatura.
+        """
+        try:
+            metadata = compute_mesh_metadata(file_path)
+        except Exception as e:
+            print(f"Error al calcular los metadatos del modelo {model_id}: {e}")
+            raise
+        columns = ', '.join(self.METADATA_COLUMNS)
+        placeholders = ', '.join('?' * len(self.METADATA_COLUMNS))
+        # Si el modelo se ha borrado mientras tanto, no se inserta nada
+        self.db.execute_query(
+            f"INSERT OR REPLACE INTO model_metadata (model_id, {columns}) "
+            f"SELECT ?, {placeholders} WHERE EXISTS (SELECT 1 FROM models WHERE id = ?)",
+            (model_id, *(metadata[c] for c in self.METADATA_COLUMNS), model_id)
+        )
+        if thumbnail:
+            self.schedule_thumbnail(model_id, file_path, metadata['content_hash'])
+        return metadata
+
+    def schedule_thumbnail(self, model_id, file_path, content_hash):
+        """
+        Encola el renderizado de la miniatura en el pool de procesos. Al terminar, la ruta se
+        guarda en models.thumbnail_path desde el hilo de metadatos.
+
+        Returns:
+            Future: Con la ruta del PNG.
+        """
+        future = self._processes().submit(render_thumbnail, file_path, content_hash,
+                                           self.thumbnails_path)
+        # El de ahora: si se detiene (shutdown_workers), el callback no debe crear otro
+        executor = self._executor()
+
+        def on_done(f):
+            try:
+                executor.submit(self._store_thumbnail, model_id, f)
+            except RuntimeError:
+                pass  # Aplicación cerrándose
+        future.add_done_callback(on_done)
+        return future
+
+    def _store_thumbnail(self, model_id, future):
+        if future.cancelled():
+            return
+        try:
+            path = future.result()
+        except Exception as e:
+            print(f"Error al generar la miniatura del modelo {model_id}: {e}")
+            return
+        self.db.execute_query("UPDATE models SET thumbnail_path = ? WHERE id = ?", (path, model_id))
+        self.db.invalidate('models')
+
+    def backfill_thumbnails(self, stop_event=None):
+        """
+        Renderiza las miniaturas de los modelos con metadatos pero sin miniatura (o cuyo PNG ya
+        no existe), por lotes de BACKFILL_BATCH en el pool de procesos. Bloquea hasta terminar
+        o hasta que se active stop_event.
+
+        Returns:
+            int: Miniaturas encoladas.
+        """
+        rows = self.db.fetch_rows("""
+            SELECT m.id, m.file_path, m.thumbnail_path, md.content_hash FROM models m
+            JOIN model_metadata md ON md.model_id = m.id
+        """) or []
+        return self._run_bounded(self.schedule_thumbnail,
+                                 ((model_id, file_path, content_hash)
+                                  for model_id, file_path, thumbnail, content_hash in rows
+                                  if not (thumbnail and os.path.exists(thumbnail))
+                                  and os.path.exists(file_path)),
+                                 stop_event)
+
+    def get_model_metadata(self, model_id):
+        """Metadatos geométricos de un modelo (diccionario), o None si aún no se han calculado."""
+        result = self.db.fetch_query("SELECT * FROM model_metadata WHERE model_id = ?", (model_id,))
         if result:
-            file_path = result[0]['file_path']
-            # Borrar archivo físico
-            if os.path.exists(file_path):
+            metadata = result[0]
+            metadata['is_watertight'] = bool(metadata['is_watertight'])
+            return metadata
+        return None
+
+    def backfill_metadata(self, stop_event=None):
+        """
+        Calcula los metadatos de los modelos que no los tienen (importados antes de que existiera
+        la tabla o cuyo cálculo se interrumpió), por lotes de BACKFILL_BATCH en el hilo de
+        metadatos. Bloquea hasta terminar o hasta que se active stop_event. Las miniaturas no se
+        encolan aquí una por modelo: después, con backfill_thumbnails.
+
+        Returns:
+            int: Modelos procesados.
+        """
+        rows = self.db.fetch_rows("""
+            SELECT m.id, m.file_path FROM models m
+            LEFT JOIN model_metadata md ON md.model_id = m.id
+            WHERE md.model_id IS NULL
+        """) or []
+        return self._run_bounded(self.schedule_metadata,
+                                 ((model_id, file_path, False) for model_id, file_path in rows
+                                  if os.path.exists(file_path)),
+                                 stop_event)
+
+    def delete_model(self, model_id):
+        """
+        Elimina un modelo de la BD. Su archivo y su miniatura se borran del disco cuando ya no
+        los usa ningún otro modelo (recuento de referencias por ruta).
+        """
+        with self.db.transaction():
+            result = self.db.fetch_one("SELECT file_path, thumbnail_path FROM models WHERE id = ?",
+                                       (model_id,))
+            if not result:
+                return False
+            file_path, thumbnail_path = result
+
+            self.db.execute_query("DELETE FROM models WHERE id = ?", (model_id,))
+            self.db.invalidate('models')
+            # Solo con el borrado ya confirmado (también si delete_model va dentro de otra
+            # transacción): si se deshace, la fila sigue apuntando a archivos que existen
+            self.db.after_commit(lambda: self._release_file(file_path, thumbnail_path))
+        return True
+
+    def _release_file(self, file_path, thumbnail_path=None):
+        """
+        Borra el archivo de un modelo (y su miniatura) si ya no los referencia ninguna fila de
+        models. El recuento se comprueba dentro de una transacción de escritura: un add_model
+        simultáneo del mismo contenido espera a que termine y, si el archivo ya no está, lo
+        vuelve a copiar.
+        """
+        with self.db.transaction():
+            if not self.db.fetch_one("SELECT 1 FROM models WHERE file_path = ? LIMIT 1", (file_path,)):
+                if self.store.contains(file_path):
+                    self.store.remove(file_path)
+                elif os.path.exists(file_path):
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass # Continuar aunque falle borrado físico
+            if thumbnail_path and not self.db.fetch_one(
+                    "SELECT 1 FROM models WHERE thumbnail_path = ? LIMIT 1", (thumbnail_path,)):
+                try:
+                    os.remove(thumbnail_path)
+                except OSError:
+                    pass
+
+    def migrate_legacy_files(self, stop_event=None):
+        """
+        Pasa al almacén por contenido los archivos importados antes de que existiera (copiados
+        por nombre en assets/models). Los de la carpeta de la biblioteca se enlazan en el
+        almacén y se borran de su ruta antigua. Se detiene entre archivos si se activa
+        stop_event.
+
+        Returns:
+            int: Archivos migrados.
+        """
+        rows = self.db.fetch_rows("SELECT DISTINCT file_path FROM models") or []
+        library_dir = os.path.normcase(os.path.abspath(self.library_path))
+        migrated = 0
+        for (old_path,) in rows:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if self.store.contains(old_path) or not os.path.exists(old_path):
+                continue
+            owned = os.path.normcase(os.path.abspath(os.path.dirname(old_path))) == library_dir
+            try:
+                _, new_path, _ = self.store.put(old_path, link=owned)
+            except OSError as e:
+                print(f"Error al migrar {old_path} al almacén de modelos: {e}")
+                continue
+            self.db.execute_query("UPDATE models SET file_path = ? WHERE file_path = ?",
+                                  (new_path, old_path))
+            self.db.invalidate('models')
+            if owned:
                 try:
-                    os.remove(file_path)
+                    os.remove(old_path)
                 except OSError:
-                    pass # Continuar aunque falle borrado físico
-            
-            # Borrar de BD
-            query_del = "DELETE FROM models WHERE id = ?"
-            self.db.execute_query(query_del, (model_id,))
-            return True
-        return False
+                    pass
+            migrated += 1
+        return migrated
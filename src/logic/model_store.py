@@ -0,0 +1,120 @@
+"""
+Almacén de los archivos de la biblioteca direccionado por contenido.
+
+Cada archivo se guarda una sola vez con el SHA-256 de su contenido como nombre, repartido en
+subcarpetas por los dos primeros caracteres del hash (como las miniaturas):
+
+    assets/models/3f/3f9a...c2.stl
+
+Dos archivos con el mismo nombre ya no se pisan y un mismo archivo importado varias veces
+ocupa disco una sola vez. Al guardar se intenta, por orden, un enlace duro (solo para
+archivos de la propia aplicación, ver put), una copia reflink (copy-on-write en Btrfs, XFS...)
+y una copia normal. El recuento de referencias lo lleva la base de datos (modelos con la misma
+ruta); LibraryManager borra el archivo cuando ya no lo usa ningún modelo.
+"""
+import os
+import re
+import shutil
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin reflink
+    fcntl = None
+
+# ioctl de Linux que clona un archivo compartiendo sus bloques (copy-on-write)
+FICLONE = 0x40049409
+
+_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link(source, dest):
+    try:
+        os.link(source, dest)
+        return True
+    except OSError:
+        return False  # Otro sistema de archivos, FAT, sin permisos...
+
+
+def _reflink(source, dest):
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source, dest)
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+        return False
+
+
+class ModelStore:
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, content_hash, extension=''):
+        """Ruta de un contenido en el almacén (la extensión se guarda en minúsculas)."""
+        return os.path.join(self.root, content_hash[:2], content_hash + extension.lower())
+
+    def contains(self, path):
+        """True si la ruta es la de un archivo del almacén (aunque ya no exista)."""
+        stem = os.path.splitext(os.path.basename(path))[0]
+        shard = os.path.dirname(path)
+        return (bool(_HASH_RE.match(stem)) and os.path.basename(shard) == stem[:2]
+                and os.path.normcase(os.path.abspath(os.path.dirname(shard)))
+                == os.path.normcase(os.path.abspath(self.root)))
+
+    def put(self, file_path, content_hash=None, link=False):
+        """
+        Guarda un archivo en el almacén si su contenido no está ya.
+
+        Args:
+            file_path: Archivo a guardar.
+            content_hash: SHA-256 del archivo, si ya se conoce.
+            link: Probar primero un enlace duro. Solo para archivos de la aplicación
+                (temporales, la biblioteca antigua): con un archivo del usuario, editarlo
+                después cambiaría también el del almacén.
+
+        Returns:
+            tuple: (hash, ruta en el almacén, True si se ha escrito el archivo ahora)
+        """
+        content_hash = content_hash or file_hash(file_path)
+        dest_path = self.path_for(content_hash, os.path.splitext(file_path)[1])
+        if os.path.exists(dest_path):
+            return content_hash, dest_path, False
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        # Se escribe aparte y se renombra: nunca queda un archivo a medias con el nombre final
+        tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not (link and _link(file_path, tmp_path)) and not _reflink(file_path, tmp_path):
+                shutil.copy2(file_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return content_hash, dest_path, True
+
+    def remove(self, path):
+        """Borra un archivo del almacén y su subcarpeta si queda vacía."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass  # No está vacía
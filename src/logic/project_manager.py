@@ -1,45 +1,200 @@
+import os
+import json
 import sqlite3
+import threading
+from concurrent.futures import Future
 from datetime import datetime
-from src.database.db_manager import DBManager
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic.slicer_parser import SlicerParser
+from src.logic.gcode_cache import GcodeCache
 
 class ProjectManager:
     """Gestor de proyectos de impresión 3D."""
     
-    def __init__(self):
-        self.db = DBManager()
+    GCODE_EXTENSIONS = ('.gcode', '.gco', '.gcode.gz', '.bgcode', '.3mf')
+    
+    # Listado de proyectos de un usuario (get_all_projects / iter_projects)
+    PROJECTS_QUERY = """
+        SELECT p.id, p.name, p.description, p.status, p.weight_grams, p.print_time_hours,
+               p.total_cost, p.filament_cost, p.energy_cost, p.created_at, p.completed_at,
+               m.name as model_name, f.brand as filament_brand, f.material_type
+        FROM projects p
+        LEFT JOIN models m ON p.model_id = m.id
+        LEFT JOIN filaments f ON p.filament_id = f.id
+        WHERE p.user_id = ?
+        ORDER BY p.created_at DESC
+    """
+    
+    def __init__(self, db_manager=None):
+        self.db = db_manager or DBManager()
+    
+    @staticmethod
+    def _dump_tool_weights(tool_weights):
+        """Gramos por herramienta a la columna tool_weights (JSON; NULL si hay un solo material)."""
+        if not tool_weights or len(tool_weights) < 2:
+            return None
+        return json.dumps([round(grams, 2) for grams in tool_weights])
+    
+    @staticmethod
+    def load_tool_weights(value):
+        """Lista de gramos por herramienta guardada en tool_weights, o None."""
+        return json.loads(value) if value else None
     
     def create_project(self, user_id, name, description="", model_id=None, filament_id=None, 
-                      weight_grams=0, print_time_hours=0, status="Pendiente"):
-        """Crea un nuevo proyecto."""
+                      weight_grams=0, print_time_hours=0, status="Pendiente", tool_weights=None):
+        """
+        Crea un nuevo proyecto. tool_weights son los gramos de cada herramienta en trabajos
+        multimaterial (MMU/AMS), p.ej. 'tool_weights_g' de SlicerParser.
+        """
         try:
             query = """
                 INSERT INTO projects (user_id, name, description, model_id, filament_id,
-                                    weight_grams, print_time_hours, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                    weight_grams, print_time_hours, status, tool_weights)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
             self.db.execute_query(query, (user_id, name, description, model_id, filament_id,
-                                         weight_grams, print_time_hours, status))
+                                         weight_grams, print_time_hours, status,
+                                         self._dump_tool_weights(tool_weights)))
             return True, "Proyecto creado exitosamente"
         except Exception as e:
             return False, f"Error al crear proyecto: {str(e)}"
     
+    def import_gcode_folder(self, user_id, folder, workers=None, progress_callback=None):
+        """Crea un proyecto por cada archivo G-code de una carpeta."""
+        file_paths = [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+                      if f.lower().endswith(self.GCODE_EXTENSIONS)]
+        return self.import_gcode_files(user_id, file_paths, workers, progress_callback)
+    
+    def import_gcode_folder_async(self, user_id, folder, workers=None, progress_callback=None):
+        """
+        Lanza import_gcode_folder() en un hilo propio (no en DBWorker, para no retrasar las
+        consultas de la interfaz mientras se analiza la carpeta).
+        
+        Returns:
+            Future: Con el (creados, fallidos) de import_gcode_folder(). progress_callback se
+            llama desde ese hilo.
+        """
+        future = Future()
+        
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.import_gcode_folder(user_id, folder, workers, progress_callback))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                # La conexión de este hilo no se vuelve a usar
+                ConnectionPool.release_thread()
+        
+        threading.Thread(target=run, name="gcode-import", daemon=True).start()
+        return future
+    
+    def import_gcode_files(self, user_id, file_paths, workers=None, progress_callback=None):
+        """
+        Importa varios G-code en lote creando un proyecto por archivo.
+        Los archivos se analizan en paralelo con SlicerParser.parse_many (con análisis de
+        movimientos si no hay metadatos) y los proyectos se van creando a medida que llegan
+        los resultados. Recorre los archivos completos: llamar desde un hilo en segundo plano.
+        
+        Args:
+            user_id (int): Usuario propietario de los proyectos.
+            file_paths (list): Rutas a los archivos G-code.
+            workers (int): Procesos para el análisis. Por defecto, uno por núcleo.
+            progress_callback (callable): Se llama con (procesados, total) tras cada archivo.
+            
+        Returns:
+            tuple: (número de proyectos creados, lista de rutas que no se pudieron importar)
+        """
+        parser = SlicerParser(cache=GcodeCache(self.db))
+        total = len(file_paths)
+        created = 0
+        failed = []
+        parsed = []
+        
+        # Fuera del hilo de la interfaz: los archivos sin metadatos se estiman por sus movimientos
+        results = parser.parse_many(file_paths, workers=workers, analyze_motion=True)
+        for done, (file_path, data) in enumerate(results, 1):
+            if data:
+                parsed.append((file_path, data))
+            else:
+                failed.append(file_path)
+            
+            if progress_callback:
+                progress_callback(done, total)
+        
+        # Todos los proyectos en una sola transacción (un commit para todo el lote)
+        with self.db.transaction():
+            for file_path, data in parsed:
+                filename = os.path.basename(file_path)
+                name = os.path.splitext(filename)[0]
+                if filename.lower().endswith('.gz'):
+                    name = os.path.splitext(name)[0]
+                success, _ = self.create_project(
+                    user_id,
+                    name,
+                    f"Importado desde {filename}",
+                    weight_grams=round(data.get('filament_weight_g', 0), 2),
+                    print_time_hours=round(data.get('print_time_seconds', 0) / 3600.0, 2),
+                    tool_weights=data.get('tool_weights_g')
+                )
+                if success:
+                    created += 1
+                else:
+                    failed.append(file_path)
+        
+        return created, failed
+    
+    def save_project(self, project_id, user_id, name, description="", status="Pendiente", model_id=None,
+                     filament_id=None, weight_grams=0, print_time_hours=0, tool_weights=None):
+        """
+        Crea (project_id None) o actualiza un proyecto con sus costes, calculados con el precio
+        actual del filamento, en una sola transacción. Es lo que guarda el diálogo de proyectos.
+        
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        with self.db.transaction():
+            # Calcular costes si hay datos
+            costs = {'filament_cost': 0, 'energy_cost': 0, 'total_cost': 0}
+            if weight_grams > 0 and print_time_hours > 0 and filament_id:
+                filament = self.db.fetch_one("SELECT price FROM filaments WHERE id = ?", (filament_id,))
+                if filament:
+                    costs = self.calculate_costs(tool_weights or weight_grams, filament[0], print_time_hours)
+            
+            if project_id is None:
+                success, message = self.create_project(user_id, name, description, model_id, filament_id,
+                                                       weight_grams, print_time_hours, status, tool_weights)
+                if not success:
+                    return success, message
+                project_id = self.db.fetch_one("SELECT last_insert_rowid()")[0]
+                self.update_project(project_id, **costs)
+                return success, message
+            
+            return self.update_project(
+                project_id,
+                name=name,
+                description=description,
+                status=status,
+                model_id=model_id,
+                filament_id=filament_id,
+                weight_grams=weight_grams,
+                print_time_hours=print_time_hours,
+                tool_weights=tool_weights,
+                **costs
+            )
+    
     def get_all_projects(self, user_id):
         """Obtiene todos los proyectos de un usuario."""
-        query = """
-            SELECT p.id, p.name, p.description, p.status, p.weight_grams, p.print_time_hours,
-                   p.total_cost, p.filament_cost, p.energy_cost, p.created_at, p.completed_at,
-                   m.name as model_name, f.brand as filament_brand, f.material_type
-            FROM projects p
-            LEFT JOIN models m ON p.model_id = m.id
-            LEFT JOIN filaments f ON p.filament_id = f.id
-            WHERE p.user_id = ?
-            ORDER BY p.created_at DESC
+        # Tuplas directamente de sqlite3, sin pasar por diccionarios
+        return self.db.fetch_rows(self.PROJECTS_QUERY, (user_id,)) or []
+    
+    def iter_projects(self, user_id, batch_size=200):
+        """
+        Como get_all_projects pero por lotes (generador de listas de tuplas con el mismo
+        formato), para listar muchos proyectos sin cargarlos todos en memoria.
         """
-        results = self.db.fetch_query(query, (user_id,))
-        # Convertir diccionarios a tuplas para compatibilidad con el código existente
-        if results:
-            return [tuple(r.values()) for r in results]
-        return []
+        return self.db.iter_query(self.PROJECTS_QUERY, (user_id,), batch_size)
     
     def get_project_by_id(self, project_id):
         """Obtiene un proyecto por ID."""
@@ -60,9 +215,12 @@ class ProjectManager:
             values = []
             
             allowed_fields = ['name', 'description', 'status', 'weight_grams', 'print_time_hours',
-                            'total_cost', 'filament_cost', 'energy_cost', 'model_id', 'filament_id']
+                            'total_cost', 'filament_cost', 'energy_cost', 'model_id', 'filament_id',
+                            'tool_weights']
             
             for field, value in kwargs.items():
+                if field == 'tool_weights':
+                    value = self._dump_tool_weights(value)
                 if field in allowed_fields:
                     fields.append(f"{field} = ?")
                     values.append(value)
@@ -89,9 +247,23 @@ class ProjectManager:
     
     def calculate_costs(self, weight_grams, filament_price_per_kg, print_time_hours, 
                        power_watts=350, energy_cost_per_kwh=0.15):
-        """Calcula los costes de un proyecto."""
-        # Coste de filamento
-        filament_cost = (weight_grams / 1000) * filament_price_per_kg
+        """
+        Calcula los costes de un proyecto.
+        
+        Para trabajos multimaterial (MMU/AMS) weight_grams puede ser una lista con los gramos de
+        cada herramienta (p.ej. 'tool_weights_g' de SlicerParser) y filament_price_per_kg un precio
+        único o una lista con el precio de cada una; el resultado incluye entonces 'tool_costs'.
+        """
+        tool_costs = None
+        if isinstance(weight_grams, (list, tuple)):
+            prices = filament_price_per_kg
+            if not isinstance(prices, (list, tuple)):
+                prices = [prices] * len(weight_grams)
+            tool_costs = [(grams / 1000) * price for grams, price in zip(weight_grams, prices)]
+            filament_cost = sum(tool_costs)
+        else:
+            # Coste de filamento
+            filament_cost = (weight_grams / 1000) * filament_price_per_kg
         
         # Coste energético
         energy_kwh = (power_watts * print_time_hours) / 1000
@@ -100,11 +272,45 @@ class ProjectManager:
         # Coste total
         total_cost = filament_cost + energy_cost
         
-        return {
+        costs = {
             'filament_cost': round(filament_cost, 2),
             'energy_cost': round(energy_cost, 2),
             'total_cost': round(total_cost, 2)
         }
+        if tool_costs is not None:
+            costs['tool_costs'] = [round(cost, 2) for cost in tool_costs]
+        return costs
+    
+    def recalculate_costs(self, user_id, power_watts=350, energy_cost_per_kwh=0.15):
+        """
+        Recalcula los costes de todos los proyectos de un usuario con el precio actual de su
+        filamento (p.ej. tras cambiar la tarifa eléctrica) y los guarda con un único commit.
+        
+        Returns:
+            tuple: (éxito, mensaje)
+        """
+        try:
+            projects = self.db.fetch_query("""
+                SELECT p.id, p.weight_grams, p.tool_weights, p.print_time_hours, f.price
+                FROM projects p
+                LEFT JOIN filaments f ON p.filament_id = f.id
+                WHERE p.user_id = ?
+            """, (user_id,)) or []
+            
+            rows = []
+            for project in projects:
+                # Multimaterial: coste por herramienta (mismo total con un único precio)
+                weights = self.load_tool_weights(project['tool_weights']) or project['weight_grams'] or 0
+                costs = self.calculate_costs(weights, project['price'] or 0,
+                                             project['print_time_hours'] or 0, power_watts, energy_cost_per_kwh)
+                rows.append((costs['filament_cost'], costs['energy_cost'], costs['total_cost'], project['id']))
+            
+            self.db.execute_many(
+                "UPDATE projects SET filament_cost = ?, energy_cost = ?, total_cost = ? WHERE id = ?", rows
+            )
+            return True, f"Costes recalculados en {len(rows)} proyectos"
+        except Exception as e:
+            return False, f"Error al recalcular costes: {str(e)}"
     
     def mark_as_completed(self, project_id):
         """Marca un proyecto como completado."""
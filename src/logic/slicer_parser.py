@@ -1,5 +1,19 @@
 import re
 import os
+import mmap
+import gzip
+import struct
+import zipfile
+import zlib
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.logic.gcode_analyzer import GcodeAnalyzer
+
+def _parse_worker(file_path, options):
+    """Punto de entrada de los procesos de parse_many (debe ser picklable)."""
+    return file_path, SlicerParser().parse_file(file_path, **options)
+
 
 class SlicerParser:
     """
@@ -7,62 +21,430 @@ class SlicerParser:
     Soporta Cura y PrusaSlicer (y derivados como OrcaSlicer/BambuStudio).
     """
     
-    def parse_file(self, file_path):
+    # Tamaño de bloque para el escaneo completo en streaming (modo full_scan)
+    CHUNK_SIZE = 1024 * 1024
+
+    # Líneas de comentario con metadatos conocidos (Cura y Prusa/derivados).
+    # Se busca "\n;" como prefijo literal para que el motor de re avance rápido
+    # por el bloque; el grupo 1 es la clave que identifica el metadato.
+    _METADATA_LINE_RE = re.compile(
+        rb'\n;(TIME:|Filament used:|Filament weight:| estimated printing time| filament used \[\w+\]| filament cost)[^\n]*'
+    )
+
+    # Ventana desde el inicio donde Cura escribe su cabecera (;TIME:, ;Filament used:...)
+    MMAP_HEADER_WINDOW = 64 * 1024
+    # Ventana alrededor del tiempo estimado de Prusa donde están el resto de datos del pie
+    MMAP_FOOTER_WINDOW = 64 * 1024
+
+    _CURA_HEADER_KEYS = (b';Filament used:', b';Filament weight:')
+    _PRUSA_FOOTER_KEYS = (b'; filament used [g]', b'; filament used [mm]', b'; filament cost')
+
+    # Patrón combinado: clasifica cada comentario de metadatos en una sola pasada.
+    # El nombre del grupo que casa (match.lastgroup) indica el campo. Empieza por el
+    # literal ';' para que el motor de re salte rápido entre comentarios.
+    # Cura:  ;TIME:6666 / ;Filament used: 1.23m / ;Filament weight: 3.45g
+    # Prusa: ; estimated printing time = 1h 23m 45s / ; filament used [g] = 12.34 / ; filament used [mm] = 1234.56
+    # Con varios extrusores (MMU, AMS de Bambu) los campos de filamento traen un valor por herramienta
+    # separado por comas: ; filament used [g] = 12.3, 4.5 / ;Filament used: 1.2m, 0.4m
+    _FIELDS_RE = re.compile(
+        r';(?:TIME:(?P<cura_time>\d+)'
+        r'|Filament used: (?P<cura_length>[\d.]+m(?:, ?[\d.]+m)*)'
+        r'|Filament weight: (?P<cura_weight>[\d.]+g?(?:, ?[\d.]+g?)*)'
+        r'| estimated printing time(?: \(normal mode\))? = (?P<prusa_time>[^\n]*)'
+        r'| filament used \[g\] = (?P<prusa_weight>[\d.]+(?:, ?[\d.]+)*)'
+        r'| filament used \[mm\] = (?P<prusa_length>[\d.]+(?:, ?[\d.]+)*)'
+        r'| filament cost = (?P<prusa_cost>[\d.]+(?:, ?[\d.]+)*))'
+    )
+    _NUMBER_RE = re.compile(r'[\d.]+')
+    # Campos de cada formato: al tenerlos todos se deja de buscar
+    _CURA_FIELDS = frozenset(('cura_time', 'cura_length', 'cura_weight'))
+    _PRUSA_FIELDS = frozenset(('prusa_time', 'prusa_weight', 'prusa_length', 'prusa_cost'))
+    # Fin del bloque de comentarios inicial: primera línea que no es un comentario
+    _HEADER_END_RE = re.compile(r'\n[^;\n]')
+
+    # Contenedores: G-code comprimido con gzip, G-code binario de Prusa y proyectos 3MF laminados
+    GZIP_EXTENSIONS = ('.gcode.gz', '.gco.gz')
+    BGCODE_EXTENSIONS = ('.bgcode',)
+    THREEMF_EXTENSIONS = ('.3mf',)
+    _PLATE_GCODE_RE = re.compile(r'^Metadata/plate_(\d+)\.gcode$')
+
+    # Formato .bgcode: cabecera de archivo "GCDE" + versión + tipo de checksum, y bloques con
+    # cabecera (tipo, compresión, tamaño sin comprimir[, tamaño comprimido])
+    _BGCODE_MAGIC = b'GCDE'
+    _BGCODE_FILE_HEADER = struct.Struct('<4sIH')
+    _BGCODE_BLOCK_HEADER = struct.Struct('<HHI')
+    _BGCODE_GCODE_BLOCK = 1
+    _BGCODE_PRINTER_METADATA = 3
+    _BGCODE_PRINT_METADATA = 4
+    _BGCODE_THUMBNAIL = 5
+    _BGCODE_CRC32 = 1
+
+    _TIME_PART_RE = re.compile(r'(\d+)\s*([dhms])')
+    _TIME_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache (GcodeCache): Caché persistente opcional de resultados. Si se indica,
+                                parse_file devuelve el resultado guardado mientras el archivo no cambie.
+        """
+        self.cache = cache
+
+    def parse_file(self, file_path, full_scan=False, use_mmap=False, analyze_motion=False, layer_stats=False,
+                   use_cache=True):
         """
         Analiza un archivo G-code y devuelve un diccionario con los metadatos encontrados.
         
         Args:
             file_path (str): Ruta al archivo G-code.
+            full_scan (bool): Si es True recorre el archivo completo en bloques binarios
+                              (útil cuando los metadatos están a mitad de archivo, p.ej. OrcaSlicer/Bambu
+                              con varias placas). Si es False solo lee la cabecera y el final.
+            use_mmap (bool): Si es True mapea el archivo en memoria y busca directamente las claves
+                             (cabecera de Cura hacia delante, pie de Prusa hacia atrás desde el final),
+                             deteniéndose en cuanto encuentra los campos. Pensado para archivos enormes.
+            analyze_motion (bool): Si no hay metadatos del slicer, estima tiempo y filamento
+                                   interpretando los movimientos con GcodeAnalyzer. Recorre el
+                                   archivo completo: pensado para llamadas en segundo plano.
+            layer_stats (bool): Si es True añade 'layer_stats' con el desglose por capa y por tipo
+                                de elemento (ver GcodeAnalyzer.layer_stats). Implica full_scan: los
+                                movimientos se interpretan en la misma pasada que busca los metadatos.
+            use_cache (bool): Si es False no se consulta ni se actualiza la caché (ver
+                              cached_result y store_result para hacerlo en otro hilo).
             
         Returns:
             dict: Diccionario con claves 'print_time_seconds', 'filament_weight_g', 'filament_length_m', 'slicer_name'.
+                  Los totales de filamento suman todas las herramientas; el desglose por herramienta
+                  (extrusor o ranura del AMS) va en 'tool_weights_g', 'tool_lengths_m' y, si el slicer
+                  lo indica, 'tool_costs'.
                   Devuelve None si no se pudo analizar o no se encontraron datos relevantes.
         """
         if not os.path.exists(file_path):
             return None
             
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Leemos solo las primeras y últimas líneas para eficiencia, 
-                # ya que los metadatos suelen estar ahí.
-                # Pero algunos slicers ponen info al final.
-                # Para estar seguros leemos todo, pero los archivos pueden ser grandes.
-                # Estrategia: Leer primeras 500 líneas y últimas 500 líneas.
-                
-                content_head = ""
-                for _ in range(500):
-                    line = f.readline()
-                    if not line: break
-                    content_head += line
-                
-                # Ir al final para leer el footer
-                f.seek(0, 2) # End of file
-                file_size = f.tell()
-                
-                # Si el archivo es pequeño, ya lo leímos casi todo, pero si es grande leemos el final
-                content_tail = ""
-                if file_size > 10000: # Arbitrario
-                    seek_pos = max(0, file_size - 10000) # Leer últimos 10KB
-                    f.seek(seek_pos)
-                    content_tail = f.read()
-                
-                full_content_sample = content_head + "\n" + content_tail
-                
-                # Intentar detectar slicer y extraer datos
-                data = self._parse_cura(full_content_sample)
-                if not data:
-                    data = self._parse_prusa(full_content_sample)
-                
-                # Si tenemos longitud pero no peso, estimar peso (PLA 1.75mm por defecto)
-                if data and 'filament_length_m' in data and 'filament_weight_g' not in data:
-                    data['filament_weight_g'] = self._estimate_weight_from_length(data['filament_length_m'])
-                
-                return data
+            parse_mode = self._parse_mode(full_scan, use_mmap, layer_stats, analyze_motion)
+            if self.cache and use_cache:
+                cached = self.cache.get(file_path, parse_mode)
+                if cached is not None:
+                    return cached
+
+            container = self._container_type(file_path)
+            analyzer = None
+            if container == 'bgcode':
+                # Los metadatos van en bloques propios antes del G-code, que no hace falta leer
+                full_content_sample = self._read_bgcode_metadata(file_path)
+            elif layer_stats:
+                analyzer = GcodeAnalyzer(track_layers=True)
+                full_content_sample = self._scan_stream(file_path, analyzer)
+            elif container:
+                # Un flujo comprimido no permite saltar al final: se recorre una vez descomprimiendo
+                full_content_sample = self._scan_stream(file_path)
+            elif use_mmap:
+                full_content_sample = self._scan_mmap(file_path)
+            elif full_scan:
+                full_content_sample = self._scan_stream(file_path)
+            else:
+                full_content_sample = self._read_head_tail(file_path)
+
+            # Intentar detectar slicer y extraer datos
+            data = self._parse_metadata(full_content_sample)
+            
+            # Sin comentarios del slicer: interpretar los movimientos
+            if not data and analyzer:
+                data = analyzer.result()
+            elif not data and analyze_motion and container != 'bgcode':
+                with self._open_stream(file_path) as stream:
+                    data = GcodeAnalyzer().analyze_stream(stream)
+            
+            if data and analyzer:
+                data['layer_stats'] = analyzer.layer_stats()
+            
+            # Si tenemos longitud pero no peso, estimar peso (PLA 1.75mm por defecto)
+            if data and 'filament_length_m' in data and 'filament_weight_g' not in data:
+                data['filament_weight_g'] = self._estimate_weight_from_length(data['filament_length_m'])
+                if 'tool_lengths_m' in data:
+                    data['tool_weights_g'] = [self._estimate_weight_from_length(l) for l in data['tool_lengths_m']]
+            
+            if self.cache and use_cache and data:
+                self.cache.put(file_path, parse_mode, data)
+            return data
                 
         except Exception as e:
             print(f"Error parsing G-code: {e}")
             return None
 
+    def parse_many(self, file_paths, workers=None, **options):
+        """
+        Analiza varios archivos G-code repartiéndolos entre procesos.
+        Es un generador: devuelve tuplas (ruta, datos) a medida que cada archivo termina,
+        no en el orden de entrada. 'datos' es None si el archivo no se pudo analizar.
+        
+        Args:
+            file_paths (list): Rutas a los archivos G-code.
+            workers (int): Número de procesos. Por defecto, uno por núcleo.
+            **options: Opciones de parse_file (full_scan, use_mmap, analyze_motion, layer_stats).
+        """
+        file_paths = list(file_paths)
+        
+        # Los aciertos de caché se devuelven directamente; solo se reparten los fallos
+        if self.cache:
+            parse_mode = self._parse_mode(
+                options.get('full_scan', False), options.get('use_mmap', False), options.get('layer_stats', False),
+                options.get('analyze_motion', False)
+            )
+            pending = []
+            for file_path in file_paths:
+                cached = self.cache.get(file_path, parse_mode) if os.path.exists(file_path) else None
+                if cached is not None:
+                    yield file_path, cached
+                else:
+                    pending.append(file_path)
+            file_paths = pending
+        
+        if not file_paths:
+            return
+        
+        # Con un solo archivo o un solo proceso no compensa arrancar el pool
+        if workers == 1 or len(file_paths) == 1:
+            for file_path in file_paths:
+                yield file_path, self.parse_file(file_path, **options)
+            return
+        
+        # spawn: se llama desde hilos de una aplicación con conexiones y estado de Qt abiertos,
+        # y un fork ahí puede dejar bloqueados a los procesos hijos
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(_parse_worker, path, options) for path in file_paths]
+            for future in as_completed(futures):
+                file_path, data = future.result()
+                if self.cache and data:
+                    self.cache.put(file_path, parse_mode, data)
+                yield file_path, data
+
+    def cached_result(self, file_path, full_scan=False, use_mmap=False, analyze_motion=False,
+                      layer_stats=False):
+        """
+        Resultado guardado en la caché para parse_file con esas opciones, o None (sin caché,
+        sin entrada válida o si el archivo no existe). No lee el G-code.
+        """
+        if not self.cache or not os.path.exists(file_path):
+            return None
+        return self.cache.get(file_path, self._parse_mode(full_scan, use_mmap, layer_stats, analyze_motion))
+
+    def store_result(self, file_path, data, full_scan=False, use_mmap=False, analyze_motion=False,
+                     layer_stats=False):
+        """Guarda en la caché un resultado de parse_file(..., use_cache=False)."""
+        if self.cache and data and os.path.exists(file_path):
+            self.cache.put(file_path, self._parse_mode(full_scan, use_mmap, layer_stats, analyze_motion), data)
+
+    def _parse_mode(self, full_scan, use_mmap, layer_stats=False, analyze_motion=False):
+        """Nombre del modo de análisis, usado como parte de la clave de caché."""
+        if layer_stats:
+            # Con el desglose por capas los movimientos se interpretan siempre
+            return 'layers'
+        if use_mmap:
+            mode = 'mmap'
+        else:
+            mode = 'full_scan' if full_scan else 'head_tail'
+        return mode + '+motion' if analyze_motion else mode
+
+    def _read_head_tail(self, file_path):
+        """
+        Lee las primeras 500 líneas y los últimos 10KB del archivo,
+        que es donde los slicers suelen dejar los metadatos.
+        """
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            head_lines = []
+            for _ in range(500):
+                line = f.readline()
+                if not line: break
+                head_lines.append(line)
+            
+            # Ir al final para leer el footer
+            f.seek(0, 2) # End of file
+            file_size = f.tell()
+            
+            # Si el archivo es pequeño, ya lo leímos casi todo, pero si es grande leemos el final
+            content_tail = ""
+            if file_size > 10000: # Arbitrario
+                seek_pos = max(0, file_size - 10000) # Leer últimos 10KB
+                f.seek(seek_pos)
+                content_tail = f.read()
+        
+        return "".join(head_lines) + "\n" + content_tail
+
+    def _scan_stream(self, file_path, analyzer=None):
+        """
+        Recorre el archivo completo en bloques binarios de CHUNK_SIZE y devuelve
+        solo las líneas de metadatos encontradas (la primera aparición de cada clave).
+        La memoria usada está acotada a un buffer de bloque reutilizado más la línea
+        incompleta que queda a caballo entre dos bloques.
+        Si se indica un GcodeAnalyzer, se le pasan las líneas completas de cada bloque.
+        """
+        found = {}
+        pattern = self._METADATA_LINE_RE
+        buffer = bytearray(self.CHUNK_SIZE)
+        # La línea pendiente empieza con "\n" para que la primera línea del archivo también case
+        carry = b'\n'
+        with self._open_stream(file_path) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                first = buffer.find(b'\n', 0, n)
+                if first < 0:
+                    # Bloque sin saltos de línea: se acumula salvo que la línea sea más larga que
+                    # un bloque, en cuyo caso no puede ser un metadato y se descarta. Conservamos un
+                    # byte distinto de "\n" para no tomar su continuación como inicio de línea.
+                    carry = carry + buffer[:n] if len(carry) < self.CHUNK_SIZE else b'\x00'
+                    continue
+                last = buffer.rfind(b'\n', 0, n)
+                
+                # Línea partida entre el bloque anterior y el actual
+                for match in pattern.finditer(carry + buffer[:first]):
+                    found.setdefault(match.group(1), match.group(0))
+                # Resto del bloque, sin copiarlo
+                for match in pattern.finditer(buffer, first, last):
+                    found.setdefault(match.group(1), match.group(0))
+                if analyzer:
+                    analyzer.feed(bytes(carry + buffer[:last + 1]))
+                carry = bytes(buffer[last:n])
+            
+            # Última línea sin salto final
+            for match in pattern.finditer(carry):
+                found.setdefault(match.group(1), match.group(0))
+            if analyzer and len(carry) > 1:
+                analyzer.feed(carry + b'\n')
+        
+        return b"".join(found.values()).decode('utf-8', errors='ignore')
+
+    def _container_type(self, file_path):
+        """'gzip', 'bgcode', '3mf' o None si es un G-code de texto sin comprimir."""
+        name = file_path.lower()
+        if name.endswith(self.GZIP_EXTENSIONS):
+            return 'gzip'
+        if name.endswith(self.BGCODE_EXTENSIONS):
+            return 'bgcode'
+        if name.endswith(self.THREEMF_EXTENSIONS):
+            return '3mf'
+        return None
+
+    @contextmanager
+    def _open_stream(self, file_path):
+        """
+        Abre el G-code de texto como flujo binario, descomprimiendo al vuelo si hace falta.
+        Del 3MF se lee directamente la entrada Metadata/plate_N.gcode (la de menor N) del zip,
+        sin extraerla a disco.
+        """
+        container = self._container_type(file_path)
+        if container == 'gzip':
+            with gzip.open(file_path, 'rb') as f:
+                yield f
+        elif container == '3mf':
+            with zipfile.ZipFile(file_path) as archive:
+                plates = sorted(
+                    (int(match.group(1)), name) for name in archive.namelist()
+                    for match in [self._PLATE_GCODE_RE.match(name)] if match
+                )
+                if not plates:
+                    raise ValueError("El 3MF no contiene G-code laminado (Metadata/plate_*.gcode)")
+                with archive.open(plates[0][1]) as f:
+                    yield f
+        elif container == 'bgcode':
+            raise ValueError("El G-code binario solo se lee a través de sus bloques de metadatos")
+        else:
+            with open(file_path, 'rb', buffering=0) as f:
+                yield f
+
+    def _read_bgcode_metadata(self, file_path):
+        """
+        Lee los bloques de metadatos de impresión e impresora de un G-code binario de Prusa (.bgcode)
+        y los devuelve como comentarios '; clave = valor', igual que en el G-code de texto.
+        Solo se leen las cabeceras de los bloques; los bloques de G-code y miniaturas se saltan con seek
+        y la lectura termina en el primer bloque de G-code, ya que los metadatos van antes.
+        """
+        lines = []
+        with open(file_path, 'rb') as f:
+            magic, _version, checksum_type = self._BGCODE_FILE_HEADER.unpack(
+                f.read(self._BGCODE_FILE_HEADER.size)
+            )
+            if magic != self._BGCODE_MAGIC:
+                raise ValueError("No es un archivo .bgcode válido")
+            checksum_size = 4 if checksum_type == self._BGCODE_CRC32 else 0
+            
+            while True:
+                header = f.read(self._BGCODE_BLOCK_HEADER.size)
+                if len(header) < self._BGCODE_BLOCK_HEADER.size:
+                    break
+                block_type, compression, size = self._BGCODE_BLOCK_HEADER.unpack(header)
+                if block_type == self._BGCODE_GCODE_BLOCK:
+                    break
+                if compression:
+                    size = struct.unpack('<I', f.read(4))[0]
+                # Parámetros: codificación (2 bytes), o formato y dimensiones en las miniaturas
+                f.seek(6 if block_type == self._BGCODE_THUMBNAIL else 2, os.SEEK_CUR)
+                
+                if block_type not in (self._BGCODE_PRINT_METADATA, self._BGCODE_PRINTER_METADATA):
+                    f.seek(size + checksum_size, os.SEEK_CUR)
+                    continue
+                data = f.read(size)
+                f.seek(checksum_size, os.SEEK_CUR)
+                if compression == 1:
+                    data = zlib.decompress(data)
+                elif compression:
+                    # Heatshrink: no se usa en los metadatos de PrusaSlicer
+                    continue
+                for line in data.decode('utf-8', errors='ignore').splitlines():
+                    key, sep, value = line.partition('=')
+                    if sep:
+                        lines.append(f"; {key.strip()} = {value.strip()}")
+        
+        return "\n".join(lines)
+
+    def _scan_mmap(self, file_path):
+        """
+        Localiza los metadatos con el archivo mapeado en memoria, sin decodificarlo.
+        Primero busca la cabecera de Cura hacia delante (acotada a MMAP_HEADER_WINDOW) y, si no está,
+        el pie de Prusa/Orca buscando hacia atrás desde el final del archivo.
+        Devuelve solo las líneas encontradas como texto.
+        """
+        if os.path.getsize(file_path) == 0:
+            return ""
+
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = []
+            
+            # Cura: ;TIME: en las primeras líneas
+            header_end = min(len(mm), self.MMAP_HEADER_WINDOW)
+            pos = mm.find(b';TIME:', 0, header_end)
+            if pos >= 0:
+                lines.append(self._mmap_line(mm, pos))
+                for key in self._CURA_HEADER_KEYS:
+                    key_pos = mm.find(key, 0, header_end)
+                    if key_pos >= 0:
+                        lines.append(self._mmap_line(mm, key_pos))
+                return "\n".join(lines)
+            
+            # Prusa/derivados: búsqueda inversa desde el final, se detiene en la primera coincidencia
+            pos = mm.rfind(b'; estimated printing time')
+            if pos >= 0:
+                lines.append(self._mmap_line(mm, pos))
+                window_start = max(0, pos - self.MMAP_FOOTER_WINDOW)
+                for key in self._PRUSA_FOOTER_KEYS:
+                    key_pos = mm.rfind(key, window_start)
+                    if key_pos >= 0:
+                        lines.append(self._mmap_line(mm, key_pos))
+            
+            return "\n".join(lines)
+
+    def _mmap_line(self, mm, pos):
+        """Devuelve como texto la línea del mmap que empieza en pos."""
+        end = mm.find(b'\n', pos)
+        if end < 0:
+            end = len(mm)
+        return mm[pos:end].decode('utf-8', errors='ignore')
+
     def _estimate_weight_from_length(self, length_m, diameter_mm=1.75, density_g_cm3=1.24):
         """
         Estima el peso en gramos basado en la longitud en metros.
@@ -74,93 +456,63 @@ class SlicerParser:
         volume_cm3 = math.pi * (radius_cm ** 2) * length_cm
         return volume_cm3 * density_g_cm3
 
-    def _parse_cura(self, content):
-        """Analiza formato de Cura."""
-        # Cura suele poner:
-        # ;TIME:6666
-        # ;Filament used: 1.23m
-        # ;Filament weight: 3.45g (A veces no está explícito en versiones viejas, pero sí la longitud)
-        
-        data = {}
+    def _parse_metadata(self, content):
+        """
+        Extrae los metadatos de Cura y de PrusaSlicer/derivados en una sola pasada.
+        Cada línea de comentario se clasifica una vez con _FIELDS_RE; se conserva la primera
+        aparición de cada campo. Si hay tiempo de Cura se usan los campos de Cura,
+        si no los de Prusa.
         
-        # Tiempo (segundos)
-        time_match = re.search(r';TIME:(\d+)', content)
-        if time_match:
-            data['print_time_seconds'] = int(time_match.group(1))
-            data['slicer_name'] = 'Cura'
+        La búsqueda termina en cuanto están todos los campos del formato. Cura los deja en la
+        cabecera de comentarios del principio: tras su primer campo solo se mira hasta el final
+        de esa cabecera (sin esto se recorrería toda la muestra buscando campos que no están).
+        """
+        fields = {}
+        for match in self._FIELDS_RE.finditer(content):
+            fields.setdefault(match.lastgroup, match.group(match.lastgroup))
+            if match.lastgroup.startswith('cura_'):
+                header_end = self._HEADER_END_RE.search(content, match.end())
+                end = header_end.start() if header_end else len(content)
+                for match in self._FIELDS_RE.finditer(content, match.end(), end):
+                    fields.setdefault(match.lastgroup, match.group(match.lastgroup))
+                    if self._CURA_FIELDS.issubset(fields):
+                        break
+                break
+            if self._PRUSA_FIELDS.issubset(fields):
+                break
         
-        # Longitud filamento (metros)
-        len_match = re.search(r';Filament used: ([\d.]+)m', content)
-        if len_match:
-            data['filament_length_m'] = float(len_match.group(1))
+        data = {}
+        if 'cura_time' in fields:
+            data['print_time_seconds'] = int(fields['cura_time'])
             data['slicer_name'] = 'Cura'
-
-        # Peso filamento (gramos) - A veces Cura pone ";Filament weight = 12.34g" o similar en plugins
-        # Pero estándar suele ser longitud. Podemos estimar peso si tenemos densidad (PLA ~1.24g/cm3) y diámetro (1.75mm).
-        # Por ahora extraemos si existe explícito.
-        weight_match = re.search(r';Filament weight: ([\d.]+)g', content)
-        if weight_match:
-            data['filament_weight_g'] = float(weight_match.group(1))
-        
-        if 'print_time_seconds' in data:
+            if 'cura_length' in fields:
+                self._set_tool_values(data, 'filament_length_m', 'tool_lengths_m', fields['cura_length'])
+            if 'cura_weight' in fields:
+                self._set_tool_values(data, 'filament_weight_g', 'tool_weights_g', fields['cura_weight'])
             return data
-        return None
-
-    def _parse_prusa(self, content):
-        """Analiza formato de PrusaSlicer / SuperSlicer / OrcaSlicer / BambuStudio."""
-        # PrusaSlicer pone al final:
-        # ; estimated printing time = 1h 23m 45s
-        # ; filament used [mm] = 1234.56
-        # ; filament used [cm3] = 1.23
-        # ; filament used [g] = 12.34
-        # ; total filament cost = 1.23
         
-        data = {}
-        
-        # Tiempo
-        # Formato: 1h 23m 45s o 23m 45s o 45s
-        time_match = re.search(r'; estimated printing time = (.*)', content)
-        if time_match:
-            time_str = time_match.group(1).strip()
-            data['print_time_seconds'] = self._parse_time_str(time_str)
+        if 'prusa_time' in fields:
+            data['print_time_seconds'] = self._parse_time_str(fields['prusa_time'])
             data['slicer_name'] = 'PrusaSlicer/Derivados'
-            
-        # Peso
-        weight_match = re.search(r'; filament used \[g\] = ([\d.]+)', content)
-        if weight_match:
-            data['filament_weight_g'] = float(weight_match.group(1))
-            
-        # Longitud (mm) -> convertir a m
-        len_match = re.search(r'; filament used \[mm\] = ([\d.]+)', content)
-        if len_match:
-            data['filament_length_m'] = float(len_match.group(1)) / 1000.0
-            
-        if 'print_time_seconds' in data:
+            if 'prusa_weight' in fields:
+                self._set_tool_values(data, 'filament_weight_g', 'tool_weights_g', fields['prusa_weight'])
+            if 'prusa_length' in fields:
+                self._set_tool_values(data, 'filament_length_m', 'tool_lengths_m', fields['prusa_length'], 1000.0)
+            if 'prusa_cost' in fields:
+                self._set_tool_values(data, 'filament_cost', 'tool_costs', fields['prusa_cost'])
             return data
+        
         return None
 
+    def _set_tool_values(self, data, total_key, tool_key, text, divisor=1.0):
+        """Guarda la lista de valores por herramienta de un campo y su suma como total."""
+        values = [float(value) / divisor for value in self._NUMBER_RE.findall(text)]
+        data[tool_key] = values
+        data[total_key] = sum(values)
+
     def _parse_time_str(self, time_str):
-        """Convierte string de tiempo tipo '1h 23m 45s' a segundos."""
+        """Convierte string de tiempo tipo '1d 1h 23m 45s' a segundos."""
         total_seconds = 0
-        
-        # Días
-        d_match = re.search(r'(\d+)d', time_str)
-        if d_match:
-            total_seconds += int(d_match.group(1)) * 86400
-            
-        # Horas
-        h_match = re.search(r'(\d+)h', time_str)
-        if h_match:
-            total_seconds += int(h_match.group(1)) * 3600
-            
-        # Minutos
-        m_match = re.search(r'(\d+)m', time_str)
-        if m_match:
-            total_seconds += int(m_match.group(1)) * 60
-            
-        # Segundos
-        s_match = re.search(r'(\d+)s', time_str)
-        if s_match:
-            total_seconds += int(s_match.group(1))
-            
+        for value, unit in self._TIME_PART_RE.findall(time_str):
+            total_seconds += int(value) * self._TIME_UNITS[unit]
         return total_seconds
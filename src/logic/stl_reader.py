@@ -0,0 +1,213 @@
+"""
+Lector de STL nativo con NumPy, sin pasar por trimesh.
+
+Un STL binario es una cabecera de 80 bytes, el número de triángulos (uint32) y un registro
+de 50 bytes por triángulo (normal, tres vértices en float32 y 2 bytes de atributos). read_stl
+mapea el archivo en memoria y ve esos registros como un array estructurado, sin copiarlos ni
+convertirlos: abrir un STL de millones de triángulos es casi instantáneo y solo se leen del
+disco las páginas que se usan. Los STL ASCII se leen con una expresión regular y una única
+conversión de texto a números.
+
+Además incluye los cálculos que necesita la biblioteca sobre el array de triángulos
+(N, 3, 3): metadatos geométricos (mesh_metadata) y simplificación para previsualizar (decimate).
+"""
+import os
+import re
+import struct
+
+import numpy as np
+
+HEADER_SIZE = 80
+COUNT_SIZE = 4
+
+# Registro de un triángulo en un STL binario (50 bytes, little-endian, sin alineación)
+TRIANGLE_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])
+
+_VERTEX_RE = re.compile(rb'vertex\s+(\S+\s+\S+\s+\S+)')
+
+# Triángulos por bloque en los cálculos en float64 (acota la memoria temporal)
+CHUNK_TRIANGLES = 1 << 20
+
+
+def is_binary_stl(file_path):
+    """
+    True si el archivo es un STL binario. Se decide por el tamaño (cabecera + 50 bytes por
+    triángulo) y no por la palabra 'solid', que muchos programas ponen también en la
+    cabecera de los binarios.
+    """
+    size = os.path.getsize(file_path)
+    if size < HEADER_SIZE + COUNT_SIZE:
+        return False
+    with open(file_path, 'rb') as f:
+        f.seek(HEADER_SIZE)
+        (count,) = struct.unpack('<I', f.read(COUNT_SIZE))
+    return size == HEADER_SIZE + COUNT_SIZE + count * TRIANGLE_DTYPE.itemsize
+
+
+def read_binary_records(file_path):
+    """
+    Registros de un STL binario como array estructurado TRIANGLE_DTYPE de solo lectura,
+    mapeado sobre el archivo (sin copia). El archivo queda abierto mientras exista el array.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(HEADER_SIZE)
+        (count,) = struct.unpack('<I', f.read(COUNT_SIZE))
+    if count == 0:
+        return np.zeros(0, dtype=TRIANGLE_DTYPE)
+    return np.memmap(file_path, dtype=TRIANGLE_DTYPE, mode='r',
+                     offset=HEADER_SIZE + COUNT_SIZE, shape=(count,))
+
+
+def read_ascii_triangles(file_path):
+    """Triángulos de un STL ASCII como array float32 (N, 3, 3)."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    coords = _VERTEX_RE.findall(data)
+    try:
+        values = np.array(b' '.join(coords).split(), dtype=np.float32)
+    except ValueError:
+        raise ValueError("STL ASCII con vértices mal formados") from None
+    if len(values) != len(coords) * 3 or len(coords) % 3:
+        raise ValueError("STL ASCII con vértices mal formados")
+    return values.reshape(-1, 3, 3)
+
+
+def read_stl(file_path):
+    """
+    Lee un STL (binario o ASCII).
+
+    Returns:
+        np.ndarray: Triángulos (N, 3, 3) float32: triángulo, vértice, coordenada. En los
+        binarios es una vista sobre el archivo mapeado, de solo lectura.
+    """
+    if is_binary_stl(file_path):
+        return read_binary_records(file_path)['vertices']
+    return read_ascii_triangles(file_path)
+
+
+def load_triangles(file_path):
+    """
+    Triángulos (N, 3, 3) de una malla. Los STL se leen con read_stl; el resto de formatos
+    con trimesh.
+    """
+    if file_path.lower().endswith('.stl'):
+        return read_stl(file_path)
+    import trimesh
+    mesh = trimesh.load(file_path, force='mesh')
+    return mesh.vertices[mesh.faces]
+
+
+def _chunks(triangles):
+    for start in range(0, len(triangles), CHUNK_TRIANGLES):
+        yield np.asarray(triangles[start:start + CHUNK_TRIANGLES], dtype=np.float64)
+
+
+def is_watertight(triangles):
+    """
+    True si la malla es cerrada: cada arista la comparten exactamente dos triángulos
+    (vértices iguales si coinciden sus coordenadas).
+    """
+    if len(triangles) == 0:
+        return False
+    faces = _vertex_ids(triangles).reshape(-1, 3)
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    edges.sort(axis=1)
+    vertex_count = int(faces.max()) + 1
+    keys = np.sort(edges[:, 0] * vertex_count + edges[:, 1])
+    # Ordenadas, cada arista debe aparecer exactamente en dos posiciones consecutivas
+    return bool(len(keys) % 2 == 0 and np.array_equal(keys[0::2], keys[1::2])
+                and np.all(keys[1:-1:2] != keys[2::2]))
+
+
+def _vertex_ids(triangles):
+    """Identificador de cada vértice de la malla (iguales si coinciden las coordenadas)."""
+    vertices = np.ascontiguousarray(triangles, dtype=np.float32).reshape(-1, 3)
+    # -0.0 y 0.0 tienen bytes distintos pero son el mismo punto
+    bits = (vertices + np.float32(0.0)).view(np.uint32).astype(np.uint64)
+    xy = (bits[:, 0] << np.uint64(32)) | bits[:, 1]
+    z = bits[:, 2]
+    # Agrupar por un hash de 64 bits es mucho más rápido que por los 12 bytes; se comprueba
+    # que cada grupo tiene un único vértice y, si hubiera una colisión, se agrupa por bytes
+    with np.errstate(over='ignore'):
+        hashed = xy ^ (z * np.uint64(0x9E3779B97F4A7C15))
+    _, first, ids = np.unique(hashed, return_index=True, return_inverse=True)
+    if np.array_equal(xy[first][ids], xy) and np.array_equal(z[first][ids], z):
+        return ids.astype(np.int64)
+    keys = vertices.view(np.dtype((np.void, vertices.dtype.itemsize * 3))).ravel()
+    _, ids = np.unique(keys, return_inverse=True)
+    return ids.astype(np.int64)
+
+
+def mesh_metadata(triangles):
+    """
+    Datos geométricos de una malla de triángulos (N, 3, 3): número de triángulos, volumen
+    (con signo por el teorema de la divergencia, en valor absoluto), área, caja envolvente y
+    si es cerrada. Se calcula por bloques en float64.
+    """
+    volume = 0.0
+    area = 0.0
+    min_corner = np.full(3, np.inf)
+    max_corner = np.full(3, -np.inf)
+    for chunk in _chunks(triangles):
+        v0, v1, v2 = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        volume += float(np.einsum('ij,ij->', v0, np.cross(v1, v2))) / 6.0
+        area += float(np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1).sum()) / 2.0
+        points = chunk.reshape(-1, 3)
+        np.minimum(min_corner, points.min(axis=0), out=min_corner)
+        np.maximum(max_corner, points.max(axis=0), out=max_corner)
+    if not len(triangles):
+        min_corner = max_corner = np.zeros(3)
+
+    return {
+        'triangle_count': int(len(triangles)),
+        # En mallas abiertas el volumen es solo aproximado
+        'volume_mm3': abs(volume),
+        'surface_area_mm2': area,
+        'min_x': float(min_corner[0]), 'min_y': float(min_corner[1]), 'min_z': float(min_corner[2]),
+        'max_x': float(max_corner[0]), 'max_y': float(max_corner[1]), 'max_z': float(max_corner[2]),
+        'is_watertight': is_watertight(triangles),
+    }
+
+
+def decimate(triangles, max_triangles):
+    """
+    Simplifica una malla para previsualizarla agrupando los vértices en una rejilla
+    (vertex clustering): los vértices de cada celda se sustituyen por su media y se
+    descartan los triángulos que quedan degenerados o repetidos. La rejilla se hace más
+    gruesa hasta quedar como mucho en max_triangles.
+
+    Returns:
+        np.ndarray: Triángulos (M, 3, 3) float32, M <= max_triangles.
+    """
+    if len(triangles) <= max_triangles:
+        return np.asarray(triangles, dtype=np.float32)
+
+    points = np.asarray(triangles, dtype=np.float64).reshape(-1, 3)
+    min_corner = points.min(axis=0)
+    extent = float((points.max(axis=0) - min_corner).max()) or 1.0
+    # Con n celdas por lado la superficie tiene del orden de n² celdas ocupadas
+    cells = max(2, int(np.sqrt(max_triangles)))
+
+    while True:
+        grid = np.floor((points - min_corner) * (cells / extent)).astype(np.int64)
+        np.clip(grid, 0, cells - 1, out=grid)
+        _, cluster = np.unique((grid[:, 0] * cells + grid[:, 1]) * cells + grid[:, 2],
+                               return_inverse=True)
+        faces = cluster.reshape(-1, 3)
+        keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+        faces = faces[keep]
+        # Triángulos iguales salvo el orden de los vértices se quedan una vez
+        _, unique_index = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+        faces = faces[np.sort(unique_index)]
+        if len(faces) <= max_triangles or cells <= 2:
+            break
+        cells = max(2, int(cells / 1.5))
+
+    counts = np.bincount(cluster)
+    centers = np.stack([np.bincount(cluster, weights=points[:, axis]) for axis in range(3)], axis=1)
+    centers /= counts[:, None]
+    return centers[faces].astype(np.float32)[:max_triangles]
@@ -0,0 +1,143 @@
+"""
+Miniaturas de los modelos de la biblioteca, renderizadas por software.
+
+render_thumbnail lee la malla, la simplifica (stl_reader.decimate) y la dibuja con un
+rasterizador con z-buffer hecho con NumPy: vista isométrica ortográfica, sombreado plano y
+fondo transparente. No usa la GPU ni Qt, así que puede ejecutarse en procesos aparte
+(LibraryManager usa un ProcessPoolExecutor). El PNG se escribe con zlib, sin dependencias.
+
+Las miniaturas se guardan por hash del contenido de la malla, en subcarpetas con los dos
+primeros caracteres del hash: una malla repetida se renderiza una sola vez y una miniatura
+ya generada no se vuelve a calcular.
+"""
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from src.logic import stl_reader
+
+THUMBNAIL_SIZE = 128           # píxeles de lado
+MAX_TRIANGLES = 4000           # triángulos que se dibujan como mucho
+MARGIN = 0.08                  # margen alrededor del modelo (fracción del lado)
+BASE_COLOR = np.array([207, 207, 207], dtype=np.float64)  # gris del visor 3D
+AMBIENT = 0.35
+
+# Cámara: mirando desde delante, a la derecha y arriba (eje Z hacia arriba)
+_VIEW_DIR = np.array([1.0, -1.0, 0.8])
+_VIEW_DIR /= np.linalg.norm(_VIEW_DIR)
+_RIGHT = np.cross(-_VIEW_DIR, [0.0, 0.0, 1.0])
+_RIGHT /= np.linalg.norm(_RIGHT)
+_UP = np.cross(_RIGHT, -_VIEW_DIR)
+# Luz ligeramente desplazada de la cámara para marcar las aristas
+_LIGHT = _VIEW_DIR + 0.5 * _RIGHT + 0.3 * _UP
+_LIGHT /= np.linalg.norm(_LIGHT)
+
+
+def thumbnail_path(cache_dir, content_hash, size=THUMBNAIL_SIZE):
+    """Ruta de la miniatura de una malla en la caché."""
+    return os.path.join(cache_dir, content_hash[:2], f"{content_hash}_{size}.png")
+
+
+def render_triangles(triangles, size=THUMBNAIL_SIZE):
+    """
+    Dibuja una malla (N, 3, 3).
+
+    Returns:
+        np.ndarray: Imagen RGBA uint8 (size, size, 4); el fondo es transparente.
+    """
+    image = np.zeros((size, size, 4), dtype=np.uint8)
+    if len(triangles) == 0:
+        return image
+    triangles = np.asarray(triangles, dtype=np.float64)
+
+    # Proyección ortográfica: x, y en pantalla y profundidad (mayor = más cerca)
+    screen_x = triangles @ _RIGHT
+    screen_y = triangles @ _UP
+    depth = triangles @ _VIEW_DIR
+
+    # Escalar y centrar para que el modelo llene la imagen
+    min_x, max_x = screen_x.min(), screen_x.max()
+    min_y, max_y = screen_y.min(), screen_y.max()
+    extent = max(max_x - min_x, max_y - min_y) or 1.0
+    scale = size * (1 - 2 * MARGIN) / extent
+    px = (screen_x - (min_x + max_x) / 2) * scale + size / 2
+    py = size / 2 - (screen_y - (min_y + max_y) / 2) * scale
+
+    # Sombreado plano por cara (por las dos caras: las normales de los STL no son fiables)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    intensity = np.full(len(triangles), AMBIENT)
+    intensity[valid] += (1 - AMBIENT) * np.abs(normals[valid] @ _LIGHT) / lengths[valid]
+    colors = np.clip(BASE_COLOR * intensity[:, None], 0, 255).astype(np.uint8)
+
+    zbuffer = np.full((size, size), -np.inf)
+    # Cajas envolventes de cada triángulo en píxeles (centros en x + 0.5)
+    x0 = np.clip(np.floor(px.min(axis=1) - 0.5).astype(int), 0, size - 1)
+    x1 = np.clip(np.ceil(px.max(axis=1) - 0.5).astype(int), 0, size - 1)
+    y0 = np.clip(np.floor(py.min(axis=1) - 0.5).astype(int), 0, size - 1)
+    y1 = np.clip(np.ceil(py.max(axis=1) - 0.5).astype(int), 0, size - 1)
+    area = ((px[:, 1] - px[:, 0]) * (py[:, 2] - py[:, 0])
+            - (px[:, 2] - px[:, 0]) * (py[:, 1] - py[:, 0]))
+
+    for i in np.flatnonzero(np.abs(area) > 1e-12):
+        xs = np.arange(x0[i], x1[i] + 1) + 0.5
+        ys = np.arange(y0[i], y1[i] + 1)[:, None] + 0.5
+        ax, bx, cx = px[i]
+        ay, by, cy = py[i]
+        # Coordenadas baricéntricas de los centros de píxel
+        w0 = ((bx - xs) * (cy - ys) - (cx - xs) * (by - ys)) / area[i]
+        w1 = ((cx - xs) * (ay - ys) - (ax - xs) * (cy - ys)) / area[i]
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        if not inside.any():
+            continue
+        z = w0 * depth[i, 0] + w1 * depth[i, 1] + w2 * depth[i, 2]
+        region = zbuffer[y0[i]:y1[i] + 1, x0[i]:x1[i] + 1]
+        closer = inside & (z > region)
+        region[closer] = z[closer]
+        pixels = image[y0[i]:y1[i] + 1, x0[i]:x1[i] + 1]
+        pixels[closer, :3] = colors[i]
+        pixels[closer, 3] = 255
+    return image
+
+
+def write_png(file_path, image):
+    """Guarda una imagen RGBA uint8 (alto, ancho, 4) como PNG."""
+    height, width, _ = image.shape
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)  # Filtro 0 (ninguno) al principio de cada fila
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    with open(file_path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def render_thumbnail(file_path, content_hash, cache_dir, size=THUMBNAIL_SIZE):
+    """
+    Genera (si no existe ya) la miniatura de una malla en la caché.
+
+    Returns:
+        str: Ruta del PNG.
+    """
+    dest_path = thumbnail_path(cache_dir, content_hash, size)
+    if os.path.exists(dest_path):
+        return dest_path
+
+    triangles = stl_reader.decimate(stl_reader.load_triangles(file_path), MAX_TRIANGLES)
+    image = render_triangles(triangles, size)
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # Varios procesos pueden generar la misma miniatura: se escribe aparte y se renombra
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    write_png(tmp_path, image)
+    os.replace(tmp_path, dest_path)
+    return dest_path
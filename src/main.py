@@ -8,6 +8,10 @@ from PyQt5.QtWidgets import QApplication
 from src.ui.main_window import MainWindow
 from src.ui.login_widget import LoginWidget
 from src.logic.auth_manager import AuthManager
+from src.logic.library_manager import LibraryManager
+from src.database.db_manager import DBManager, ConnectionPool
+from src.database.db_worker import DBWorker
+from src.database.query_stats import profiler
 
 class App:
     """Clase principal que maneja el ciclo de vida de la aplicación."""
@@ -15,6 +19,15 @@ class App:
     def __init__(self):
         self.app = QApplication(sys.argv)
         self.app.setStyle("Fusion")  # Forzar estilo Fusion
+        # Registro de tiempos de las consultas desde el arranque (también se activa en Configuración)
+        if os.environ.get('GESTOR3D_QUERY_STATS') == '1':
+            profiler.enable()
+        # Crear o actualizar el esquema de la base de datos antes de usarla
+        if not DBManager().init_db():
+            sys.exit(1)
+        # Archivos de la biblioteca antigua al almacén por contenido, y metadatos y miniaturas
+        # de los modelos que aún no los tienen, en segundo plano
+        LibraryManager().start_background_tasks()
         self.auth_manager = AuthManager()
         self.login_widget = None
         self.main_window = None
@@ -47,7 +60,13 @@ class App:
     def run(self):
         """Inicia la aplicación."""
         self.show_login()
-        return self.app.exec_()
+        exit_code = self.app.exec_()
+        LibraryManager.shutdown_workers()
+        # Detener el hilo de base de datos (descarta las consultas de la interfaz pendientes)
+        DBWorker.shutdown_default()
+        # Cerrar las conexiones de todos los hilos (deja el WAL integrado en la base de datos)
+        ConnectionPool.close_all_pools()
+        return exit_code
 
 def main():
     app = App()
@@ -0,0 +1,131 @@
+"""
+Consultas a la base de datos desde la interfaz sin bloquear el hilo principal.
+
+run_in_db() encola la llamada en el DBWorker compartido y, cuando termina, entrega el
+resultado (o el error) en el hilo de Qt mediante una señal, de modo que los callbacks
+pueden tocar los widgets directamente. Los resultados se entregan en el mismo orden en
+que se pidieron.
+
+run_in_thread() hace lo mismo en un hilo propio, para trabajo largo que no es de base de
+datos (leer un G-code entero) y que en DBWorker retrasaría el resto de consultas.
+"""
+import threading
+from concurrent.futures import CancelledError, Future
+from functools import partial
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.database.db_manager import ConnectionPool
+from src.database.db_worker import DBWorker
+
+
+class _Dispatcher(QObject):
+    """Vive en el hilo principal y recibe los futures terminados del hilo de base de datos."""
+
+    finished = pyqtSignal(object, object, object, object)
+
+    def __init__(self):
+        super().__init__()
+        # La señal se emite desde el hilo de base de datos: Qt la encola y _deliver se
+        # ejecuta en el hilo de este objeto
+        self.finished.connect(self._deliver)
+
+    def _deliver(self, future, on_result, on_error, owner):
+        if owner is not None and sip.isdeleted(owner):
+            # El widget que pidió los datos ya no existe
+            return
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                print(f"Error en consulta a la base de datos: {e}")
+            return
+        if on_result is not None:
+            on_result(result)
+
+
+_dispatcher = None
+
+
+def run_in_db(func, *args, on_result=None, on_error=None, owner=None):
+    """
+    Ejecuta func(*args) en el hilo de base de datos.
+
+    Debe llamarse desde el hilo principal.
+
+    Args:
+        func: Función que hace las consultas (p. ej. manager.get_all_filaments).
+        on_result: Se llama en el hilo principal con el resultado.
+        on_error: Se llama en el hilo principal con la excepción; si no se indica se imprime.
+        owner: Widget que recibe los datos; si se destruye antes, no se llama a nada.
+
+    Returns:
+        Future: El future de la tarea.
+    """
+    future = DBWorker.default().submit(func, *args)
+    _deliver(future, on_result, on_error, owner)
+    return future
+
+
+def run_in_thread(func, *args, on_result=None, on_error=None, owner=None, name="ui-task"):
+    """
+    Como run_in_db, pero ejecuta func(*args) en un hilo nuevo en lugar de en el de base de
+    datos. Debe llamarse desde el hilo principal.
+
+    Returns:
+        Future: El future de la tarea.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            ConnectionPool.release_thread()
+
+    _deliver(future, on_result, on_error, owner)
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def parse_gcode(parser, file_path, on_result, on_error=None, owner=None, **options):
+    """
+    Analiza un G-code con parser.parse_file(file_path, **options) sin bloquear la interfaz.
+    La caché del parser (en la base de datos) se consulta y se actualiza en el hilo de base
+    de datos; la lectura del archivo, solo si no está en caché, va en un hilo propio.
+    on_result recibe el diccionario de parse_file (o None).
+    """
+    def on_cached(data):
+        if data is not None:
+            on_result(data)
+            return
+        run_in_thread(partial(parser.parse_file, file_path, use_cache=False, **options),
+                      on_result=on_parsed, on_error=on_error, owner=owner, name="gcode-parse")
+
+    def on_parsed(data):
+        if data:
+            run_in_db(partial(parser.store_result, file_path, data, **options))
+        on_result(data)
+
+    run_in_db(partial(parser.cached_result, file_path, **options),
+              on_result=on_cached, on_error=on_error, owner=owner)
+
+
+def _deliver(future, on_result, on_error, owner):
+    """Entrega el resultado del future en el hilo principal (ver _Dispatcher)."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = _Dispatcher()
+    dispatcher = _dispatcher
+    future.add_done_callback(
+        lambda f: dispatcher.finished.emit(f, on_result, on_error, owner)
+    )
@@ -6,13 +6,15 @@ from PyQt5.QtCore import Qt
 from src.logic.cost_calculator import CostCalculator
 from src.logic.report_generator import ReportGenerator
 from src.logic.slicer_parser import SlicerParser
+from src.logic.gcode_cache import GcodeCache
+from src.ui.async_db import parse_gcode
 
 class CalculatorWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.calculator = CostCalculator()
         self.report_generator = ReportGenerator()
-        self.slicer_parser = SlicerParser()
+        self.slicer_parser = SlicerParser(cache=GcodeCache())
         self.last_calculation = None
         self.init_ui()
 
@@ -238,14 +240,17 @@ class CalculatorWidget(QWidget):
     def import_gcode(self):
         """Abre diálogo para importar G-code y rellena los campos."""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Importar G-code", "", "G-code Files (*.gcode *.gco);;All Files (*)"
+            self, "Importar G-code", "", "G-code Files (*.gcode *.gco *.gcode.gz *.bgcode *.3mf);;All Files (*)"
         )
         
         if not file_path:
             return
-            
-        data = self.slicer_parser.parse_file(file_path)
         
+        # La caché se consulta en el hilo de base de datos y el archivo se lee en otro
+        parse_gcode(self.slicer_parser, file_path, on_result=self.show_gcode_data, owner=self)
+    
+    def show_gcode_data(self, data):
+        """Rellena los campos con los datos del G-code importado."""
         if not data:
             MessageBoxHelper.show_warning(self, "Error de Importación", 
                                         "No se pudieron encontrar metadatos válidos en el archivo G-code.\n"
@@ -1,12 +1,13 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QFrame, QGridLayout, QScrollArea, QPushButton, QSizePolicy)
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from src.logic.inventory_manager import InventoryManager
 from src.logic.library_manager import LibraryManager
 from src.ui.notifications_panel import NotificationsPanel
+from src.ui.async_db import run_in_db
 
 
 class HomeWidget(QWidget):
@@ -50,6 +51,9 @@ class HomeWidget(QWidget):
         main_layout.addWidget(self.notifications_panel)
         
         self.setLayout(main_layout)
+        
+        # Los datos se leen en el hilo de base de datos y se pintan al llegar
+        self.refresh_dashboard()
 
 
 
@@ -74,19 +78,14 @@ class HomeWidget(QWidget):
         self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.ax = self.figure.add_subplot(111)
         
-        self.update_materials_chart()
-        
         layout.addWidget(self.canvas)
         
         return panel
 
-    def update_materials_chart(self):
-        """Actualiza el gráfico de materiales."""
+    def update_materials_chart(self, filaments):
+        """Actualiza el gráfico de materiales con los filamentos del inventario."""
         self.ax.clear()
         
-        # Obtener datos de inventario
-        filaments = self.inventory_manager.get_all_filaments()
-        
         if filaments and len(filaments) > 0:
             # Agrupar por tipo de material
             material_data = {}
@@ -150,27 +149,34 @@ class HomeWidget(QWidget):
         title.setStyleSheet("font-size: 16px; font-weight: 600; color: #e0e0e0; border: none;")
         layout.addWidget(title)
         
-        # Obtener últimos modelos
-        models = self.library_manager.get_all_models()
+        # Los últimos modelos se añaden en show_latest_models
+        self.models_layout = QVBoxLayout()
+        layout.addLayout(self.models_layout)
         
+        layout.addStretch()
+        
+        return panel
+
+    def show_latest_models(self, models):
+        """Muestra los últimos modelos en el panel."""
+        while self.models_layout.count():
+            widget = self.models_layout.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
 
         if models and len(models) > 0:
             # Mostrar hasta 5 últimos
             for model in models[:5]:
-                model_item = self.create_model_item(model['name'])
-                layout.addWidget(model_item)
+                model_item = self.create_model_item(model['name'], model['thumbnail_path'])
+                self.models_layout.addWidget(model_item)
         else:
             no_models = QLabel("No hay modelos registrados")
             no_models.setStyleSheet("color: #808080; padding: 20px; border: none;")
             no_models.setAlignment(Qt.AlignCenter)
-            layout.addWidget(no_models)
-        
-        layout.addStretch()
-        
-        return panel
+            self.models_layout.addWidget(no_models)
 
-    def create_model_item(self, name):
-        """Crea un item de modelo."""
+    def create_model_item(self, name, thumbnail_path=None):
+        """Crea un item de modelo (con su miniatura si ya está generada)."""
         item = QFrame()
         item.setStyleSheet("""
             QFrame {
@@ -189,9 +195,15 @@ class HomeWidget(QWidget):
         layout = QHBoxLayout(item)
         layout.setContentsMargins(8, 8, 8, 8)
         
-        # Icono (emoji)
-        icon = QLabel("📦")
-        icon.setStyleSheet("font-size: 20px; border: none;")
+        # Miniatura, o icono (emoji) si aún no hay
+        pixmap = QPixmap(thumbnail_path) if thumbnail_path else QPixmap()
+        if not pixmap.isNull():
+            icon = QLabel()
+            icon.setPixmap(pixmap.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            icon.setStyleSheet("border: none; padding: 0;")
+        else:
+            icon = QLabel("📦")
+            icon.setStyleSheet("font-size: 20px; border: none;")
         layout.addWidget(icon)
         
         # Nombre
@@ -223,10 +235,21 @@ class HomeWidget(QWidget):
         
         return item
 
+    def load_dashboard_data(self):
+        """Consultas del dashboard (se ejecuta en el hilo de base de datos)."""
+        return {
+            'filaments': self.inventory_manager.get_all_filaments(),
+            'models': self.library_manager.get_all_models(),
+        }
+
     def refresh_dashboard(self):
-        """Actualiza todos los elementos del dashboard."""
-        self.update_materials_chart()
-        if hasattr(self, 'notifications_panel'):
-            self.notifications_panel.refresh_data()
+        """Actualiza todos los elementos del dashboard sin bloquear la interfaz."""
+        run_in_db(self.load_dashboard_data, on_result=self.show_dashboard, owner=self)
+
+    def show_dashboard(self, data):
+        """Pinta los datos leídos por load_dashboard_data."""
+        self.update_materials_chart(data['filaments'])
+        self.show_latest_models(data['models'])
+        self.notifications_panel.refresh_data(data['filaments'], data['models'])
 
 
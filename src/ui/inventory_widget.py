@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
                              QFormLayout, QLineEdit, QComboBox, QMessageBox)
 from PyQt5.QtCore import Qt, pyqtSignal
 from src.logic.inventory_manager import InventoryManager
+from src.ui.async_db import run_in_db
 
 class InventoryWidget(QWidget):
     data_changed = pyqtSignal()
@@ -107,10 +108,12 @@ class InventoryWidget(QWidget):
         self.setLayout(layout)
 
     def refresh_table(self):
-        """Recarga la tabla con datos de la BD."""
+        """Recarga la tabla con datos de la BD (la consulta va al hilo de base de datos)."""
+        run_in_db(self.manager.get_all_filaments, on_result=self.show_filaments, owner=self)
+
+    def show_filaments(self, filaments):
+        """Rellena la tabla con los filamentos leídos."""
         self.table.setRowCount(0)
-        filaments = self.manager.get_all_filaments()
-        
         if filaments:
             for row_idx, f in enumerate(filaments):
                 self.table.insertRow(row_idx)
@@ -135,26 +138,6 @@ class InventoryWidget(QWidget):
         try:
             weight_val = float(weight)
             price_val = float(price)
-            
-            success, msg = self.manager.add_filament(brand, m_type, color, weight_val, price_val)
-            if success:
-                self.refresh_table()
-                self.clear_inputs()
-                
-                msg_box = QMessageBox(self)
-                msg_box.setWindowTitle("Éxito")
-                msg_box.setText(msg)
-                msg_box.setIcon(QMessageBox.Information)
-                msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
-                msg_box.exec_()
-                self.data_changed.emit() # Emitir señal de cambio
-            else:
-                msg_box = QMessageBox(self)
-                msg_box.setWindowTitle("Error")
-                msg_box.setText(msg)
-                msg_box.setIcon(QMessageBox.Warning)
-                msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
-                msg_box.exec_()
         except ValueError:
             msg = QMessageBox(self)
             msg.setWindowTitle("Error")
@@ -162,6 +145,31 @@ class InventoryWidget(QWidget):
             msg.setIcon(QMessageBox.Warning)
             msg.addButton("Aceptar", QMessageBox.AcceptRole)
             msg.exec_()
+            return
+        
+        run_in_db(self.manager.add_filament, brand, m_type, color, weight_val, price_val,
+                  on_result=self.on_filament_added, owner=self)
+
+    def on_filament_added(self, result):
+        success, msg = result
+        if success:
+            self.refresh_table()
+            self.clear_inputs()
+            
+            msg_box = QMessageBox(self)
+            msg_box.setWindowTitle("Éxito")
+            msg_box.setText(msg)
+            msg_box.setIcon(QMessageBox.Information)
+            msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
+            msg_box.exec_()
+            self.data_changed.emit() # Emitir señal de cambio
+        else:
+            msg_box = QMessageBox(self)
+            msg_box.setWindowTitle("Error")
+            msg_box.setText(msg)
+            msg_box.setIcon(QMessageBox.Warning)
+            msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
+            msg_box.exec_()
 
     def delete_filament(self):
         selected_rows = self.table.selectionModel().selectedRows()
@@ -179,17 +187,19 @@ class InventoryWidget(QWidget):
         if msg_box.clickedButton() == btn_si:
             row = selected_rows[0].row()
             f_id = int(self.table.item(row, 0).text())
-            
-            if self.manager.delete_filament(f_id):
-                self.refresh_table()
-                self.data_changed.emit() # Emitir señal de cambio
-            else:
-                msg_box = QMessageBox(self)
-                msg_box.setWindowTitle("Error")
-                msg_box.setText("No se pudo eliminar.")
-                msg_box.setIcon(QMessageBox.Warning)
-                msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
-                msg_box.exec_()
+            run_in_db(self.manager.delete_filament, f_id, on_result=self.on_filament_deleted, owner=self)
+
+    def on_filament_deleted(self, deleted):
+        if deleted:
+            self.refresh_table()
+            self.data_changed.emit() # Emitir señal de cambio
+        else:
+            msg_box = QMessageBox(self)
+            msg_box.setWindowTitle("Error")
+            msg_box.setText("No se pudo eliminar.")
+            msg_box.setIcon(QMessageBox.Warning)
+            msg_box.addButton("Aceptar", QMessageBox.AcceptRole)
+            msg_box.exec_()
 
     def clear_inputs(self):
         self.input_brand.clear()
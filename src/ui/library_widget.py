@@ -1,11 +1,21 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                             QListWidget, QFileDialog, QMessageBox, QSplitter, QLineEdit, QFrame, QLabel)
+                             QListWidget, QFileDialog, QMessageBox, QSplitter, QLineEdit, QFrame, QLabel,
+                             QMenu, QProgressDialog)
 from src.ui.utils import MessageBoxHelper
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QObject, pyqtSignal
+import threading
 from PyQt5.QtGui import QIcon
 from src.logic.library_manager import LibraryManager
+from src.database.db_worker import DBWorker
+from src.ui.async_db import run_in_db
 from src.ui.viewer_3d import Viewer3DWidget
 
+
+class ImportSignals(QObject):
+    """Señales para seguir desde la interfaz una importación masiva hecha en otro hilo."""
+    progress = pyqtSignal(int, int)    # archivos procesados, total
+    finished = pyqtSignal(bool, str)
+
 class LibraryWidget(QWidget):
     def __init__(self):
         super().__init__()
@@ -65,6 +75,28 @@ class LibraryWidget(QWidget):
             }
         """)
         self.btn_add.clicked.connect(self.add_model)
+
+        # Importación masiva: carpeta (con subcarpetas) o .zip
+        self.btn_import = QPushButton("Importar")
+        self.btn_import.setCursor(Qt.PointingHandCursor)
+        self.btn_import.setStyleSheet("""
+            QPushButton {
+                background-color: #2a2a2a;
+                color: #e0e0e0;
+                border: 1px solid #3a3a3a;
+                border-radius: 6px;
+                padding: 8px 16px;
+                font-weight: 600;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                border: 1px solid #00bcd4;
+            }
+        """)
+        import_menu = QMenu(self.btn_import)
+        import_menu.addAction("Carpeta...", self.import_folder)
+        import_menu.addAction("Archivo .zip...", self.import_zip)
+        self.btn_import.setMenu(import_menu)
         
         self.btn_delete = QPushButton("Eliminar")
         self.btn_delete.setCursor(Qt.PointingHandCursor)
@@ -86,6 +118,7 @@ class LibraryWidget(QWidget):
         
         toolbar.addWidget(self.search_input, 1)
         toolbar.addWidget(self.btn_add)
+        toolbar.addWidget(self.btn_import)
         toolbar.addWidget(self.btn_delete)
         
         layout.addLayout(toolbar)
@@ -109,6 +142,7 @@ class LibraryWidget(QWidget):
         self.model_list = QListWidget()
         self.model_list.setObjectName("LibraryList") # Usa el estilo definido en QSS
         self.model_list.setSpacing(8)
+        self.model_list.setIconSize(QSize(44, 44))
         self.model_list.itemClicked.connect(self.on_model_selected)
         
         list_layout.addWidget(self.model_list)
@@ -142,6 +176,11 @@ class LibraryWidget(QWidget):
         vf_layout.addWidget(self.viewer)
         
         viewer_layout.addWidget(viewer_frame)
+        
+        # Datos geométricos del modelo seleccionado (model_metadata)
+        self.metadata_label = QLabel("")
+        self.metadata_label.setStyleSheet("color: #b0b0b0; font-size: 13px;")
+        viewer_layout.addWidget(self.metadata_label)
         splitter.addWidget(viewer_container)
         
         # Configuración del splitter
@@ -154,31 +193,52 @@ class LibraryWidget(QWidget):
 
     def refresh_list(self):
         """Recarga la lista de modelos desde la BD."""
-        self.model_list.clear()
-        self.all_models = self.manager.get_all_models()
         self.filter_list(self.search_input.text())
 
     def filter_list(self, text):
-        """Filtra la lista de modelos según el texto."""
+        """
+        Filtra la lista de modelos según el texto. El filtro se hace en la consulta, que
+        se lee por lotes en el hilo de base de datos; cada lote se añade al llegar.
+        """
         self.model_list.clear()
-        if not hasattr(self, 'all_models') or not self.all_models:
+        if getattr(self, '_model_batches', None) is not None:
+            DBWorker.default().submit(self._model_batches.close)
+        self._model_batches = self.manager.iter_models(text)
+        self.load_next_models()
+
+    def load_next_models(self):
+        """Pide al hilo de base de datos el siguiente lote de modelos."""
+        if self._model_batches is None:
+            return
+        batches = self._model_batches
+        run_in_db(next, batches, None,
+                  on_result=lambda models: self.show_models_batch(batches, models),
+                  owner=self)
+
+    def show_models_batch(self, batches, models):
+        """Añade a la lista un lote de modelos y pide el siguiente."""
+        if batches is not self._model_batches:
+            # Lote de un filtro anterior
             return
+        if not models:
+            self._model_batches = None
+            return
+        
+        from PyQt5.QtWidgets import QListWidgetItem
+        for model in models:
+            # Crear item con icono (simulado)
+            item = QListWidgetItem(f"  {model.name}")
+            if model.thumbnail_path:
+                # Miniatura ya renderizada (caché en assets/thumbnails)
+                item.setIcon(QIcon(model.thumbnail_path))
+            item.setSizeHint(QSize(0, 50)) # Altura fija para parecer tarjeta
             
-        search_text = text.lower()
-        for model in self.all_models:
-            if search_text in model['name'].lower():
-                # Crear item con icono (simulado)
-                from PyQt5.QtWidgets import QListWidgetItem
-                
-                item = QListWidgetItem(f"  {model['name']}")
-                # item.setIcon(QIcon("path/to/icon.png")) # Si tuviéramos iconos
-                item.setSizeHint(QSize(0, 50)) # Altura fija para parecer tarjeta
-                
-                # Guardamos el ID en el item
-                item.setData(Qt.UserRole, model['id'])
-                item.setData(Qt.UserRole + 1, model['file_path'])
-                
-                self.model_list.addItem(item)
+            # Guardamos el ID en el item
+            item.setData(Qt.UserRole, model.id)
+            item.setData(Qt.UserRole + 1, model.file_path)
+            
+            self.model_list.addItem(item)
+        self.load_next_models()
 
     def add_model(self):
         """Abre diálogo para seleccionar archivo STL."""
@@ -187,12 +247,72 @@ class LibraryWidget(QWidget):
             import os
             name = os.path.basename(file_path)
             
-            success, msg = self.manager.add_model(file_path, name)
-            if success:
-                self.refresh_list()
-                MessageBoxHelper.show_info(self, "Éxito", msg)
-            else:
-                MessageBoxHelper.show_warning(self, "Error", msg)
+            # El hash y la copia al almacén van en otro hilo; el resultado llega por señal
+            self.btn_add.setEnabled(False)
+            self.add_signals = ImportSignals()
+            self.add_signals.finished.connect(self.on_add_finished)
+            signals = self.add_signals
+            future = self.manager.add_model_async(file_path, name)
+            future.add_done_callback(
+                lambda f: signals.finished.emit(*f.result()) if not f.exception()
+                else signals.finished.emit(False, str(f.exception()))
+            )
+
+    def on_add_finished(self, success, msg):
+        self.btn_add.setEnabled(True)
+        if success:
+            self.refresh_list()
+            MessageBoxHelper.show_info(self, "Éxito", msg)
+        else:
+            MessageBoxHelper.show_warning(self, "Error", msg)
+
+    def import_folder(self):
+        """Importa todos los modelos de una carpeta y sus subcarpetas."""
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de modelos")
+        if folder:
+            self.start_import(folder)
+
+    def import_zip(self):
+        """Importa todos los modelos de un archivo .zip."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Seleccionar archivo de modelos", "", "Archivos ZIP (*.zip)")
+        if file_path:
+            self.start_import(file_path)
+
+    def start_import(self, source):
+        """Lanza la importación en segundo plano con una barra de progreso."""
+        self.btn_import.setEnabled(False)
+        self.import_cancel = threading.Event()
+        self.import_dialog = QProgressDialog("Importando modelos...", "Cancelar", 0, 100, self)
+        self.import_dialog.setWindowTitle("Importar modelos")
+        self.import_dialog.setWindowModality(Qt.NonModal)
+        self.import_dialog.canceled.connect(self.import_cancel.set)
+        self.import_dialog.show()
+
+        # Las señales se emiten desde el hilo de la importación y Qt las entrega en este
+        self.import_signals = ImportSignals()
+        self.import_signals.progress.connect(self.on_import_progress)
+        self.import_signals.finished.connect(self.on_import_finished)
+        signals = self.import_signals
+        future = self.manager.import_models_async(source, progress=signals.progress.emit,
+                                                  cancel_event=self.import_cancel)
+        future.add_done_callback(
+            lambda f: signals.finished.emit(*f.result()) if not f.exception()
+            else signals.finished.emit(False, str(f.exception()))
+        )
+
+    def on_import_progress(self, done, total):
+        if total:
+            self.import_dialog.setLabelText(f"Importando modelos... ({done} de {total})")
+            self.import_dialog.setValue(int(done * 100 / total))
+
+    def on_import_finished(self, success, msg):
+        self.import_dialog.close()
+        self.btn_import.setEnabled(True)
+        if success:
+            self.refresh_list()
+            MessageBoxHelper.show_info(self, "Importar modelos", msg)
+        elif not self.import_cancel.is_set():
+            MessageBoxHelper.show_warning(self, "Error", msg)
 
     def delete_model(self):
         """Elimina el modelo seleccionado."""
@@ -203,15 +323,37 @@ class LibraryWidget(QWidget):
         model_id = current_item.data(Qt.UserRole)
         
         if MessageBoxHelper.ask_confirmation(self, "Confirmar", "¿Estás seguro de eliminar este modelo?"):
-            if self.manager.delete_model(model_id):
-                self.refresh_list()
-                self.viewer.ax.clear() # Limpiar visor
-                self.viewer.configure_axes() # Reconfigurar ejes vacíos
-                self.viewer.canvas.draw()
-            else:
-                MessageBoxHelper.show_warning(self, "Error", "No se pudo eliminar el modelo.")
+            run_in_db(self.manager.delete_model, model_id, on_result=self.on_model_deleted, owner=self)
+
+    def on_model_deleted(self, deleted):
+        if deleted:
+            self.refresh_list()
+            self.viewer.ax.clear() # Limpiar visor
+            self.viewer.configure_axes() # Reconfigurar ejes vacíos
+            self.viewer.canvas.draw()
+        else:
+            MessageBoxHelper.show_warning(self, "Error", "No se pudo eliminar el modelo.")
 
     def on_model_selected(self, item):
         """Carga el modelo en el visor cuando se selecciona."""
         file_path = item.data(Qt.UserRole + 1)
         self.viewer.load_model(file_path)
+        self.metadata_label.setText("")
+        run_in_db(self.manager.get_model_metadata, item.data(Qt.UserRole),
+                  on_result=self.show_metadata, owner=self)
+
+    def show_metadata(self, metadata):
+        """Muestra medidas, volumen y triángulos del modelo seleccionado."""
+        if not metadata:
+            self.metadata_label.setText("Calculando datos del modelo...")
+            return
+        size_x = metadata['max_x'] - metadata['min_x']
+        size_y = metadata['max_y'] - metadata['min_y']
+        size_z = metadata['max_z'] - metadata['min_z']
+        volume = f"{metadata['volume_mm3'] / 1000:.1f} cm³"
+        if not metadata['is_watertight']:
+            volume += " (malla abierta, aproximado)"
+        self.metadata_label.setText(
+            f"{size_x:.1f} × {size_y:.1f} × {size_z:.1f} mm  ·  {volume}  ·  "
+            f"{metadata['triangle_count']:,} triángulos".replace(',', '.')
+        )
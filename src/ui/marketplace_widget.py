@@ -2,6 +2,9 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLa
                              QPushButton, QScrollArea, QFrame, QMessageBox, QGraphicsDropShadowEffect, QSizePolicy,
                              QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QFileDialog, QCheckBox, QGroupBox, QColorDialog)
 from src.ui.utils import MessageBoxHelper
+from src.logic.slicer_parser import SlicerParser
+from src.logic.gcode_cache import GcodeCache
+from src.ui.async_db import parse_gcode
 from PyQt5.QtGui import QPixmap, QColor
 from PyQt5.QtCore import Qt
 import os
@@ -341,6 +344,40 @@ class MarketplaceWidget(QWidget):
             color_inputs.append(inp)
             color_buttons.append(btn_color)
             
+        # Rellenar los gramos por color con el desglose por herramienta de un G-code
+        gcode_tools = {}
+
+        def fill_from_gcode():
+            path, _ = QFileDialog.getOpenFileName(dialog, "Seleccionar G-code", "", "G-code Files (*.gcode *.gco *.gcode.gz *.bgcode *.3mf)")
+            if not path:
+                return
+            btn_gcode.setEnabled(False)
+            parse_gcode(SlicerParser(cache=GcodeCache()), path, on_result=show_gcode_tools,
+                        on_error=gcode_error, owner=dialog)
+
+        def gcode_error(error):
+            btn_gcode.setEnabled(True)
+            MessageBoxHelper.show_warning(dialog, "Error", f"No se pudo leer el G-code: {error}")
+
+        def show_gcode_tools(data):
+            btn_gcode.setEnabled(True)
+            weights = data.get('tool_weights_g') if data else None
+            if not weights:
+                MessageBoxHelper.show_warning(dialog, "Aviso", "El G-code no contiene consumo por color.")
+                return
+            gcode_tools.clear()
+            gcode_tools.update(data)
+            for i, inp in enumerate(color_inputs):
+                inp.setText(f"{weights[i]:.2f}" if i < len(weights) else "")
+            if len(weights) > len(color_inputs):
+                MessageBoxHelper.show_warning(dialog, "Aviso",
+                    f"El G-code usa {len(weights)} filamentos; solo se muestran los {len(color_inputs)} primeros.")
+
+        btn_gcode = QPushButton("Rellenar desde G-code")
+        btn_gcode.setStyleSheet("background-color: #555; color: white; border-radius: 4px; padding: 5px;")
+        btn_gcode.clicked.connect(fill_from_gcode)
+        ams_layout.addWidget(btn_gcode)
+
         ams_group.setVisible(False) # Oculto por defecto
         form_layout.addRow(ams_group)
 
@@ -413,10 +450,16 @@ class MarketplaceWidget(QWidget):
             ams_data = []
             if is_ams:
                 for i in range(4):
-                    ams_data.append({
+                    entry = {
                         "color": selected_colors[i],
                         "grams": color_inputs[i].text()
-                    })
+                    }
+                    # Datos del G-code importado (longitud y coste por herramienta)
+                    for key, field in (("length_m", 'tool_lengths_m'), ("cost", 'tool_costs')):
+                        values = gcode_tools.get(field, [])
+                        if i < len(values):
+                            entry[key] = values[i]
+                    ams_data.append(entry)
             
             if name and price:
                 self.upload_model(name, price, desc, img_path, stl_path, base_cost, is_ams, ams_data)
@@ -1,13 +1,13 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QProgressBar)
 from PyQt5.QtCore import Qt
-from src.logic.inventory_manager import InventoryManager
-from src.logic.library_manager import LibraryManager
 
 class NotificationsPanel(QWidget):
+    """
+    Tarjetas de avisos del dashboard. No consulta la base de datos: HomeWidget le pasa
+    los datos leídos en el hilo de base de datos mediante refresh_data.
+    """
     def __init__(self):
         super().__init__()
-        self.inventory_manager = InventoryManager()
-        self.library_manager = LibraryManager()
         self.init_ui()
 
     def init_ui(self):
@@ -17,17 +17,14 @@ class NotificationsPanel(QWidget):
 
         # Tarjeta 1: Filamentos con poco material
         self.low_material_card = self.create_card("Filamentos con poco material")
-        self.populate_low_material_card(self.low_material_card)
         main_layout.addWidget(self.low_material_card)
 
         # Tarjeta 2: Filamentos más usados este mes
         self.most_used_card = self.create_card("Filamentos más usados este mes")
-        self.populate_most_used_card(self.most_used_card)
         main_layout.addWidget(self.most_used_card)
 
         # Tarjeta 3: Resumen mensual
         self.monthly_summary_card = self.create_card("Resumen mensual")
-        self.populate_monthly_summary_card(self.monthly_summary_card)
         main_layout.addWidget(self.monthly_summary_card)
 
         self.setLayout(main_layout)
@@ -47,11 +44,10 @@ class NotificationsPanel(QWidget):
 
         return card
 
-    def populate_low_material_card(self, card):
+    def populate_low_material_card(self, card, filaments):
         layout = card.layout()
         
         # Lógica para obtener filamentos bajos
-        filaments = self.inventory_manager.get_all_filaments()
         low_stock_filaments = []
 
         for f in filaments:
@@ -173,7 +169,7 @@ class NotificationsPanel(QWidget):
 
         layout.addStretch()
 
-    def populate_monthly_summary_card(self, card):
+    def populate_monthly_summary_card(self, card, models):
         layout = card.layout()
         
         # 1. Material más consumido (Mock)
@@ -194,8 +190,6 @@ class NotificationsPanel(QWidget):
         layout.addWidget(line)
 
         # 3. Últimos modelos añadidos (Real)
-        models = self.library_manager.get_all_models()
-        
         recent_lbl = QLabel("Añadidos recientemente:")
         recent_lbl.setStyleSheet("color: #e0e0e0; font-weight: bold; font-size: 13px; border: none; margin-top: 5px;")
         layout.addWidget(recent_lbl)
@@ -212,13 +206,13 @@ class NotificationsPanel(QWidget):
 
         layout.addStretch()
 
-    def refresh_data(self):
-        """Actualiza los datos de todas las tarjetas."""
+    def refresh_data(self, filaments, models):
+        """Actualiza todas las tarjetas con los filamentos y modelos indicados."""
         # Limpiar layouts de tarjetas (excepto título)
         for card, populate_func in [
-            (self.low_material_card, self.populate_low_material_card),
+            (self.low_material_card, lambda card: self.populate_low_material_card(card, filaments)),
             (self.most_used_card, self.populate_most_used_card),
-            (self.monthly_summary_card, self.populate_monthly_summary_card)
+            (self.monthly_summary_card, lambda card: self.populate_monthly_summary_card(card, models))
         ]:
             layout = card.layout()
             # Eliminar todo menos el título (index 0)
@@ -1,14 +1,22 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel,
                              QPushButton, QScrollArea, QFrame, QMessageBox, QDialog,
                              QFormLayout, QLineEdit, QComboBox, QTextEdit, QDoubleSpinBox,
-                             QFileDialog)
+                             QFileDialog, QProgressDialog)
 from src.ui.utils import MessageBoxHelper
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QFont
 from src.logic.project_manager import ProjectManager
 from src.logic.library_manager import LibraryManager
 from src.logic.inventory_manager import InventoryManager
 from src.logic.report_generator import ReportGenerator
+from src.database.db_worker import DBWorker
+from src.ui.async_db import run_in_db
+
+
+class GcodeImportSignals(QObject):
+    """Señales para seguir desde la interfaz una importación de G-code hecha en otro hilo."""
+    progress = pyqtSignal(int, int)    # archivos procesados, total
+    finished = pyqtSignal(object)      # (creados, fallidos) o la excepción
 
 class ProjectsWidget(QWidget):
     """Widget para gestión de proyectos de impresión 3D."""
@@ -62,6 +70,25 @@ class ProjectsWidget(QWidget):
         btn_stats.clicked.connect(self.export_stats)
         header_layout.addWidget(btn_stats)
         
+        # Botón importar carpeta de G-code
+        self.btn_import = QPushButton("Importar G-code")
+        self.btn_import.setCursor(Qt.PointingHandCursor)
+        self.btn_import.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                border-radius: 6px;
+                padding: 10px 20px;
+                font-weight: bold;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        self.btn_import.clicked.connect(self.import_gcode_folder)
+        header_layout.addWidget(self.btn_import)
+        
         # Botón nuevo proyecto
         btn_new = QPushButton("+ Nuevo Proyecto")
         btn_new.setCursor(Qt.PointingHandCursor)
@@ -110,24 +137,49 @@ class ProjectsWidget(QWidget):
             if widget:
                 widget.setParent(None)
         
-        # Obtener proyectos
-        projects = self.project_manager.get_all_projects(self.user['id'])
+        # Obtener proyectos por lotes: cada lote se lee en el hilo de base de datos y se
+        # pinta al llegar, sin cargar todo el listado en memoria. El generador (y su cursor)
+        # solo se usa desde ese hilo, también para cerrarlo
+        if getattr(self, '_project_batches', None) is not None:
+            DBWorker.default().submit(self._project_batches.close)
+        self._project_batches = self.project_manager.iter_projects(self.user['id'])
+        self._project_count = 0
+        self.load_next_projects()
+    
+    def load_next_projects(self):
+        """Pide al hilo de base de datos el siguiente lote de proyectos."""
+        if self._project_batches is None:
+            return
+        batches = self._project_batches
+        run_in_db(next, batches, None,
+                  on_result=lambda projects: self.show_projects_batch(batches, projects),
+                  owner=self)
+    
+    def show_projects_batch(self, batches, projects):
+        """Añade al grid un lote de proyectos y pide el siguiente."""
+        if batches is not self._project_batches:
+            # Lote de una carga anterior (se recargó mientras se leía)
+            return
         
         if not projects:
-            # Mensaje si no hay proyectos
-            no_projects = QLabel("No tienes proyectos aún. ¡Crea tu primer proyecto!")
-            no_projects.setStyleSheet("color: #888; font-size: 16px; padding: 40px;")
-            no_projects.setAlignment(Qt.AlignCenter)
-            self.projects_layout.addWidget(no_projects, 0, 0)
+            self._project_batches = None
+            if self._project_count == 0:
+                # Mensaje si no hay proyectos
+                no_projects = QLabel("No tienes proyectos aún. ¡Crea tu primer proyecto!")
+                no_projects.setStyleSheet("color: #888; font-size: 16px; padding: 40px;")
+                no_projects.setAlignment(Qt.AlignCenter)
+                self.projects_layout.addWidget(no_projects, 0, 0)
             return
         
         # Mostrar proyectos en grid
         col_count = 3
-        for i, project in enumerate(projects):
+        for i, project in enumerate(projects, self._project_count):
             card = self.create_project_card(project)
             row = i // col_count
             col = i % col_count
             self.projects_layout.addWidget(card, row, col)
+        self._project_count += len(projects)
+        self.load_next_projects()
     
     def create_project_card(self, project):
         """Crea una tarjeta de proyecto."""
@@ -224,8 +276,12 @@ class ProjectsWidget(QWidget):
             self.load_projects()
     
     def edit_project(self, project_id):
+        """Pide el proyecto al hilo de base de datos y abre el diálogo para editarlo."""
+        run_in_db(self.project_manager.get_project_by_id, project_id,
+                  on_result=self.open_edit_project_dialog, owner=self)
+    
+    def open_edit_project_dialog(self, project):
         """Abre el diálogo para editar un proyecto."""
-        project = self.project_manager.get_project_by_id(project_id)
         if project:
             dialog = ProjectDialog(self, self.user['id'], self.library_manager, 
                                   self.inventory_manager, project)
@@ -236,18 +292,66 @@ class ProjectsWidget(QWidget):
         """Elimina un proyecto."""
         if MessageBoxHelper.ask_confirmation(self.window(), "Confirmar eliminación", 
                                            f"¿Estás seguro de que deseas eliminar el proyecto '{project_name}'?"):
-            success, message = self.project_manager.delete_project(project_id)
-            
-            if success:
-                MessageBoxHelper.show_info(self.window(), "Éxito", message)
-                self.load_projects()
-            else:
-                MessageBoxHelper.show_warning(self.window(), "Error", message)
+            run_in_db(self.project_manager.delete_project, project_id,
+                      on_result=self.on_project_deleted, owner=self)
+    
+    def on_project_deleted(self, result):
+        success, message = result
+        if success:
+            MessageBoxHelper.show_info(self.window(), "Éxito", message)
+            self.load_projects()
+        else:
+            MessageBoxHelper.show_warning(self.window(), "Error", message)
+
+    def import_gcode_folder(self):
+        """Crea un proyecto por cada G-code de la carpeta seleccionada."""
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de G-code")
+        if not folder:
+            return
+        
+        self.btn_import.setEnabled(False)
+        self.import_dialog = QProgressDialog("Importando G-code...", None, 0, 0, self)
+        self.import_dialog.setWindowTitle("Importación en lote")
+        self.import_dialog.setWindowModality(Qt.NonModal)
+        self.import_dialog.show()
+        
+        # El análisis va en otro hilo; las señales se emiten desde él y Qt las entrega en este
+        self.import_signals = GcodeImportSignals()
+        self.import_signals.progress.connect(self.on_import_progress)
+        self.import_signals.finished.connect(self.on_import_finished)
+        signals = self.import_signals
+        future = self.project_manager.import_gcode_folder_async(
+            self.user['id'], folder, progress_callback=signals.progress.emit
+        )
+        future.add_done_callback(
+            lambda f: signals.finished.emit(f.exception() or f.result())
+        )
+    
+    def on_import_progress(self, done, total):
+        self.import_dialog.setMaximum(total)
+        self.import_dialog.setValue(done)
+    
+    def on_import_finished(self, result):
+        self.import_dialog.close()
+        self.btn_import.setEnabled(True)
+        if isinstance(result, BaseException):
+            MessageBoxHelper.show_warning(self, "Error", f"No se pudo importar la carpeta: {result}")
+            return
+        created, failed = result
+        self.load_projects()
+        
+        message = f"Se han creado {created} proyectos."
+        if failed:
+            message += f"\n{len(failed)} archivos no se pudieron importar."
+        MessageBoxHelper.show_info(self, "Importación completada", message)
 
     def export_stats(self):
+        """Pide las estadísticas de proyectos al hilo de base de datos para exportarlas a PDF."""
+        run_in_db(self.project_manager.get_project_stats, self.user['id'],
+                  on_result=self.save_stats_report, owner=self)
+    
+    def save_stats_report(self, stats):
         """Exporta las estadísticas de proyectos a PDF."""
-        stats = self.project_manager.get_project_stats(self.user['id'])
-        
         if not stats or stats['total_projects'] == 0:
             MessageBoxHelper.show_warning(self, "Aviso", "No hay datos suficientes para generar un informe.")
             return
@@ -322,22 +426,12 @@ class ProjectDialog(QDialog):
         
         # Modelo
         self.model_combo = QComboBox()
-        self.load_models()
         self.model_combo.setStyleSheet(self.get_combo_style())
-        if self.is_edit and self.project[9]:
-            index = self.model_combo.findData(self.project[9])
-            if index >= 0:
-                self.model_combo.setCurrentIndex(index)
         form_layout.addRow("Modelo:", self.model_combo)
         
         # Filamento
         self.filament_combo = QComboBox()
-        self.load_filaments()
         self.filament_combo.setStyleSheet(self.get_combo_style())
-        if self.is_edit and self.project[10]:
-            index = self.filament_combo.findData(self.project[10])
-            if index >= 0:
-                self.filament_combo.setCurrentIndex(index)
         form_layout.addRow("Filamento:", self.filament_combo)
         
         # Peso
@@ -364,9 +458,9 @@ class ProjectDialog(QDialog):
         # Botones
         btn_layout = QHBoxLayout()
         
-        btn_save = QPushButton("Guardar")
-        btn_save.setCursor(Qt.PointingHandCursor)
-        btn_save.setStyleSheet("""
+        self.btn_save = QPushButton("Guardar")
+        self.btn_save.setCursor(Qt.PointingHandCursor)
+        self.btn_save.setStyleSheet("""
             QPushButton {
                 background-color: #28a745;
                 color: white;
@@ -378,8 +472,8 @@ class ProjectDialog(QDialog):
                 background-color: #218838;
             }
         """)
-        btn_save.clicked.connect(self.save_project)
-        btn_layout.addWidget(btn_save)
+        self.btn_save.clicked.connect(self.save_project)
+        btn_layout.addWidget(self.btn_save)
         
         btn_cancel = QPushButton("Cancelar")
         btn_cancel.setCursor(Qt.PointingHandCursor)
@@ -399,23 +493,51 @@ class ProjectDialog(QDialog):
         
         layout.addLayout(btn_layout)
         self.setLayout(layout)
+        
+        # Modelos y filamentos desde el hilo de base de datos. Hasta tenerlos no se puede
+        # guardar: al editar se perderían el modelo y el filamento del proyecto
+        self.btn_save.setEnabled(False)
+        self._pending_loads = 2
+        self.load_models()
+        self.load_filaments()
     
     def load_models(self):
-        """Carga los modelos disponibles."""
+        """Pide los modelos disponibles al hilo de base de datos."""
         self.model_combo.addItem("Sin modelo", None)
-        models = self.library_manager.get_all_models()
+        run_in_db(self.library_manager.get_all_models, on_result=self.show_models, owner=self)
+    
+    def show_models(self, models):
+        """Rellena el combo de modelos y selecciona el del proyecto."""
         for model in models:
             # model es un diccionario o Row
             self.model_combo.addItem(model['name'], model['id'])
+        if self.is_edit and self.project[9]:
+            index = self.model_combo.findData(self.project[9])
+            if index >= 0:
+                self.model_combo.setCurrentIndex(index)
+        self.on_data_loaded()
     
     def load_filaments(self):
-        """Carga los filamentos disponibles."""
+        """Pide los filamentos disponibles al hilo de base de datos."""
         self.filament_combo.addItem("Sin filamento", None)
-        filaments = self.inventory_manager.get_all_filaments()
+        run_in_db(self.inventory_manager.get_all_filaments, on_result=self.show_filaments, owner=self)
+    
+    def show_filaments(self, filaments):
+        """Rellena el combo de filamentos y selecciona el del proyecto."""
         for filament in filaments:
             # filament es un diccionario
             display_text = f"{filament['brand']} - {filament['material_type']} ({filament['color']})"
             self.filament_combo.addItem(display_text, filament['id'])
+        if self.is_edit and self.project[10]:
+            index = self.filament_combo.findData(self.project[10])
+            if index >= 0:
+                self.filament_combo.setCurrentIndex(index)
+        self.on_data_loaded()
+    
+    def on_data_loaded(self):
+        self._pending_loads -= 1
+        if self._pending_loads == 0:
+            self.btn_save.setEnabled(True)
     
     def save_project(self):
         """Guarda el proyecto."""
@@ -431,46 +553,27 @@ class ProjectDialog(QDialog):
         weight = self.weight_input.value()
         time_hours = self.time_input.value()
         
-        # Calcular costes si hay datos
-        costs = {'filament_cost': 0, 'energy_cost': 0, 'total_cost': 0}
-        if weight > 0 and time_hours > 0 and filament_id:
-            # Obtener precio del filamento
-            filament = self.inventory_manager.get_filament_by_id(filament_id)
-            if filament:
-                price_per_kg = filament[7]  # price
-                costs = self.project_manager.calculate_costs(weight, price_per_kg, time_hours)
-        
+        # Gramos por herramienta de un G-code multimaterial importado; se descartan si el
+        # peso se ha cambiado a mano
+        tool_weights = None
         if self.is_edit:
-            # Actualizar proyecto existente
-            success, message = self.project_manager.update_project(
-                self.project[0],
-                name=name,
-                description=description,
-                status=status,
-                model_id=model_id,
-                filament_id=filament_id,
-                weight_grams=weight,
-                print_time_hours=time_hours,
-                **costs
-            )
-        else:
-            # Crear nuevo proyecto
-            success, message = self.project_manager.create_project(
-                self.user_id, name, description, model_id, filament_id,
-                weight, time_hours, status
-            )
-            
-            # Actualizar costes
-            if success:
-                # Obtener el ID del proyecto recién creado y actualizar costes
-                projects = self.project_manager.get_all_projects(self.user_id)
-                if projects:
-                    latest_project_id = projects[0][0]
-                    self.project_manager.update_project(latest_project_id, **costs)
-        
+            tool_weights = self.project_manager.load_tool_weights(self.project[14])
+            # (cada herramienta va redondeada a 0.01 g)
+            if tool_weights and abs(sum(tool_weights) - weight) > 0.01 * len(tool_weights):
+                tool_weights = None
+        
+        # Costes y guardado en el hilo de base de datos
+        self.btn_save.setEnabled(False)
+        run_in_db(self.project_manager.save_project, self.project[0] if self.is_edit else None,
+                  self.user_id, name, description, status, model_id, filament_id, weight, time_hours,
+                  tool_weights, on_result=self.on_project_saved, owner=self)
+    
+    def on_project_saved(self, result):
+        success, message = result
         if success:
             self.accept()
         else:
+            self.btn_save.setEnabled(True)
             MessageBoxHelper.show_warning(self, "Error", message)
     
     def get_input_style(self):
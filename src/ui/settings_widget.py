@@ -1,7 +1,19 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QComboBox, QCheckBox, QTextEdit, QPushButton, QFrame, QMessageBox)
+                             QComboBox, QCheckBox, QTextEdit, QPushButton, QFrame, QMessageBox,
+                             QSpinBox, QFileDialog, QProgressDialog)
 from src.ui.utils import MessageBoxHelper
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QObject
+import os
+import threading
+from datetime import datetime
+from src.database.db_manager import DBManager
+from src.database.query_stats import profiler
+
+
+class BackupSignals(QObject):
+    """Señales para seguir desde la interfaz una copia de seguridad hecha en otro hilo."""
+    progress = pyqtSignal(int, int)    # páginas copiadas, total
+    finished = pyqtSignal(bool, str)
 
 class SettingsWidget(QWidget):
     logout_requested = pyqtSignal()  # Señal para cerrar sesión
@@ -126,6 +138,12 @@ class SettingsWidget(QWidget):
         
         main_layout.addWidget(session_frame)
 
+        # --- Sección Copia de seguridad ---
+        main_layout.addWidget(self.create_backup_panel())
+
+        # --- Sección Rendimiento de la base de datos ---
+        main_layout.addWidget(self.create_query_stats_panel())
+
         # --- Sección Reportar Error ---
         report_frame = QFrame()
         report_frame.setObjectName("Card")
@@ -180,6 +198,145 @@ class SettingsWidget(QWidget):
         main_layout.addStretch()
         self.setLayout(main_layout)
 
+    def create_backup_panel(self):
+        """Panel para hacer una copia de seguridad de la base de datos sin cerrar la aplicación."""
+        backup_frame = QFrame()
+        backup_frame.setObjectName("Card")
+        backup_layout = QVBoxLayout(backup_frame)
+        backup_layout.setContentsMargins(20, 20, 20, 20)
+
+        backup_title = QLabel("Copia de seguridad")
+        backup_title.setStyleSheet("font-size: 18px; font-weight: 600; color: #e0e0e0; border: none; margin-bottom: 10px;")
+        backup_layout.addWidget(backup_title)
+
+        backup_desc = QLabel("Guarda una copia de la base de datos. Puedes seguir trabajando mientras se hace.")
+        backup_desc.setStyleSheet("color: #b0b0b0; margin-bottom: 5px; border: none;")
+        backup_layout.addWidget(backup_desc)
+
+        backup_buttons = QHBoxLayout()
+        self.backup_btn = QPushButton("Crear copia de seguridad")
+        self.backup_btn.setCursor(Qt.PointingHandCursor)
+        self.backup_btn.clicked.connect(self.start_backup)
+        backup_buttons.addWidget(self.backup_btn)
+        backup_buttons.addStretch()
+        backup_layout.addLayout(backup_buttons)
+
+        return backup_frame
+
+    def start_backup(self):
+        """Pide el destino y lanza la copia en segundo plano con una barra de progreso."""
+        db = DBManager()
+        default_name = os.path.join(os.path.dirname(db.db_file), 'backups',
+                                    f"gestor3d_{datetime.now():%Y%m%d_%H%M%S}.db")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Guardar copia de seguridad",
+                                                   default_name, "Base de datos SQLite (*.db)")
+        if not file_path:
+            return
+
+        self.backup_btn.setEnabled(False)
+        self.backup_cancel = threading.Event()
+        self.backup_dialog = QProgressDialog("Copiando base de datos...", "Cancelar", 0, 100, self)
+        self.backup_dialog.setWindowTitle("Copia de seguridad")
+        self.backup_dialog.setWindowModality(Qt.NonModal)
+        self.backup_dialog.canceled.connect(self.backup_cancel.set)
+        self.backup_dialog.show()
+
+        # Las señales se emiten desde el hilo de la copia y Qt las entrega en este
+        self.backup_signals = BackupSignals()
+        self.backup_signals.progress.connect(self.on_backup_progress)
+        self.backup_signals.finished.connect(self.on_backup_finished)
+        signals = self.backup_signals
+        future = db.backup_async(file_path, progress=signals.progress.emit,
+                                 cancel_event=self.backup_cancel)
+        future.add_done_callback(
+            lambda f: signals.finished.emit(*f.result()) if not f.exception()
+            else signals.finished.emit(False, str(f.exception()))
+        )
+
+    def on_backup_progress(self, copied, total):
+        if total:
+            self.backup_dialog.setValue(int(copied * 100 / total))
+
+    def on_backup_finished(self, success, msg):
+        self.backup_dialog.close()
+        self.backup_btn.setEnabled(True)
+        if success:
+            MessageBoxHelper.show_info(self, "Copia de seguridad", msg)
+        elif not self.backup_cancel.is_set():
+            MessageBoxHelper.show_error(self, "Error", msg)
+
+    def create_query_stats_panel(self):
+        """Panel para activar el registro de tiempos de las consultas y exportar el informe."""
+        stats_frame = QFrame()
+        stats_frame.setObjectName("Card")
+        stats_layout = QVBoxLayout(stats_frame)
+        stats_layout.setContentsMargins(20, 20, 20, 20)
+
+        stats_title = QLabel("Rendimiento de la base de datos")
+        stats_title.setStyleSheet("font-size: 18px; font-weight: 600; color: #e0e0e0; border: none; margin-bottom: 10px;")
+        stats_layout.addWidget(stats_title)
+
+        self.stats_check = QCheckBox("Registrar tiempos de las consultas")
+        self.stats_check.setStyleSheet("color: #e0e0e0; border: none;")
+        self.stats_check.setChecked(profiler.enabled)
+        self.stats_check.toggled.connect(self.toggle_query_stats)
+        stats_layout.addWidget(self.stats_check)
+
+        slow_layout = QHBoxLayout()
+        slow_label = QLabel("Guardar en el registro de consultas lentas las que tarden más de:")
+        slow_label.setStyleSheet("color: #b0b0b0; border: none;")
+        self.slow_spin = QSpinBox()
+        self.slow_spin.setRange(0, 60000)
+        self.slow_spin.setSuffix(" ms")
+        self.slow_spin.setValue(int(profiler.slow_ms))
+        self.slow_spin.setStyleSheet("background-color: #333333; color: white; border: 1px solid #555; padding: 4px;")
+        self.slow_spin.valueChanged.connect(lambda value: setattr(profiler, 'slow_ms', value))
+        slow_layout.addWidget(slow_label)
+        slow_layout.addWidget(self.slow_spin)
+        slow_layout.addStretch()
+        stats_layout.addLayout(slow_layout)
+
+        log_label = QLabel(f"Registro: {profiler.log_file}")
+        log_label.setStyleSheet("color: #808080; font-size: 12px; border: none;")
+        stats_layout.addWidget(log_label)
+
+        stats_buttons = QHBoxLayout()
+        btn_export = QPushButton("Exportar informe")
+        btn_export.setCursor(Qt.PointingHandCursor)
+        btn_export.clicked.connect(self.export_query_report)
+        btn_reset = QPushButton("Reiniciar estadísticas")
+        btn_reset.setCursor(Qt.PointingHandCursor)
+        btn_reset.clicked.connect(profiler.reset)
+        stats_buttons.addWidget(btn_export)
+        stats_buttons.addWidget(btn_reset)
+        stats_buttons.addStretch()
+        stats_layout.addLayout(stats_buttons)
+
+        return stats_frame
+
+    def toggle_query_stats(self, checked):
+        """Activa o desactiva el registro de consultas."""
+        if checked:
+            profiler.enable(slow_ms=self.slow_spin.value())
+        else:
+            profiler.disable()
+
+    def export_query_report(self):
+        """Guarda en CSV las consultas que más tiempo suman."""
+        if not profiler.summary(1):
+            MessageBoxHelper.show_warning(self, "Sin datos",
+                                          "No hay consultas registradas. Activa el registro y usa la aplicación.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Exportar informe de consultas",
+                                                   "informe_consultas.csv", "CSV (*.csv)")
+        if not file_path:
+            return
+        success, msg = profiler.export_report(file_path)
+        if success:
+            MessageBoxHelper.show_info(self, "Informe exportado", msg)
+        else:
+            MessageBoxHelper.show_error(self, "Error", msg)
+
     def handle_logout(self):
         """Emite señal para cerrar sesión y volver al login."""
         self.logout_requested.emit()
@@ -2,10 +2,13 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d import art3d
-import trimesh
 import numpy as np
+from src.logic import stl_reader
 
 class Viewer3DWidget(QWidget):
+    # Triángulos que se dibujan como mucho; las mallas mayores se simplifican
+    MAX_PREVIEW_TRIANGLES = 5000
+
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout()
@@ -76,22 +79,14 @@ class Viewer3DWidget(QWidget):
         self.draw_shadow_blob() # Añadir sombra base
         
         try:
-            mesh = trimesh.load(file_path)
-            
-            if isinstance(mesh, trimesh.Scene):
-                if len(mesh.geometry) > 0:
-                    mesh = list(mesh.geometry.values())[0]
-                else:
-                    return
-
-            if len(mesh.faces) > 5000:
-                mesh = mesh.simplify_quadratic_decimation(5000)
+            triangles = stl_reader.load_triangles(file_path)
+            if len(triangles) == 0:
+                return
 
-            vertices = mesh.vertices
-            faces = mesh.faces
+            triangles = stl_reader.decimate(triangles, self.MAX_PREVIEW_TRIANGLES)
 
             # Material moderno: Gris metálico suave con bordes muy sutiles
-            poly3d = art3d.Poly3DCollection(vertices[faces], alpha=0.9)
+            poly3d = art3d.Poly3DCollection(triangles, alpha=0.9)
             poly3d.set_facecolor('#cfcfcf') # Gris claro para mejor contraste con fondo oscuro
             poly3d.set_edgecolor('#2a2a2a') # Bordes oscuros sutiles
             poly3d.set_linewidth(0.05) # Líneas muy finas
@@ -99,7 +94,7 @@ class Viewer3DWidget(QWidget):
             self.ax.add_collection3d(poly3d)
 
             # Auto-escalado y centrado
-            scale = vertices.flatten()
+            scale = triangles.flatten()
             self.ax.auto_scale_xyz(scale, scale, scale)
             
             # Ajustar límites para que el modelo quede sobre la sombra (Z>=0)
@@ -0,0 +1,161 @@
+import unittest
+import os
+import sys
+import sqlite3
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+
+class TestDBManager(unittest.TestCase):
+
+    DB_FILE = "test_db_manager.db"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.execute_query("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT)")
+
+    def tearDown(self):
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.db.fetch_one("PRAGMA journal_mode")[0], 'wal')
+        self.assertEqual(self.db.fetch_one("PRAGMA synchronous")[0], 1)  # NORMAL
+        self.assertEqual(self.db.fetch_one("PRAGMA foreign_keys")[0], 1)
+        self.assertEqual(self.db.fetch_one("PRAGMA cache_size")[0], -ConnectionPool.CACHE_SIZE_KB)
+
+    def test_connection_per_thread(self):
+        other = DBManager(self.DB_FILE)
+        self.assertIs(other.connection, self.db.connection)
+
+        seen = {}
+        def worker():
+            manager = DBManager(self.DB_FILE)
+            manager.execute_query("INSERT INTO items (name) VALUES (?)", ("hilo",))
+            seen['connection'] = manager.connection
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(seen['connection'], self.db.connection)
+        self.assertEqual(self.db.fetch_query("SELECT name FROM items"), [{'name': 'hilo'}])
+
+    def test_disconnect_reconnects_lazily(self):
+        self.db.disconnect()
+        self.assertIsNone(self.db.connection)
+        self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("a",))
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM items")[0], 1)
+
+    def test_transaction_commit_and_rollback(self):
+        with self.db.transaction():
+            self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("a",))
+            self.assertTrue(self.db.connection.in_transaction)
+        self.assertFalse(self.db.connection.in_transaction)
+
+        with self.assertRaises(ValueError):
+            with self.db.transaction():
+                self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("b",))
+                raise ValueError()
+        self.assertEqual(self.db.fetch_query("SELECT name FROM items"), [{'name': 'a'}])
+
+    def test_failed_query_releases_write_lock(self):
+        self.db.execute_query("INSERT INTO items (id, name) VALUES (1, 'a')")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.execute_query("INSERT INTO items (id, name) VALUES (1, 'b')")
+        self.assertFalse(self.db.connection.in_transaction)
+
+        # El mismo hilo puede abrir una transacción y otro hilo escribir sin esperar
+        with self.db.transaction():
+            self.db.execute_query("INSERT INTO items (name) VALUES ('c')")
+        errors = []
+        def worker():
+            try:
+                DBManager(self.DB_FILE).execute_query("INSERT INTO items (name) VALUES ('d')")
+            except sqlite3.Error as e:
+                errors.append(e)
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM items")[0], 3)
+
+    def test_nested_transaction(self):
+        with self.db.transaction():
+            self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("exterior",))
+            try:
+                with self.db.transaction():
+                    self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("interior",))
+                    raise ValueError()
+            except ValueError:
+                pass
+        self.assertEqual(self.db.fetch_query("SELECT name FROM items"), [{'name': 'exterior'}])
+
+    def test_execute_many(self):
+        count = self.db.execute_many("INSERT INTO items (name) VALUES (?)", [(f"n{i}",) for i in range(1000)])
+        self.assertEqual(count, 1000)
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM items")[0], 1000)
+
+        # Una fila inválida deshace todo el lote
+        with self.assertRaises(Exception):
+            self.db.execute_many("INSERT INTO items (id, name) VALUES (?, ?)", [(5000, "x"), (5000, "y")])
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) FROM items")[0], 1000)
+
+    def test_fetch_rows_and_columns(self):
+        self.db.execute_many("INSERT INTO items (name) VALUES (?)", [("a",), ("b",)])
+        query = "SELECT id, name FROM items ORDER BY id"
+        self.assertEqual(self.db.fetch_rows(query), [(1, 'a'), (2, 'b')])
+        rows = self.db.fetch_rows(query, named=True)
+        self.assertEqual((rows[1].id, rows[1].name), (2, 'b'))
+        self.assertEqual(self.db.fetch_columns(query), {'id': (1, 2), 'name': ('a', 'b')})
+        self.assertEqual(self.db.fetch_columns(query + " LIMIT 0"), {'id': (), 'name': ()})
+
+    def test_iter_query_batches(self):
+        self.db.execute_many("INSERT INTO items (name) VALUES (?)", [(f"n{i}",) for i in range(25)])
+        batches = list(self.db.iter_query("SELECT id, name FROM items ORDER BY id", batch_size=10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(batches[2][-1], (25, 'n24'))
+
+        # Cerrar el generador a medias no deja la conexión bloqueada
+        batches = self.db.iter_query("SELECT name FROM items", batch_size=10, named=True)
+        self.assertEqual(next(batches)[0].name, 'n0')
+        batches.close()
+        self.db.execute_query("DELETE FROM items")
+        self.assertEqual(list(self.db.iter_query("SELECT * FROM items")), [])
+
+    def test_backup(self):
+        backup_file = "test_db_manager_backup.db"
+        self.addCleanup(lambda: os.path.exists(backup_file) and os.remove(backup_file))
+        self.db.execute_many("INSERT INTO items (name) VALUES (?)", [("x" * 500,) for _ in range(2000)])
+
+        steps = []
+        def progress(copied, total):
+            steps.append((copied, total))
+            if len(steps) == 2:
+                # Escritura desde otra conexión a mitad de copia: la copia sigue siendo coherente
+                self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("durante",))
+        success, _ = self.db.backup_async(backup_file, pages=50, progress=progress).result(timeout=30)
+        self.assertTrue(success)
+        self.assertGreater(len(steps), 2)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertFalse(os.path.exists(backup_file + ".tmp"))
+
+        copy = sqlite3.connect(backup_file)
+        try:
+            self.assertEqual(copy.execute("PRAGMA journal_mode").fetchone()[0], 'delete')
+            self.assertEqual(copy.execute("SELECT COUNT(*) FROM items").fetchone()[0], 2001)
+        finally:
+            copy.close()
+
+        cancel = threading.Event()
+        cancel.set()
+        success, _ = self.db.backup("test_db_manager_cancelled.db", pages=50, cancel_event=cancel)
+        self.assertFalse(success)
+        self.assertFalse(os.path.exists("test_db_manager_cancelled.db"))
+
+if __name__ == '__main__':
+    unittest.main()
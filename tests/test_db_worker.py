@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.database.db_worker import DBWorker
+
+class TestDBWorker(unittest.TestCase):
+
+    DB_FILE = "test_db_worker.db"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.execute_query("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT)")
+        self.worker = DBWorker()
+
+    def tearDown(self):
+        self.worker.shutdown()
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+
+    def test_queries_run_on_worker_thread(self):
+        def insert_and_read():
+            self.db.execute_query("INSERT INTO items (name) VALUES (?)", ("hilo",))
+            return threading.current_thread(), self.db.connection, self.db.fetch_rows("SELECT name FROM items")
+
+        thread, connection, rows = self.worker.submit(insert_and_read).result(timeout=5)
+        self.assertIsNot(thread, threading.current_thread())
+        self.assertIsNot(connection, self.db.connection)
+        self.assertEqual(rows, [('hilo',)])
+
+    def test_tasks_in_order_and_errors(self):
+        futures = [self.worker.submit(self.db.execute_query, "INSERT INTO items (name) VALUES (?)", (str(i),))
+                   for i in range(20)]
+        failed = self.worker.submit(int, "no es un número")
+        count = self.worker.submit(self.db.fetch_one, "SELECT COUNT(*) FROM items")
+        self.assertTrue(all(f.result(timeout=5) for f in futures))
+        # La excepción llega al future y el hilo sigue atendiendo la cola
+        with self.assertRaises(ValueError):
+            failed.result(timeout=5)
+        self.assertEqual(count.result(timeout=5)[0], 20)
+
+    def test_generator_consumed_in_worker(self):
+        self.db.execute_many("INSERT INTO items (name) VALUES (?)", [(f"n{i}",) for i in range(25)])
+        batches = self.db.iter_query("SELECT name FROM items ORDER BY id", batch_size=10)
+        sizes = [len(self.worker.submit(next, batches, None).result(timeout=5)) for _ in range(3)]
+        self.assertEqual(sizes, [10, 10, 5])
+        self.assertIsNone(self.worker.submit(next, batches, None).result(timeout=5))
+
+    def test_shutdown(self):
+        self.worker.shutdown()
+        self.assertFalse(self.worker.is_alive())
+        with self.assertRaises(RuntimeError):
+            self.worker.submit(len, ())
+
+if __name__ == '__main__':
+    unittest.main()
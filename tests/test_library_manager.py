@@ -0,0 +1,222 @@
+import unittest
+import os
+import shutil
+import sys
+import threading
+import zipfile
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic.library_manager import LibraryManager
+from src.logic.model_store import file_hash
+from tests.test_stl_reader import cube_triangles, write_binary_stl
+
+class TestLibraryManager(unittest.TestCase):
+
+    DB_FILE = "test_library.db"
+    ASSETS_DIR = "test_library_assets"
+    SOURCE_DIR = "test_library_source"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.init_db()
+        self.manager = LibraryManager(self.db, assets_path=self.ASSETS_DIR)
+        os.makedirs(os.path.join(self.SOURCE_DIR, "otra"), exist_ok=True)
+
+    def tearDown(self):
+        LibraryManager.shutdown_workers(wait=True)
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+        shutil.rmtree(self.ASSETS_DIR, ignore_errors=True)
+        shutil.rmtree(self.SOURCE_DIR, ignore_errors=True)
+
+    def source(self, relative, size):
+        path = os.path.join(self.SOURCE_DIR, relative)
+        write_binary_stl(path, cube_triangles(size))
+        return path
+
+    def model_paths(self):
+        return {row['name']: row['file_path'] for row in self.manager.get_all_models()}
+
+    def test_same_basename_does_not_overwrite(self):
+        first = self.source("pieza.stl", 10.0)
+        second = self.source(os.path.join("otra", "pieza.stl"), 20.0)
+        self.assertTrue(self.manager.add_model(first, "Pieza A")[0])
+        self.assertTrue(self.manager.add_model(second, "Pieza B")[0])
+
+        paths = self.model_paths()
+        self.assertNotEqual(paths["Pieza A"], paths["Pieza B"])
+        self.assertTrue(self.manager.store.contains(paths["Pieza A"]))
+        with open(first, 'rb') as a, open(paths["Pieza A"], 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_add_model_async(self):
+        path = self.source("cubo.stl", 10.0)
+        future = self.manager.add_model_async(path, "Cubo")
+        self.assertEqual(future.result(timeout=30), (True, "Modelo añadido correctamente."))
+        self.assertTrue(self.manager.store.contains(self.model_paths()["Cubo"]))
+
+    def test_deduplication_and_reference_counting(self):
+        path = self.source("cubo.stl", 10.0)
+        self.manager.add_model(path, "Cubo")
+        # Mismo archivo y nombre: no hace nada
+        self.assertEqual(self.manager.add_model(path, "Cubo"), (True, "El modelo ya está en la biblioteca."))
+        # Otro nombre: nuevo modelo sobre el mismo archivo
+        self.manager.add_model(path, "Cubo copia")
+        paths = self.model_paths()
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(paths["Cubo"], paths["Cubo copia"])
+        stored = paths["Cubo"]
+
+        ids = {row['name']: row['id'] for row in self.manager.get_all_models()}
+        self.assertTrue(self.manager.delete_model(ids["Cubo"]))
+        self.assertTrue(os.path.exists(stored))
+        self.assertTrue(self.manager.delete_model(ids["Cubo copia"]))
+        # Sin referencias: se borran el archivo y su subcarpeta
+        self.assertFalse(os.path.exists(stored))
+        self.assertFalse(os.path.exists(os.path.dirname(stored)))
+        self.assertFalse(self.manager.delete_model(ids["Cubo"]))
+
+    def wait_for_metadata(self):
+        # El hilo de metadatos es único: una tarea vacía termina después de las encoladas
+        LibraryManager._executor().submit(lambda: None).result()
+
+    def test_metadata_on_add(self):
+        path = self.source("cubo.stl", 10.0)
+        self.manager.add_model(path, "Cubo")
+        self.wait_for_metadata()
+
+        model_id = self.manager.get_all_models()[0]['id']
+        metadata = self.manager.get_model_metadata(model_id)
+        self.assertEqual(metadata['triangle_count'], 12)
+        self.assertAlmostEqual(metadata['volume_mm3'], 1000.0)
+        self.assertAlmostEqual(metadata['surface_area_mm2'], 600.0)
+        self.assertIs(metadata['is_watertight'], True)
+        self.assertEqual(metadata['content_hash'], file_hash(path))
+        self.assertEqual(metadata['file_size'], os.path.getsize(path))
+        self.assertIsNone(self.manager.get_model_metadata(model_id + 1))
+
+    def test_backfill_metadata(self):
+        # Modelos registrados sin metadatos (p.ej. de antes de la tabla); uno sin archivo
+        path = self.source("cubo.stl", 20.0)
+        self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", ("Cubo", path))
+        self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", ("Perdido", "no_existe.stl"))
+
+        # Bloquea hasta terminar: al volver los metadatos ya están guardados
+        self.assertEqual(self.manager.backfill_metadata(), 1)
+        self.assertAlmostEqual(self.manager.get_model_metadata(1)['volume_mm3'], 8000.0)
+        self.assertIsNone(self.manager.get_model_metadata(2))
+        # Ya no queda nada pendiente salvo el modelo sin archivo
+        self.assertEqual(self.manager.backfill_metadata(), 0)
+
+    def test_backfill_in_batches(self):
+        self.manager.BACKFILL_BATCH = 2
+        for i in range(5):
+            path = self.source(f"cubo{i}.stl", 10.0 + i)
+            self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", (f"Cubo {i}", path))
+        pending = []
+        original = self.manager.schedule_metadata
+
+        def schedule(model_id, file_path, thumbnail):
+            pending[:] = [f for f in pending if not f.done()]
+            self.assertLess(len(pending), 2)
+            future = original(model_id, file_path, thumbnail)
+            pending.append(future)
+            return future
+        self.manager.schedule_metadata = schedule
+        self.assertEqual(self.manager.backfill_metadata(), 5)
+        self.assertTrue(all(self.manager.get_model_metadata(i) for i in range(1, 6)))
+
+    def test_background_tasks(self):
+        path = self.source("cubo.stl", 10.0)
+        self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", ("Cubo", path))
+        future = self.manager.start_background_tasks()
+        # El archivo (fuera del almacén) se migra, y después metadatos y miniatura
+        self.assertEqual(future.result(timeout=30), (1, 1, 1))
+        self.assertTrue(self.manager.store.contains(self.model_paths()["Cubo"]))
+        self.assertIsNotNone(self.manager.get_model_metadata(1))
+        # La miniatura ya está renderizada (su ruta se guarda después, en el hilo de metadatos)
+        pngs = [name for _, _, files in os.walk(self.manager.thumbnails_path)
+                for name in files if name.endswith('.png')]
+        self.assertEqual(len(pngs), 1)
+        # Tras shutdown_workers no se encola nada más
+        LibraryManager.shutdown_workers(wait=True)
+        self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", ("Cubo 2", path))
+        self.assertEqual(self.manager.backfill_metadata(LibraryManager._stop_event), 0)
+
+    def test_delete_rolled_back_keeps_file(self):
+        self.manager.add_model(self.source("cubo.stl", 10.0), "Cubo")
+        model = self.manager.get_all_models()[0]
+        # delete_model dentro de una transacción que se deshace: la fila y el archivo siguen
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.assertTrue(self.manager.delete_model(model['id']))
+                raise RuntimeError("deshacer")
+        self.assertEqual(self.model_paths(), {"Cubo": model['file_path']})
+        self.assertTrue(os.path.exists(model['file_path']))
+
+        with self.db.transaction():
+            self.manager.delete_model(model['id'])
+            # Aún sin confirmar
+            self.assertTrue(os.path.exists(model['file_path']))
+        self.assertFalse(os.path.exists(model['file_path']))
+
+    def test_migrate_legacy_files(self):
+        # Dos modelos antiguos con la misma ruta por nombre en la carpeta de la biblioteca
+        legacy = os.path.join(self.manager.library_path, "antiguo.stl")
+        write_binary_stl(legacy, cube_triangles())
+        for name in ("Antiguo", "Antiguo 2"):
+            self.db.execute_query("INSERT INTO models (name, file_path) VALUES (?, ?)", (name, legacy))
+
+        self.assertEqual(self.manager.migrate_legacy_files(), 1)
+        paths = set(self.model_paths().values())
+        self.assertEqual(len(paths), 1)
+        self.assertTrue(self.manager.store.contains(paths.pop()))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(self.manager.migrate_legacy_files(), 0)
+
+    def test_import_folder_and_zip(self):
+        self.source("a.stl", 10.0)
+        self.source(os.path.join("otra", "b.stl"), 20.0)
+        self.source(os.path.join("otra", "b_copia.stl"), 20.0)
+        with open(os.path.join(self.SOURCE_DIR, "notas.txt"), 'w') as f:
+            f.write("no es un modelo")
+
+        calls = []
+        success, msg = self.manager.import_models(self.SOURCE_DIR, progress=lambda *args: calls.append(args))
+        self.assertTrue(success, msg)
+        self.assertEqual(msg, "3 modelos importados.")
+        self.assertEqual(calls[-1], (3, 3))
+        models = self.manager.get_all_models()
+        # b y b_copia comparten archivo; los metadatos se calculan una vez y se copian
+        self.assertEqual(len({m['file_path'] for m in models}), 2)
+        volumes = sorted(self.manager.get_model_metadata(m['id'])['volume_mm3'] for m in models)
+        self.assertEqual([round(v) for v in volumes], [1000, 8000, 8000])
+
+        # El mismo contenido desde un zip: los que ya están se omiten
+        zip_path = os.path.join(self.SOURCE_DIR, "modelos.zip")
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            archive.write(os.path.join(self.SOURCE_DIR, "a.stl"), "carpeta/a.stl")
+            archive.write(os.path.join(self.SOURCE_DIR, "a.stl"), "../renombrado.stl")
+        self.assertEqual(self.manager.import_models(zip_path),
+                         (True, "1 modelos importados, 1 ya estaban en la biblioteca."))
+        self.assertEqual(len(self.manager.get_all_models()), 4)
+        # Sin restos de la extracción
+        self.assertEqual(sorted(os.listdir(self.manager.library_path)),
+                         sorted({os.path.basename(os.path.dirname(m['file_path'])) for m in models}))
+
+    def test_import_cancelled(self):
+        self.source("a.stl", 10.0)
+        cancel = threading.Event()
+        cancel.set()
+        self.assertEqual(self.manager.import_models(self.SOURCE_DIR, cancel_event=cancel),
+                         (False, "Importación cancelada."))
+        self.assertEqual(self.manager.get_all_models(), [])
+        self.assertEqual(os.listdir(self.manager.library_path), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.database.migrations import migrate, MIGRATIONS
+from src.logic.project_manager import ProjectManager
+
+# Consultas de los listados y del login que deben ir siempre por índice
+HOT_QUERIES = {
+    'get_all_projects': (ProjectManager.PROJECTS_QUERY, (1,)),
+    'get_all_models': ("SELECT * FROM models ORDER BY added_date DESC", ()),
+    'login': ("""
+        SELECT id, username, is_guest, email
+        FROM users
+        WHERE username = ? AND password_hash = ? AND is_guest = 0
+    """, ('user', 'hash')),
+}
+
+class TestMigrations(unittest.TestCase):
+
+    DB_FILE = "test_migrations.db"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+
+    def tearDown(self):
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+
+    def test_migrate_sets_user_version(self):
+        latest = MIGRATIONS[-1][0]
+        self.assertEqual(migrate(self.db), latest)
+        self.assertEqual(self.db.fetch_one("PRAGMA user_version")[0], latest)
+        # Segunda ejecución: nada pendiente
+        self.assertEqual(migrate(self.db), latest)
+
+    def test_hot_queries_use_indexes(self):
+        migrate(self.db)
+        for name, (query, params) in HOT_QUERIES.items():
+            plan = [row[3] for row in self.db.fetch_rows("EXPLAIN QUERY PLAN " + query, params)]
+            for detail in plan:
+                full_scan = detail.startswith('SCAN') and 'INDEX' not in detail
+                self.assertFalse(full_scan, f"{name}: recorrido completo de tabla ({detail})")
+                self.assertNotIn('TEMP B-TREE', detail, f"{name}: ordenación sin índice ({detail})")
+
+    def test_repair_users_old_in_place(self):
+        # Base de datos antigua: filaments apunta a users_old y hay un trigger que la usa
+        self.db.execute_query("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT)")
+        self.db.execute_query("""
+            CREATE TABLE filaments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, brand TEXT NOT NULL,
+                user_id INTEGER, FOREIGN KEY (user_id) REFERENCES "users_old"(id) ON DELETE SET NULL
+            )
+        """)
+        # Con claves foráneas activas ni siquiera se puede insertar (el error original)
+        with self.assertRaises(Exception):
+            self.db.execute_query("INSERT INTO filaments (brand) VALUES ('Prusament')")
+        self.db.execute_query("PRAGMA foreign_keys = 0")
+        self.db.execute_query("INSERT INTO filaments (brand) VALUES ('Prusament')")
+        self.db.execute_query("PRAGMA foreign_keys = 1")
+        self.db.execute_query("""
+            CREATE TRIGGER sync_old AFTER INSERT ON users
+            BEGIN UPDATE users_old SET username = NEW.username; END
+        """)
+        rootpage = self.db.fetch_one("SELECT rootpage FROM sqlite_master WHERE name = 'filaments'")[0]
+
+        migrate(self.db)
+
+        self.assertEqual(self.db.fetch_rows("PRAGMA foreign_key_list(filaments)")[0][2], 'users')
+        self.assertIsNone(self.db.fetch_one("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+        # Misma tabla (no se ha copiado) y mismos datos
+        self.assertEqual(self.db.fetch_one("SELECT rootpage FROM sqlite_master WHERE name = 'filaments'")[0], rootpage)
+        self.assertEqual(self.db.fetch_rows("SELECT brand FROM filaments"), [('Prusament',)])
+        self.db.execute_query("INSERT INTO users (username) VALUES ('ana')")
+        self.db.execute_query("INSERT INTO filaments (brand, user_id) VALUES ('Sunlu', 1)")
+
+    def test_old_gcode_cache_gets_layer_data(self):
+        # Caché creada antes del desglose por capas (sin layer_data)
+        self.db.execute_query("""
+            CREATE TABLE gcode_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT NOT NULL, parse_mode TEXT NOT NULL,
+                file_size INTEGER NOT NULL, file_mtime INTEGER NOT NULL, content_hash TEXT,
+                result TEXT NOT NULL, last_access REAL NOT NULL, UNIQUE (file_path, parse_mode)
+            )
+        """)
+        migrate(self.db)
+        columns = [row[1] for row in self.db.fetch_rows("PRAGMA table_info(gcode_cache)")]
+        self.assertIn('layer_data', columns)
+        self.assertIsNotNone(self.db.fetch_one("SELECT name FROM sqlite_master WHERE name = 'model_metadata'"))
+
+    def test_failed_migration_rolls_back(self):
+        broken = MIGRATIONS + [(MIGRATIONS[-1][0] + 1, "Rota", ["CREATE TABLE x (", ])]
+        with patch('src.database.migrations.MIGRATIONS', broken):
+            with self.assertRaises(Exception):
+                migrate(self.db)
+        self.assertEqual(self.db.fetch_one("PRAGMA user_version")[0], 0)
+        self.assertIsNone(self.db.fetch_one("SELECT name FROM sqlite_master WHERE name = 'projects'"))
+
+if __name__ == '__main__':
+    unittest.main()
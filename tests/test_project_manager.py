@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic.project_manager import ProjectManager
+
+class TestProjectManager(unittest.TestCase):
+
+    DB_FILE = "test_project_manager.db"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.init_db()
+        self.db.execute_query("INSERT INTO users (username, password_hash) VALUES ('u', 'h')")
+        self.db.execute_query("""
+            INSERT INTO filaments (brand, material_type, color, weight_initial, weight_current, price)
+            VALUES ('b', 'PLA', 'r', 1000, 1000, 20)
+        """)
+        self.manager = ProjectManager(self.db)
+
+    def tearDown(self):
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+
+    def test_save_project_with_costs(self):
+        success, _ = self.manager.save_project(None, 1, "Pieza", filament_id=1,
+                                               weight_grams=100, print_time_hours=2)
+        self.assertTrue(success)
+        project = self.manager.get_project_by_id(1)
+        # 100 g a 20 €/kg + 350 W durante 2 h a 0.15 €/kWh
+        self.assertEqual((project[7], project[8], project[6]), (2.0, 0.1, 2.1))
+
+        # Al editar: multimaterial con el mismo total, mismo coste
+        success, _ = self.manager.save_project(1, 1, "Pieza AMS", filament_id=1, weight_grams=100,
+                                               print_time_hours=2, tool_weights=[60.0, 40.0])
+        self.assertTrue(success)
+        project = self.manager.get_project_by_id(1)
+        self.assertEqual(project[1], "Pieza AMS")
+        self.assertEqual(self.manager.load_tool_weights(project[14]), [60.0, 40.0])
+        self.assertEqual(project[7], 2.0)
+
+        # Sin filamento, sin costes
+        self.manager.save_project(1, 1, "Pieza AMS", weight_grams=100, print_time_hours=2)
+        self.assertEqual(self.manager.get_project_by_id(1)[6], 0)
+        self.assertEqual(len(self.manager.get_all_projects(1)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
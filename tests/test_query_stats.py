@@ -0,0 +1,81 @@
+import unittest
+import csv
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.database.query_stats import profiler, QueryProfiler, DEFAULT_LOG_FILE
+
+class TestQueryStats(unittest.TestCase):
+
+    DB_FILE = "test_query_stats.db"
+    LOG_FILE = "test_slow_queries.log"
+    REPORT_FILE = "test_query_report.csv"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.execute_query("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT)")
+        profiler.reset()
+
+    def tearDown(self):
+        profiler.enable(slow_ms=QueryProfiler.DEFAULT_SLOW_MS, log_file=DEFAULT_LOG_FILE,
+                        capacity=QueryProfiler.DEFAULT_CAPACITY)
+        profiler.disable()
+        profiler.reset()
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for path in (self.DB_FILE, self.DB_FILE + "-wal", self.DB_FILE + "-shm",
+                     self.LOG_FILE, self.REPORT_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_disabled_records_nothing(self):
+        self.db.fetch_rows("SELECT * FROM items")
+        self.assertEqual(profiler.recent(), [])
+
+    def test_records_timing_rows_and_caller(self):
+        profiler.enable(slow_ms=10 ** 6, log_file=self.LOG_FILE)
+        self.db.execute_many("INSERT INTO items (name) VALUES (?)", [("a",), ("b",), ("c",)])
+        for _ in range(3):
+            self.db.fetch_rows("SELECT id,   name FROM items")
+        list(self.db.iter_query("SELECT name FROM items", batch_size=2))
+
+        records = profiler.recent()
+        self.assertEqual(records[0].rows, 3)
+        self.assertIn("test_query_stats.py", records[1].caller)
+        self.assertIn("test_records_timing_rows_and_caller", records[1].caller)
+        self.assertEqual(records[-1].rows, 3)
+
+        summary = {item['sql']: item for item in profiler.summary()}
+        # Las sentencias se agrupan con los espacios normalizados
+        self.assertEqual(summary["SELECT id, name FROM items"]['calls'], 3)
+        self.assertEqual(summary["SELECT id, name FROM items"]['rows'], 9)
+        self.assertIn("COMMIT", summary)
+        totals = [item['total_ms'] for item in profiler.summary()]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        # Ninguna supera el umbral
+        self.assertFalse(os.path.exists(self.LOG_FILE))
+
+    def test_ring_buffer_and_slow_log(self):
+        profiler.enable(slow_ms=0, log_file=self.LOG_FILE, capacity=5)
+        for _ in range(10):
+            self.db.fetch_one("SELECT COUNT(*) FROM items")
+        self.assertEqual(len(profiler.recent()), 5)
+        self.assertEqual(profiler.summary()[0]['calls'], 10)
+
+        with open(self.LOG_FILE, encoding='utf-8') as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 10)
+        self.assertIn("SELECT COUNT(*) FROM items", lines[0])
+
+        success, _ = profiler.export_report(self.REPORT_FILE, top=5)
+        self.assertTrue(success)
+        with open(self.REPORT_FILE, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][:2], ['sql', 'llamadas'])
+        self.assertEqual(rows[1][:2], ['SELECT COUNT(*) FROM items', '10'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,21 @@
 import unittest
 import os
+import gzip
+import struct
+import zipfile
+import zlib
+import numpy as np
 import sys
+from unittest.mock import patch
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.logic.slicer_parser import SlicerParser
+from src.logic.gcode_cache import GcodeCache
+from src.logic.gcode_analyzer import GcodeAnalyzer
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic.project_manager import ProjectManager
 
 class TestSlicerParser(unittest.TestCase):
     def setUp(self):
@@ -80,5 +90,270 @@ G1 X10 Y10 E1
         
         os.remove("test_prusa_est.gcode")
 
+    def test_full_scan_mid_file_metadata(self):
+        # Metadatos a mitad de archivo (fuera de las 500 primeras líneas y de los últimos 10KB)
+        moves = "G1 X10 Y10 E0.5\n" * 2000
+        content = moves + self.prusa_content + moves
+        with open("test_full_scan.gcode", "w") as f:
+            f.write(content)
+
+        self.assertIsNone(self.parser.parse_file("test_full_scan.gcode"))
+
+        # Bloques pequeños para forzar que las líneas queden partidas entre bloques
+        self.parser.CHUNK_SIZE = 1000
+        data = self.parser.parse_file("test_full_scan.gcode", full_scan=True)
+        self.assertIsNotNone(data)
+        self.assertEqual(data['print_time_seconds'], 5025)
+        self.assertEqual(data['filament_weight_g'], 12.34)
+        self.assertAlmostEqual(data['filament_length_m'], 1.23456, places=4)
+        
+        os.remove("test_full_scan.gcode")
+
+    def test_full_scan_first_and_last_line(self):
+        # Metadatos en la primera línea y en la última sin salto de línea final
+        with open("test_full_scan_edges.gcode", "w") as f:
+            f.write(";TIME:120\nG1 X1 Y1\n;Filament used: 2.5m")
+
+        data = self.parser.parse_file("test_full_scan_edges.gcode", full_scan=True)
+        self.assertEqual(data['print_time_seconds'], 120)
+        self.assertEqual(data['filament_length_m'], 2.5)
+        
+        os.remove("test_full_scan_edges.gcode")
+
+    def test_mmap_parsing(self):
+        with open("test_mmap_cura.gcode", "w") as f:
+            f.write(self.cura_content)
+        with open("test_mmap_prusa.gcode", "w") as f:
+            f.write(self.prusa_content)
+            
+        for path in ("test_mmap_cura.gcode", "test_mmap_prusa.gcode"):
+            self.assertEqual(self.parser.parse_file(path, use_mmap=True), self.parser.parse_file(path))
+        
+        os.remove("test_mmap_cura.gcode")
+        os.remove("test_mmap_prusa.gcode")
+
+    def test_time_string_formats(self):
+        self.assertEqual(self.parser._parse_time_str("1d 2h 3m 4s"), 93784)
+        self.assertEqual(self.parser._parse_time_str("45s"), 45)
+        
+        data = self.parser._parse_metadata("; estimated printing time (normal mode) = 2h 5m\n")
+        self.assertEqual(data['print_time_seconds'], 7500)
+
+    def test_cura_fields_from_header(self):
+        # Los campos de Cura se leen de toda la cabecera (con líneas en blanco), no del cuerpo
+        content = (";FLAVOR:Marlin\n;TIME:100\n\n;Filament used: 1m\n;Filament weight: 3g\n"
+                   "G1 X10\n;Filament weight: 9g\n")
+        data = self.parser._parse_metadata(content)
+        self.assertEqual(data['filament_length_m'], 1.0)
+        self.assertEqual(data['filament_weight_g'], 3.0)
+
+    def test_parse_many(self):
+        paths = {"test_many_cura.gcode": self.cura_content,
+                 "test_many_prusa.gcode": self.prusa_content,
+                 "test_many_empty.gcode": "G1 X10 Y10\n"}
+        for path, content in paths.items():
+            with open(path, "w") as f:
+                f.write(content)
+        
+        results = dict(self.parser.parse_many(list(paths), workers=2))
+        self.assertEqual(set(results), set(paths))
+        self.assertEqual(results["test_many_cura.gcode"]['print_time_seconds'], 3665)
+        self.assertEqual(results["test_many_prusa.gcode"]['print_time_seconds'], 5025)
+        self.assertIsNone(results["test_many_empty.gcode"])
+        
+        for path in paths:
+            os.remove(path)
+
+    def test_parse_cache(self):
+        db = DBManager("test_cache.db")
+        cache = GcodeCache(db, max_entries=2)
+        parser = SlicerParser(cache=cache)
+        with open("test_cache.gcode", "w") as f:
+            f.write(self.cura_content)
+        
+        self.assertEqual(parser.parse_file("test_cache.gcode")['print_time_seconds'], 3665)
+        self.assertIsNotNone(cache.get("test_cache.gcode", 'head_tail'))
+        
+        # Si el archivo cambia, la entrada antigua se descarta
+        with open("test_cache.gcode", "w") as f:
+            f.write(self.prusa_content)
+        self.assertIsNone(cache.get("test_cache.gcode", 'head_tail'))
+        self.assertEqual(parser.parse_file("test_cache.gcode")['print_time_seconds'], 5025)
+        
+        # Límite LRU: con max_entries=2 la entrada menos usada sale
+        parser.parse_file("test_cache.gcode", full_scan=True)
+        cache.get("test_cache.gcode", 'head_tail')
+        parser.parse_file("test_cache.gcode", use_mmap=True)
+        self.assertIsNone(cache.get("test_cache.gcode", 'full_scan'))
+        self.assertIsNotNone(cache.get("test_cache.gcode", 'head_tail'))
+        
+        # La consulta y el guardado por separado del análisis (la interfaz los hace en el
+        # hilo de base de datos y analiza en otro)
+        cache.clear()
+        self.assertIsNone(parser.cached_result("test_cache.gcode", full_scan=True))
+        data = parser.parse_file("test_cache.gcode", full_scan=True, use_cache=False)
+        self.assertIsNone(cache.get("test_cache.gcode", 'full_scan'))
+        parser.store_result("test_cache.gcode", data, full_scan=True)
+        self.assertEqual(parser.cached_result("test_cache.gcode", full_scan=True), data)
+        
+        db.disconnect()
+        os.remove("test_cache.gcode")
+        os.remove("test_cache.db")
+
+    def test_parse_cache_by_hash(self):
+        db = DBManager("test_cache_hash.db")
+        cache = GcodeCache(db, use_hash=True)
+        for path in ("test_hash_a.gcode", "test_hash_b.gcode"):
+            with open(path, "w") as f:
+                f.write(self.cura_content)
+        cache.put("test_hash_a.gcode", 'head_tail', {'print_time_seconds': 3665})
+        
+        # Copia con otra ruta: acierto por contenido, leyendo el archivo una sola vez
+        with patch.object(cache, '_hash_file', wraps=cache._hash_file) as hash_file:
+            self.assertEqual(cache.get("test_hash_b.gcode", 'head_tail'), {'print_time_seconds': 3665})
+        self.assertEqual(hash_file.call_count, 1)
+        self.assertIsNotNone(cache.get("test_hash_b.gcode", 'head_tail'))
+        
+        db.disconnect()
+        for path in ("test_hash_a.gcode", "test_hash_b.gcode", "test_cache_hash.db"):
+            os.remove(path)
+
+    def test_motion_analysis_fallback(self):
+        # Cuadrado de 10mm a 10mm/s (F600) sin comentarios del slicer: 4 segundos, 4mm de filamento
+        with open("test_motion.gcode", "w") as f:
+            f.write("G90\nM82\nG92 E0\nG1 X10 Y0 F600 E1\nG1 Y10 E2\nG1 X0 E3\nG1 Y0 E4\n"
+                    "G92 E0\nG1 E-1\nG1 E0\n")
+        
+        self.assertIsNone(self.parser.parse_file("test_motion.gcode"))
+        data = self.parser.parse_file("test_motion.gcode", analyze_motion=True)
+        # Con y sin análisis de movimientos se guardan en caché por separado
+        self.assertNotEqual(self.parser._parse_mode(False, False),
+                            self.parser._parse_mode(False, False, analyze_motion=True))
+        self.assertEqual(data['slicer_name'], 'Análisis de movimientos')
+        self.assertAlmostEqual(data['filament_length_m'], 0.004)
+        # La aceleración por defecto añade algo de tiempo sobre los 4s ideales
+        self.assertGreaterEqual(data['print_time_seconds'], 4)
+        self.assertLess(data['print_time_seconds'], 6)
+        
+        os.remove("test_motion.gcode")
+
+    def test_motion_analysis_relative_and_arcs(self):
+        analyzer = GcodeAnalyzer(acceleration=1e9)
+        # Relativo: 10mm + 10mm + círculo completo de radio 5
+        analyzer.feed(b"G91\nM83\nG1 X10 F600 E1\nG1 X10 E1\nG2 X0 Y0 I5 J0 E1\n")
+        data = analyzer.result()
+        self.assertAlmostEqual(data['filament_length_m'], 0.003)
+        self.assertEqual(data['print_time_seconds'], 5)  # (20 + 31.4) mm a 10 mm/s
+        self.assertEqual(list(analyzer.position), [20, 0, 0, 3])
+
+    def test_layer_stats(self):
+        content = (
+            ";TIME:120\n;Filament used: 0.5m\nG90\nM82\n"
+            ";TYPE:SKIRT\nG1 Z0.2 F600\nG1 X10 E1\n"
+            ";TYPE:FILL\nG1 X20 E2\nG0 Z0.4\nG1 X30 E3\n;TYPE:SUPPORT\nG1 X40 E4\n"
+        )
+        with open("test_layers.gcode", "w") as f:
+            f.write(content)
+        db = DBManager("test_layers.db")
+        parser = SlicerParser(cache=GcodeCache(db))
+        parser.CHUNK_SIZE = 32  # Varias líneas partidas entre bloques
+        
+        data = parser.parse_file("test_layers.gcode", layer_stats=True)
+        self.assertEqual(data['print_time_seconds'], 120)  # Los metadatos del slicer siguen mandando
+        stats = data['layer_stats']
+        self.assertEqual(list(stats['layers']['z']), [np.float32(0.2), np.float32(0.4)])
+        self.assertEqual(list(stats['layers']['extrusion_mm']), [2, 2])
+        names = [stats['feature_names'][f] for f in stats['features']['feature']]
+        self.assertEqual(names, ['SKIRT', 'FILL', 'FILL', 'SUPPORT'])
+        self.assertEqual(list(stats['features']['layer']), [0, 0, 1, 1])
+        share = GcodeAnalyzer.feature_time_share(stats)
+        self.assertAlmostEqual(sum(share.values()), 1.0)
+        
+        # Desde caché: mismos arrays sin volver a leer el archivo
+        cached = parser.parse_file("test_layers.gcode", layer_stats=True)
+        self.assertTrue(np.array_equal(cached['layer_stats']['features'], stats['features']))
+        self.assertEqual(cached['layer_stats']['feature_names'], stats['feature_names'])
+        
+        db.disconnect()
+        os.remove("test_layers.gcode")
+        os.remove("test_layers.db")
+
+    def test_multi_tool_usage(self):
+        content = (
+            "G1 X10 E1\n"
+            "; filament used [mm] = 4000.00, 0.00, 1500.50\n"
+            "; filament used [g] = 12.30, 0.00, 4.50\n"
+            "; filament cost = 0.31, 0.00, 0.12\n"
+            "; estimated printing time (normal mode) = 1h 0m 0s\n"
+        )
+        with open("test_ams.gcode", "w") as f:
+            f.write(content)
+        
+        for options in ({}, {'full_scan': True}, {'use_mmap': True}):
+            data = self.parser.parse_file("test_ams.gcode", **options)
+            self.assertEqual(data['tool_weights_g'], [12.3, 0.0, 4.5])
+            self.assertAlmostEqual(data['filament_weight_g'], 16.8)
+            self.assertEqual(data['tool_lengths_m'], [4.0, 0.0, 1.5005])
+            self.assertEqual(data['tool_costs'], [0.31, 0.0, 0.12])
+        
+        costs = ProjectManager().calculate_costs(data['tool_weights_g'], [20, 25, 40], 1.0)
+        self.assertEqual(costs['tool_costs'], [0.25, 0.0, 0.18])
+        self.assertEqual(costs['filament_cost'], 0.43)
+        
+        # Al importarlo como proyecto se guardan los gramos de cada herramienta
+        db = DBManager("test_ams.db")
+        self.addCleanup(self.remove_db, "test_ams.db")
+        db.init_db()
+        db.execute_query("INSERT INTO users (username, password_hash) VALUES ('u', 'h')")
+        manager = ProjectManager(db)
+        self.assertEqual(manager.import_gcode_files(1, ["test_ams.gcode"], workers=1), (1, []))
+        project = manager.get_project_by_id(1)
+        self.assertEqual(project[4], 16.8)
+        self.assertEqual(manager.load_tool_weights(project[14]), [12.3, 0.0, 4.5])
+        
+        db.execute_query("INSERT INTO filaments (brand, material_type, color, weight_initial, weight_current, price) "
+                         "VALUES ('b', 'PLA', 'r', 1000, 1000, 20)")
+        manager.update_project(1, filament_id=1)
+        self.assertTrue(manager.recalculate_costs(1, energy_cost_per_kwh=0)[0])
+        self.assertEqual(manager.get_project_by_id(1)[7], 0.34)  # filament_cost
+        
+        os.remove("test_ams.gcode")
+    
+    def remove_db(self, db_file):
+        ConnectionPool.for_file(db_file).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+
+    def test_compressed_containers(self):
+        # .gcode.gz: se descomprime al vuelo
+        with gzip.open("test_gz.gcode.gz", "wt") as f:
+            f.write("G1 X10 E1\n" * 1000 + self.prusa_content)
+        data = self.parser.parse_file("test_gz.gcode.gz")
+        self.assertEqual(data['print_time_seconds'], 5025)
+        self.assertEqual(data['filament_weight_g'], 12.34)
+        
+        # 3MF: se lee la placa de menor número directamente del zip
+        with zipfile.ZipFile("test_plate.3mf", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("3D/3dmodel.model", "<model/>")
+            archive.writestr("Metadata/plate_2.gcode", "; estimated printing time = 1s\n")
+            archive.writestr("Metadata/plate_1.gcode", self.cura_content)
+        self.assertEqual(self.parser.parse_file("test_plate.3mf")['print_time_seconds'], 3665)
+        
+        # .bgcode: metadatos de impresión (deflate) y un bloque de G-code que no se lee
+        metadata = zlib.compress(b"filament used [mm]=1234.56\nfilament used [g]=3.21\n"
+                                 b"estimated printing time (normal mode)=1h 2m 3s\n")
+        with open("test_binary.bgcode", "wb") as f:
+            f.write(struct.pack('<4sIH', b'GCDE', 1, 1))
+            f.write(struct.pack('<HHII', 4, 1, 999, len(metadata)) + struct.pack('<H', 0) + metadata + b'CRC!')
+            f.write(struct.pack('<HHII', 1, 3, 999, 8) + struct.pack('<H', 0) + b'\xff' * 8 + b'CRC!')
+        data = self.parser.parse_file("test_binary.bgcode")
+        self.assertEqual(data['print_time_seconds'], 3723)
+        self.assertEqual(data['filament_weight_g'], 3.21)
+        self.assertAlmostEqual(data['filament_length_m'], 1.23456)
+        
+        for path in ("test_gz.gcode.gz", "test_plate.3mf", "test_binary.bgcode"):
+            os.remove(path)
+
 if __name__ == '__main__':
     unittest.main()
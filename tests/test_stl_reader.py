@@ -0,0 +1,101 @@
+import unittest
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.stl_reader import (read_stl, is_binary_stl, mesh_metadata, decimate,
+                                  TRIANGLE_DTYPE)
+
+def cube_triangles(size=10.0):
+    """Cubo cerrado de 12 triángulos con las normales hacia fuera."""
+    corners = np.array([[x, y, z] for x in (0, size) for y in (0, size) for z in (0, size)],
+                       dtype=np.float32)
+    faces = [(0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+             (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)]
+    return corners[np.array(faces)]
+
+def sphere_triangles(divisions=60):
+    """Esfera de radio 10 (2 * divisions² triángulos)."""
+    theta = np.linspace(0, np.pi, divisions + 1)
+    phi = np.linspace(0, 2 * np.pi, divisions + 1)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    points = np.stack([10 * np.sin(t) * np.cos(p), 10 * np.sin(t) * np.sin(p), 10 * np.cos(t)], axis=-1)
+    a, b = points[:-1, :-1], points[1:, :-1]
+    c, d = points[1:, 1:], points[:-1, 1:]
+    return np.concatenate([np.stack([a, b, c], axis=2).reshape(-1, 3, 3),
+                           np.stack([a, c, d], axis=2).reshape(-1, 3, 3)]).astype(np.float32)
+
+def write_binary_stl(path, triangles, header=b"binario"):
+    records = np.zeros(len(triangles), dtype=TRIANGLE_DTYPE)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(header.ljust(80, b' '))
+        f.write(struct.pack('<I', len(triangles)))
+        f.write(records.tobytes())
+
+def write_ascii_stl(path, triangles):
+    with open(path, 'w') as f:
+        f.write("solid prueba\n")
+        for triangle in triangles:
+            f.write("  facet normal 0 0 0\n    outer loop\n")
+            for x, y, z in triangle:
+                f.write(f"      vertex {x:e} {y:e} {z:e}\n")
+            f.write("    endloop\n  endfacet\n")
+        f.write("endsolid prueba\n")
+
+class TestStlReader(unittest.TestCase):
+
+    BINARY_FILE = "test_stl_binary.stl"
+    ASCII_FILE = "test_stl_ascii.stl"
+
+    def tearDown(self):
+        for path in (self.BINARY_FILE, self.ASCII_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_binary_and_ascii(self):
+        cube = cube_triangles()
+        # Muchos programas escriben 'solid' también en la cabecera de los binarios
+        write_binary_stl(self.BINARY_FILE, cube, header=b"solid exportado")
+        write_ascii_stl(self.ASCII_FILE, cube)
+        self.assertTrue(is_binary_stl(self.BINARY_FILE))
+        self.assertFalse(is_binary_stl(self.ASCII_FILE))
+
+        binary = read_stl(self.BINARY_FILE)
+        ascii_ = read_stl(self.ASCII_FILE)
+        # El binario es una vista sobre el archivo mapeado, sin copia
+        self.assertIsInstance(binary.base, np.memmap)
+        self.assertFalse(binary.flags.writeable)
+        np.testing.assert_array_equal(binary, cube)
+        np.testing.assert_allclose(ascii_, cube)
+        del binary
+
+    def test_metadata(self):
+        metadata = mesh_metadata(cube_triangles(10.0))
+        self.assertEqual(metadata['triangle_count'], 12)
+        self.assertAlmostEqual(metadata['volume_mm3'], 1000.0)
+        self.assertAlmostEqual(metadata['surface_area_mm2'], 600.0)
+        self.assertEqual((metadata['max_x'], metadata['max_y'], metadata['max_z']), (10.0, 10.0, 10.0))
+        self.assertTrue(metadata['is_watertight'])
+        self.assertFalse(mesh_metadata(cube_triangles()[:-1])['is_watertight'])
+
+        sphere = mesh_metadata(sphere_triangles())
+        # Poliedro inscrito: algo menos que la esfera
+        self.assertAlmostEqual(sphere['volume_mm3'], 4 / 3 * np.pi * 1000, delta=25)
+
+    def test_decimate(self):
+        sphere = sphere_triangles(100)
+        simplified = decimate(sphere, 2000)
+        self.assertLessEqual(len(simplified), 2000)
+        self.assertGreater(len(simplified), 200)
+        # La forma se conserva: mismo tamaño aproximado
+        self.assertAlmostEqual(float(simplified.max()), 10.0, delta=1.0)
+        self.assertIs(decimate(cube_triangles(), 100).dtype, np.dtype(np.float32))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DBManager, ConnectionPool
+from src.logic.inventory_manager import InventoryManager
+
+class TestTableCache(unittest.TestCase):
+
+    DB_FILE = "test_table_cache.db"
+
+    def setUp(self):
+        self.db = DBManager(self.DB_FILE)
+        self.db.init_db()
+        self.manager = InventoryManager(self.db)
+
+    def tearDown(self):
+        ConnectionPool.for_file(self.DB_FILE).close_all()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.DB_FILE + suffix):
+                os.remove(self.DB_FILE + suffix)
+
+    def test_hits_and_write_invalidation(self):
+        self.assertEqual(self.manager.get_all_filaments(), [])
+        self.manager.add_filament("Marca", "PLA", "Negro", 1000, 20)
+        filaments = self.manager.get_all_filaments()
+        self.assertEqual(len(filaments), 1)
+        # Otro gestor del mismo archivo comparte la caché
+        self.assertIs(InventoryManager(DBManager(self.DB_FILE)).get_all_filaments(), filaments)
+        self.assertEqual(self.db.cache.stats(), {'hits': 1, 'misses': 2, 'entries': 1})
+
+        self.manager.update_filament_weight(filaments[0]['id'], 500)
+        self.assertEqual(self.manager.get_all_filaments()[0]['weight_current'], 500)
+        self.manager.delete_filament(filaments[0]['id'])
+        self.assertEqual(self.manager.get_all_filaments(), [])
+        self.assertEqual(self.db.cache.stats()['misses'], 4)
+
+    def test_invalidation_inside_transaction(self):
+        self.manager.get_all_filaments()
+        with self.db.transaction():
+            self.manager.add_filament("Marca", "PETG", "Azul", 1000, 25)
+            # El propio hilo ve su escritura sin confirmar
+            self.assertEqual(len(self.manager.get_all_filaments()), 1)
+
+            # Otro hilo no la ve y puede guardar en caché lo que hay antes del commit
+            seen = {}
+            def reader():
+                seen['rows'] = InventoryManager(DBManager(self.DB_FILE)).get_all_filaments()
+            thread = threading.Thread(target=reader)
+            thread.start()
+            thread.join()
+            self.assertEqual(seen['rows'], [])
+        # Al confirmar se invalida y la lectura siguiente va a la base de datos
+        self.assertEqual(len(self.manager.get_all_filaments()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
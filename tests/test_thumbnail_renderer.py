@@ -0,0 +1,45 @@
+import unittest
+import os
+import shutil
+import sys
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.logic.thumbnail_renderer import render_triangles, render_thumbnail, thumbnail_path
+from tests.test_stl_reader import cube_triangles, write_binary_stl
+
+class TestThumbnailRenderer(unittest.TestCase):
+
+    STL_FILE = "test_thumbnail.stl"
+    CACHE_DIR = "test_thumbnails"
+
+    def tearDown(self):
+        if os.path.exists(self.STL_FILE):
+            os.remove(self.STL_FILE)
+        shutil.rmtree(self.CACHE_DIR, ignore_errors=True)
+
+    def test_render(self):
+        image = render_triangles(cube_triangles(), size=64)
+        self.assertEqual(image.shape, (64, 64, 4))
+        covered = image[:, :, 3] == 255
+        # El cubo ocupa el centro y deja las esquinas transparentes
+        self.assertTrue(covered[32, 32])
+        self.assertFalse(covered[0, 0])
+        self.assertGreater(covered.mean(), 0.3)
+        # Caras con distinta orientación, distinto sombreado
+        self.assertGreater(len(set(image[covered, 0].tolist())), 1)
+
+    def test_cached_png(self):
+        write_binary_stl(self.STL_FILE, cube_triangles())
+        path = render_thumbnail(self.STL_FILE, "ab" + "0" * 62, self.CACHE_DIR, size=32)
+        self.assertEqual(path, thumbnail_path(self.CACHE_DIR, "ab" + "0" * 62, 32))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+        # Ya en caché: no se vuelve a leer la malla
+        os.remove(self.STL_FILE)
+        self.assertEqual(render_thumbnail(self.STL_FILE, "ab" + "0" * 62, self.CACHE_DIR, size=32), path)
+
+if __name__ == '__main__':
+    unittest.main()